@@ -1,4 +1,7 @@
 import logging
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
 logging.basicConfig(
     filename='book_log.log',
     level=logging.INFO,
@@ -6,62 +9,85 @@ logging.basicConfig(
 )
 
 class BookScraper:
-    def __init__(self, base_url: str = "https://books.toscrape.com"):
+    LISTING_ONLY = 'article.product_pod'
+    DETAILS_ONLY = 'ul.breadcrumb, article.product_page'
+    DERIVED = {'value_score': ('ratio', 'rating', 'price'), 'normalized_price': ('normalized', 'price')}
+
+    def __init__(self, base_url: str = "https://books.toscrape.com", max_concurrency: int = 8):
         self.base_url = base_url
+        self.max_concurrency = max_concurrency
+
+    def page_url(self, page: int) -> str:
+        return f"{self.base_url}/catalogue/page-{page}.html" if page > 1 else f"{self.base_url}/index.html"
 
     def scrape_books(self) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from crawl_engine import crawl_pages
+        from derived_metrics import add_metrics
+        books = add_metrics(crawl_pages(self.page_url, self.scrape_page), self.DERIVED)
+        logging.info(f"Scraped {len(books)} books")
+        return books
+
+    def scrape_page(self, response):
+        from http_client import fetch_all, get_client
+        client = get_client()
+        listed = client.parse(response, 'book_scraper.listing', self.parse_listing)
+        if listed is None:
+            return None
+
         books = []
-        page = 1
-        while True:
-            url = f"{self.base_url}/catalogue/page-{page}.html" if page > 1 else f"{self.base_url}/index.html"
+        book_pages = fetch_all([item[3] for item in listed], max_per_host=self.max_concurrency)
+        for (title, price, rating, _), book_page in zip(listed, book_pages):
             try:
-                response = requests.get(url)
-                response.raise_for_status()
-                logging.info(f"Scraped page {page}")
+                if isinstance(book_page, Exception):
+                    raise book_page
+                details = client.parse(book_page, 'book_scraper.details', self.parse_details)
+
+                book = {
+                    'title': title,
+                    'price': price,
+                    'rating': rating,
+                    'category': details['category'],
+                    'availability': details['availability']
+                }
+                books.append(book)
             except Exception as e:
-                logging.error(f"Failed to scrape page {page}: {e}")
-                break
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            book_elements = soup.select('article.product_pod')
-            if not book_elements:
-                break
-
-            for book_elem in book_elements:
-                try:
-                    title = book_elem.select_one('h3 a')['title']
-                    price = float(book_elem.select_one('.price_color').text.replace('£', ''))
-
-                    rating_elem = book_elem.select_one('p.star-rating')
-                    rating_classes = rating_elem['class']
-                    rating = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}.get(rating_classes[1], 0)
-
-                    book_url = book_elem.select_one('h3 a')['href']
-                    book_page = requests.get(f"{self.base_url}/catalogue/{book_url}")
-                    book_soup = BeautifulSoup(book_page.text, 'html.parser')
-
-                    category = book_soup.select_one('.breadcrumb li:nth-child(3) a').text
-                    availability = book_soup.select_one('.availability').text.strip()
-
-                    book = {
-                        'title': title,
-                        'price': price,
-                        'rating': rating,
-                        'category': category,
-                        'availability': availability
-                    }
-                    books.append(book)
-                except Exception as e:
-                    logging.warning(f"Failed to scrape book: {e}")
-                    continue
-
-            page += 1
-
-        logging.info(f"Scraped {len(books)} books")
+                logging.warning(f"Failed to scrape book: {e}")
+                continue
         return books
 
+    def parse_listing(self, response):
+        from html_parser import parse_html
+        soup = parse_html(response.text, only=self.LISTING_ONLY)
+        book_elements = soup.select('article.product_pod')
+        if not book_elements:
+            return None
+
+        listed = []
+        for book_elem in book_elements:
+            try:
+                title = book_elem.select_one('h3 a')['title']
+                price = float(book_elem.select_one('.price_color').text.replace('£', ''))
+
+                rating_elem = book_elem.select_one('p.star-rating')
+                rating_classes = rating_elem['class']
+                rating = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}.get(rating_classes[1], 0)
+
+                book_url = book_elem.select_one('h3 a')['href']
+                listed.append((title, price, rating, f"{self.base_url}/catalogue/{book_url}"))
+            except Exception as e:
+                logging.warning(f"Failed to scrape book: {e}")
+                continue
+        return listed
+
+    def parse_details(self, response) -> dict:
+        from html_parser import parse_html
+        book_soup = parse_html(response.text, only=self.DETAILS_ONLY)
+        category_elem = book_soup.select_one('.breadcrumb li:nth-child(3) a')
+        category = category_elem.text if category_elem else 'Unknown'  # -> a changed page should not stop the scrap
+        availability_elem = book_soup.select_one('.availability')
+        availability = availability_elem.text.strip() if availability_elem else 'Unknown'
+        return {'category': category, 'availability': availability}
+
 def get_unique_categories(books: list) -> list:
     categories = set()
     for book in books:
@@ -74,17 +100,16 @@ def filter_books(books: list, category: str = None) -> list:
     return [book for book in books if book['category'] == category]
 
 def export_to_csv(books: list):
-    import pandas as pd
+    from columnar_export import export_records
     try:
-        df = pd.DataFrame(books)
-        df.to_csv('books.csv', index=False)
+        export_records(books, 'books', 'books')  # -> csv, plus parquet and arrow with pyarrow
         logging.info("Saved books to CSV")
     except Exception as e:
         logging.error(f"Failed to save CSV: {e}")
         raise
 
 def generate_visual_report(books: list):
-    import matplotlib.pyplot as plt
+    from chart_service import bar_chart, get_charts
     try:
         if not books:
             return
@@ -96,50 +121,82 @@ def generate_visual_report(books: list):
         labels = list(ratings.keys())
         counts = list(ratings.values())
 
-        plt.figure(figsize=(8, 6))
-        plt.bar(labels, counts, color='lightgreen')
-        plt.xlabel('Rating')
-        plt.ylabel('Number of Books')
-        plt.title('Distribution of Books by Rating')
-        plt.tight_layout()
-        plt.savefig('static/books_by_rating.png')
-        plt.close()
-        logging.info("Made chart for report")
+        spec = bar_chart(labels, counts, 'Distribution of Books by Rating', 'Rating', 'Number of Books',
+                         color='lightgreen')
+        return get_charts().chart('books_by_rating', spec)  # -> same ratings, same file, nothing drawn
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")
         raise
 
-from flask import Flask, render_template, send_file, request
+from flask import Flask, request
+from template_engine import app_templates, get_environment, report_response
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+SOURCE = 'books'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, filters are applied to the newest run that finished
+    books = BookScraper().scrape_books()
+    if books:
+        export_to_csv(books)  # -> files and one dataset partition per finished scrape, page views only read
+    return books
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = BookScraper()
         category = request.form.get('category', '') if request.method == 'POST' else ''
         
-        books = scraper.scrape_books()
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        books = cached.result
         books = filter_books(books, category if category else None)
         categories = get_unique_categories(books)
 
-        export_to_csv(books)
-        generate_visual_report(books)
+        chart = generate_visual_report(books)
 
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(books=books, categories=categories))
-        logging.info("Made HTML report")
-
-        return app.send_static_file('report.html')
+        chart_url = chart.url() if chart is not None else None  # -> page goes out now, /charts/ waits for the render
+        return cached.mark(report_response('report.html', books=books, categories=categories,
+                                           chart_url=chart_url))
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    from result_cache import get_result_cache
+    return jsonify({**get_result_cache().stats(), 'charts': get_charts().stats()})  # -> chart hit rate and render ms
+
 @app.route('/download')
 def download():
-    return send_file('books.csv', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'books', shape='books')  # -> ?format=csv|json|ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
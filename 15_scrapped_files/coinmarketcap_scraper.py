@@ -1,55 +1,125 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
+
 class CoinMarketCapScraper:
+    PARSE_ONLY = 'tr'
+
     def __init__(self, url: str = "https://coinmarketcap.com/"):
         self.url = url
 
     def scrape_cryptos(self) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from http_client import get_client
         cryptos = []
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(self.url, headers=headers)
+            response = get_client().get(self.url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            crypto_rows = soup.select('tr')[1:21]
-            for row in crypto_rows:
-                try:
-                    name = row.select_one('p.sc-71024e3e-0').text.strip()
-                    price = row.select_one('div.sc-b3fc6db-0 a span').text.strip()
-                    change = row.select_one('span.sc-6a540de-0').text.strip()
-
-                    cryptos.append({
-                        'name': name,
-                        'price': price,
-                        'change': change
-                    })
-                except Exception as e:
-                    continue
+            cryptos = self.parse_page(response)
         except Exception as e:
             print(f"Error: {e}")
         return cryptos
 
+    def parse_page(self, response) -> list:
+        from html_parser import parse_html
+        cryptos = []
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
+        crypto_rows = soup.select('tr')[1:21]
+        for row in crypto_rows:
+            try:
+                name = row.select_one('p.sc-71024e3e-0').text.strip()
+                price = row.select_one('div.sc-b3fc6db-0 a span').text.strip()
+                change = row.select_one('span.sc-6a540de-0').text.strip()
+
+                cryptos.append({
+                    'name': name,
+                    'price': price,
+                    'change': change
+                })
+            except Exception as e:
+                continue
+        return cryptos
+
+def to_number(text: str):
+    try:
+        return float(text.replace('$', '').replace(',', '').replace('%', ''))
+    except (AttributeError, ValueError):
+        return None
+
+def record_history(cryptos: list):
+    from timeseries_store import get_store
+    get_store().append_snapshot([{'name': crypto['name'], 'price': to_number(crypto['price']),
+                                  'change_24h': to_number(crypto['change'])} for crypto in cryptos])
+
 def export_to_json(cryptos: list):
     import json
     with open('cryptos.json', 'w') as f:
         json.dump(cryptos, f, indent=2)
 
-from flask import Flask, render_template, send_file
+from flask import Flask, render_template
 app = Flask(__name__)
+SOURCE = 'coinmarketcap'
+TTL = 120  # -> prices move, so the cached table goes stale sooner than the default
+
+def scrape() -> list:
+    # -> one whole run on a job worker, the page shows the newest run that finished
+    cryptos = CoinMarketCapScraper().scrape_cryptos()
+    export_to_json(cryptos)
+    record_history(cryptos)
+    return cryptos
 
 @app.route('/')
 def index():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = CoinMarketCapScraper()
-        cryptos = scraper.scrape_cryptos()
-        export_to_json(cryptos)
-        return render_template('report.html', cryptos=cryptos)
+        cached = get_result_cache().lookup(SOURCE, scrape, ttl=TTL)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        cryptos = cached.result
+        return cached.mark(render_template('report.html', cryptos=cryptos))
     except Exception as e:
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from result_cache import get_result_cache
+    return jsonify(get_result_cache().stats())  # -> hit ratio and how old each source's data is
+
 @app.route('/download')
 def download():
-    return send_file('cryptos.json', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'cryptos', ttl=TTL, default_format='json')  # -> or csv, ndjson
+
+@app.route('/history/<name>')
+def history(name: str):
+    import time
+    from flask import jsonify, request
+    from timeseries_store import get_store
+    try:
+        resolution = request.args.get('resolution', '1h')
+        days = request.args.get('days', 7, type=float)
+        candles = get_store().ohlc(name, resolution, start=time.time() - days * 86400)
+        return jsonify({'name': name, 'resolution': resolution, 'candles': candles})
+    except ValueError as e:
+        return f"Bad query: {e}", 400
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,4 +1,7 @@
 import logging
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
 logging.basicConfig(
     filename='flipkart_log.log',
     level=logging.INFO,
@@ -6,55 +9,50 @@ logging.basicConfig(
 )
 
 class FlipkartScraper:
+    PARSE_ONLY = 'div._1AtVbE'
+
     def __init__(self, base_url: str = "https://www.flipkart.com/mobiles/pr?sid=tyy%2C4io"):
         self.base_url = base_url
 
+    def page_url(self, page: int) -> str:
+        return f"{self.base_url}&page={page}" if page > 1 else self.base_url
+
     def scrape_products(self, max_pages: int = 2) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from crawl_engine import crawl_pages
+        products = crawl_pages(self.page_url, self.parse_page, max_pages=max_pages,
+                               parse_key='flipkart_scraper.products')
+        logging.info(f"Scraped {len(products)} products")
+        return products
+
+    def parse_page(self, response):
+        from html_parser import parse_html
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
+        product_elements = soup.select('div._1AtVbE')
+        if not product_elements:
+            return None
+
         products = []
-        page = 1
-        while page <= max_pages:
-            url = f"{self.base_url}&page={page}" if page > 1 else self.base_url
+        for product_elem in product_elements:
             try:
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                response = requests.get(url, headers=headers)
-                response.raise_for_status()
-                logging.info(f"Scraped page {page}")
-            except Exception as e:
-                logging.error(f"Failed to scrape page {page}: {e}")
-                break
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            product_elements = soup.select('div._1AtVbE')
-            if not product_elements:
-                break
-
-            for product_elem in product_elements:
-                try:
-                    name_elem = product_elem.select_one('div._4rR01T')
-                    name = name_elem.text.strip() if name_elem else "N/A"
-                    price_elem = product_elem.select_one('div._30jeq3')
-                    price = float(price_elem.text.replace('₹', '').replace(',', '')) if price_elem else 0
-                    rating_elem = product_elem.select_one('div._3LWZlK')
-                    rating = float(rating_elem.text) if rating_elem else 0
-
-                    if name == "N/A":
-                        continue
-
-                    product = {
-                        'name': name,
-                        'price': price,
-                        'rating': rating
-                    }
-                    products.append(product)
-                except Exception as e:
-                    logging.warning(f"Failed to scrape product: {e}")
+                name_elem = product_elem.select_one('div._4rR01T')
+                name = name_elem.text.strip() if name_elem else "N/A"
+                price_elem = product_elem.select_one('div._30jeq3')
+                price = float(price_elem.text.replace('₹', '').replace(',', '')) if price_elem else 0
+                rating_elem = product_elem.select_one('div._3LWZlK')
+                rating = float(rating_elem.text) if rating_elem else 0
+
+                if name == "N/A":
                     continue
 
-            page += 1
-
-        logging.info(f"Scraped {len(products)} products")
+                product = {
+                    'name': name,
+                    'price': price,
+                    'rating': rating
+                }
+                products.append(product)
+            except Exception as e:
+                logging.warning(f"Failed to scrape product: {e}")
+                continue
         return products
 
 def get_price_ranges(products: list) -> list:
@@ -76,17 +74,16 @@ def filter_products(products: list, price_range: str = None) -> list:
         return [p for p in products if p['price'] >= 50000]
 
 def export_to_csv(products: list):
-    import pandas as pd
+    from columnar_export import export_records
     try:
-        df = pd.DataFrame(products)
-        df.to_csv('products.csv', index=False)
+        export_records(products, 'products', 'products')
         logging.info("Saved products to CSV")
     except Exception as e:
         logging.error(f"Failed to save CSV: {e}")
         raise
 
 def generate_visual_report(products: list):
-    import matplotlib.pyplot as plt
+    from chart_service import bar_chart, get_charts
     try:
         if not products:
             return
@@ -106,50 +103,76 @@ def generate_visual_report(products: list):
         labels = list(ratings.keys())
         counts = list(ratings.values())
 
-        plt.figure(figsize=(8, 6))
-        plt.bar(labels, counts, color='lightblue')
-        plt.xlabel('Rating Range')
-        plt.ylabel('Number of Products')
-        plt.title('Ratings Distribution of Mobile Phones')
-        plt.tight_layout()
-        plt.savefig('static/ratings_distribution.png')
-        plt.close()
-        logging.info("Made chart for report")
+        spec = bar_chart(labels, counts, 'Ratings Distribution of Mobile Phones', 'Rating Range', 'Number of Products',
+                         color='lightblue')
+        return get_charts().chart('ratings_distribution', spec)
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")
         raise
 
-from flask import Flask, render_template, send_file, request
+from flask import Flask, request
+from template_engine import app_templates, get_environment, report_response
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+SOURCE = 'flipkart'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, filters are applied to the newest run that finished
+    products = FlipkartScraper().scrape_products(max_pages=2)
+    if products:
+        export_to_csv(products)  # -> files and one dataset partition per finished scrape, page views only read
+    return products
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = FlipkartScraper()
         price_range = request.form.get('price_range', '') if request.method == 'POST' else ''
         
-        products = scraper.scrape_products(max_pages=2)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        products = cached.result
         products = filter_products(products, price_range if price_range else None)
         price_ranges = get_price_ranges(products)
 
-        export_to_csv(products)
-        generate_visual_report(products)
-
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(products=products, price_ranges=price_ranges))
-        logging.info("Made HTML report")
+        chart = generate_visual_report(products)
 
-        return app.send_static_file('report.html')
+        chart_url = chart.url() if chart is not None else None
+        return cached.mark(report_response('report.html', products=products, price_ranges=price_ranges,
+                                           chart_url=chart_url))
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    from result_cache import get_result_cache
+    return jsonify({**get_result_cache().stats(), 'charts': get_charts().stats()})  # -> chart hit rate and render ms
+
 @app.route('/download')
 def download():
-    return send_file('products.csv', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'products', shape='products')  # -> ?format=csv|json|ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
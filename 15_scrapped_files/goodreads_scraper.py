@@ -1,55 +1,99 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
+
 class GoodreadsScraper:
+    PARSE_ONLY = 'tr[itemtype]'
+
     def __init__(self, url: str = "https://www.goodreads.com/list/show/1.Best_Books_Ever"):
         self.url = url
 
     def scrape_books(self) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from http_client import get_client
         books = []
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(self.url, headers=headers)
+            response = get_client().get(self.url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            book_elements = soup.select('tr[itemtype="http://schema.org/Book"]')
-            for book_elem in book_elements:
-                try:
-                    title = book_elem.select_one('a.bookTitle').text.strip()
-                    author = book_elem.select_one('a.authorName').text.strip()
-                    rating = book_elem.select_one('span.minirating').text.strip().split(' ')[0]
-
-                    books.append({
-                        'title': title,
-                        'author': author,
-                        'rating': rating
-                    })
-                except Exception as e:
-                    continue
+            books = self.parse_page(response)
         except Exception as e:
             print(f"Error: {e}")
         return books
 
+    def parse_page(self, response) -> list:
+        from html_parser import parse_html
+        books = []
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
+        book_elements = soup.select('tr[itemtype="http://schema.org/Book"]')
+        for book_elem in book_elements:
+            try:
+                title = book_elem.select_one('a.bookTitle').text.strip()
+                author = book_elem.select_one('a.authorName').text.strip()
+                rating = book_elem.select_one('span.minirating').text.strip().split(' ')[0]
+
+                books.append({
+                    'title': title,
+                    'author': author,
+                    'rating': rating
+                })
+            except Exception as e:
+                continue
+        return books
+
 def export_to_json(books: list):
     import json
     with open('books.json', 'w') as f:
         json.dump(books, f, indent=2)
 
-from flask import Flask, render_template, send_file
+from flask import Flask, render_template
 app = Flask(__name__)
+SOURCE = 'goodreads'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, the page shows the newest run that finished
+    books = GoodreadsScraper().scrape_books()
+    export_to_json(books)
+    return books
 
 @app.route('/')
 def index():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = GoodreadsScraper()
-        books = scraper.scrape_books()
-        export_to_json(books)
-        return render_template('report.html', books=books)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        books = cached.result
+        return cached.mark(render_template('report.html', books=books))
     except Exception as e:
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from result_cache import get_result_cache
+    return jsonify(get_result_cache().stats())  # -> hit ratio and how old each source's data is
+
 @app.route('/download')
 def download():
-    return send_file('books.json', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'books', default_format='json')  # -> or csv, ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,3 +1,6 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
 class GoogleNewsScraper:
     def __init__(self, url: str = "https://news.google.com/rss"):
         self.url = url
@@ -29,22 +32,50 @@ def export_to_json(articles: list):
     with open('news.json', 'w') as f:
         json.dump(articles, f, indent=2)
 
-from flask import Flask, render_template, send_file
+from flask import Flask, render_template
 app = Flask(__name__)
+SOURCE = 'googlenews'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, the page shows the newest run that finished
+    articles = GoogleNewsScraper().scrape_articles()
+    export_to_json(articles)
+    return articles
 
 @app.route('/')
 def index():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = GoogleNewsScraper()
-        articles = scraper.scrape_articles()
-        export_to_json(articles)
-        return render_template('report.html', articles=articles)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        articles = cached.result
+        return cached.mark(render_template('report.html', articles=articles))
     except Exception as e:
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from result_cache import get_result_cache
+    return jsonify(get_result_cache().stats())  # -> hit ratio and how old each source's data is
+
 @app.route('/download')
 def download():
-    return send_file('news.json', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'news', default_format='json')  # -> or csv, ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
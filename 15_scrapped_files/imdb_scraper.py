@@ -1,4 +1,7 @@
 import logging
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
 logging.basicConfig(
     filename='imdb_log.log',
     level=logging.INFO,
@@ -6,23 +9,32 @@ logging.basicConfig(
 )
 
 class IMDBScraper:
+    PARSE_ONLY = 'li.ipc-metadata-list-summary-item'
+    DERIVED = {'decade': ('bucket', 'year', 10)}
+
     def __init__(self, base_url: str = "https://www.imdb.com/chart/top/"):
         self.base_url = base_url
 
     def scrape_movies(self, max_movies: int = 100) -> list:
-        import requests
-        from bs4 import BeautifulSoup
-        movies = []
+        from http_client import get_client
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(self.base_url, headers=headers)
+            response = get_client().get(self.base_url)
             response.raise_for_status()
             logging.info("Scraped IMDB Top 250 page")
         except Exception as e:
             logging.error(f"Failed to scrape page: {e}")
-            return movies
+            return []
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        movies = self.parse_page(response, max_movies)
+        from derived_metrics import add_metrics
+        add_metrics(movies, self.DERIVED)
+        logging.info(f"Scraped {len(movies)} movies")
+        return movies
+
+    def parse_page(self, response, max_movies: int = 100) -> list:
+        from html_parser import parse_html
+        movies = []
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
         movie_elements = soup.select('li.ipc-metadata-list-summary-item')[:max_movies]
         
         for movie_elem in movie_elements:
@@ -41,92 +53,114 @@ class IMDBScraper:
                 logging.warning(f"Failed to scrape movie: {e}")
                 continue
 
-        logging.info(f"Scraped {len(movies)} movies")
         return movies
 
 def get_unique_decades(movies: list) -> list:
-    decades = set()
-    for movie in movies:
-        decade = (movie['year'] // 10) * 10
-        decades.add(decade)
-    return sorted(decades)
+    return sorted({movie['decade'] for movie in movies})
 
 def filter_movies(movies: list, decade: str = None) -> list:
     if not decade:
         return movies
     decade = int(decade)
-    return [movie for movie in movies if (movie['year'] // 10) * 10 == decade]
+    return [movie for movie in movies if movie['decade'] == decade]
 
 def export_to_csv(movies: list):
-    import pandas as pd
+    from columnar_export import export_records
     try:
-        df = pd.DataFrame(movies)
-        df.to_csv('movies.csv', index=False)
+        export_records(movies, 'movies', 'movies')
         logging.info("Saved movies to CSV")
     except Exception as e:
         logging.error(f"Failed to save CSV: {e}")
         raise
 
 def generate_visual_report(movies: list):
-    import matplotlib.pyplot as plt
+    from chart_service import bar_chart, get_charts
+    import pandas as pd
     try:
         if not movies:
             return
 
-        ratings_by_decade = {}
-        for movie in movies:
-            decade = (movie['year'] // 10) * 10
-            if decade not in ratings_by_decade:
-                ratings_by_decade[decade] = []
-            ratings_by_decade[decade].append(movie['rating'])
-
-        decades = sorted(ratings_by_decade.keys())
-        avg_ratings = [sum(ratings_by_decade[decade]) / len(ratings_by_decade[decade]) for decade in decades]
-
-        plt.figure(figsize=(8, 6))
-        plt.bar([str(decade) for decade in decades], avg_ratings, color='lightcoral')
-        plt.xlabel('Decade')
-        plt.ylabel('Average Rating')
-        plt.title('Average Rating of Top 100 Movies by Decade')
-        plt.tight_layout()
-        plt.savefig('static/ratings_by_decade.png')
-        plt.close()
-        logging.info("Made chart for report")
+        ratings = pd.DataFrame.from_records(movies, columns=['decade', 'rating'])
+        avg_by_decade = ratings.groupby('decade')['rating'].mean()
+        decades = avg_by_decade.index.tolist()
+        avg_ratings = avg_by_decade.tolist()
+
+        spec = bar_chart([str(decade) for decade in decades], avg_ratings,
+                         'Average Rating of Top 100 Movies by Decade', 'Decade', 'Average Rating',
+                         color='lightcoral')
+        return get_charts().chart('ratings_by_decade', spec)
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")
         raise
 
-from flask import Flask, render_template, send_file, request
+from flask import Flask, request
+from template_engine import app_templates, get_environment, report_response
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+SOURCE = 'imdb'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, filters are applied to the newest run that finished
+    movies = IMDBScraper().scrape_movies(max_movies=100)
+    if movies:
+        export_to_csv(movies)  # -> files and one dataset partition per finished scrape, page views only read
+    return movies
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = IMDBScraper()
         decade = request.form.get('decade', '') if request.method == 'POST' else ''
         
-        movies = scraper.scrape_movies(max_movies=100)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        movies = cached.result
         movies = filter_movies(movies, decade if decade else None)
         decades = get_unique_decades(movies)
 
-        export_to_csv(movies)
-        generate_visual_report(movies)
-
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(movies=movies, decades=decades))
-        logging.info("Made HTML report")
+        chart = generate_visual_report(movies)
 
-        return app.send_static_file('report.html')
+        chart_url = chart.url() if chart is not None else None
+        return cached.mark(report_response('report.html', movies=movies, decades=decades, chart_url=chart_url))
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    from result_cache import get_result_cache
+    return jsonify({**get_result_cache().stats(), 'charts': get_charts().stats()})  # -> chart hit rate and render ms
+
 @app.route('/download')
 def download():
-    return send_file('movies.csv', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'movies', shape='movies')  # -> ?format=csv|json|ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
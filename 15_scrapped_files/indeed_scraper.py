@@ -1,57 +1,101 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
+
 class IndeedScraper:
+    PARSE_ONLY = 'div.jobsearch-SerpJobCard'
+
     def __init__(self, url: str = "https://www.indeed.com/jobs?q=software+developer"):
         self.url = url
 
     def scrape_jobs(self) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from http_client import get_client
         jobs = []
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(self.url, headers=headers)
+            response = get_client().get(self.url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            job_elements = soup.select('div.jobsearch-SerpJobCard')
-            for job_elem in job_elements:
-                try:
-                    name = job_elem.select_one('h2.title a').text.strip()
-                    location = job_elem.select_one('div.recJobLoc').get('data-rc-loc') or 'N/A'
-                    salary = job_elem.select_one('span.salaryText').text.strip() if job_elem.select_one('span.salaryText') else 'N/A'
-                    description = job_elem.select_one('div.summary').text.strip() if job_elem.select_one('div.summary') else 'N/A'
-
-                    jobs.append({
-                        'name': name,
-                        'location': location,
-                        'salary': salary,
-                        'description': description
-                    })
-                except Exception as e:
-                    continue
+            jobs = self.parse_page(response)
         except Exception as e:
             print(f"Error: {e}")
         return jobs
 
+    def parse_page(self, response) -> list:
+        from html_parser import parse_html
+        jobs = []
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
+        job_elements = soup.select('div.jobsearch-SerpJobCard')
+        for job_elem in job_elements:
+            try:
+                name = job_elem.select_one('h2.title a').text.strip()
+                location = job_elem.select_one('div.recJobLoc').get('data-rc-loc') or 'N/A'
+                salary = job_elem.select_one('span.salaryText').text.strip() if job_elem.select_one('span.salaryText') else 'N/A'
+                description = job_elem.select_one('div.summary').text.strip() if job_elem.select_one('div.summary') else 'N/A'
+
+                jobs.append({
+                    'name': name,
+                    'location': location,
+                    'salary': salary,
+                    'description': description
+                })
+            except Exception as e:
+                continue
+        return jobs
+
 def export_to_json(jobs: list):
     import json
     with open('jobs.json', 'w') as f:
         json.dump(jobs, f, indent=2)
 
-from flask import Flask, render_template, send_file
+from flask import Flask, render_template
 app = Flask(__name__)
+SOURCE = 'indeed'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, the page shows the newest run that finished
+    jobs = IndeedScraper().scrape_jobs()
+    export_to_json(jobs)
+    return jobs
 
 @app.route('/')
 def index():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = IndeedScraper()
-        jobs = scraper.scrape_jobs()
-        export_to_json(jobs)
-        return render_template('report.html', jobs=jobs)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        jobs = cached.result
+        return cached.mark(render_template('report.html', jobs=jobs))
     except Exception as e:
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from result_cache import get_result_cache
+    return jsonify(get_result_cache().stats())  # -> hit ratio and how old each source's data is
+
 @app.route('/download')
 def download():
-    return send_file('jobs.json', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'jobs', default_format='json')  # -> or csv, ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
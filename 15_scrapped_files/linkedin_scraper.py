@@ -1,10 +1,12 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
 
 class LinkedInScraper:
     def __init__(self, url: str = "https://www.linkedin.com/jobs/search/?keywords=python%20developer"):
+        from selenium import webdriver  # -> selenium loads when a scrape starts, not when the app starts
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
         self.url = url
         chrome_options = Options()
         chrome_options.add_argument("--headless")
@@ -12,6 +14,7 @@ class LinkedInScraper:
         self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
 
     def scrape_jobs(self) -> list:
+        from selenium.webdriver.common.by import By
         jobs = []
         try:
             self.driver.get(self.url)
@@ -40,22 +43,50 @@ def export_to_json(jobs: list):
     with open('jobs.json', 'w') as f:
         json.dump(jobs, f, indent=2)
 
-from flask import Flask, render_template, send_file
+from flask import Flask, render_template
 app = Flask(__name__)
+SOURCE = 'linkedin'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, the page shows the newest run that finished
+    jobs = LinkedInScraper().scrape_jobs()
+    export_to_json(jobs)
+    return jobs
 
 @app.route('/')
 def index():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = LinkedInScraper()
-        jobs = scraper.scrape_jobs()
-        export_to_json(jobs)
-        return render_template('report.html', jobs=jobs)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        jobs = cached.result
+        return cached.mark(render_template('report.html', jobs=jobs))
     except Exception as e:
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from result_cache import get_result_cache
+    return jsonify(get_result_cache().stats())  # -> hit ratio and how old each source's data is
+
 @app.route('/download')
 def download():
-    return send_file('jobs.json', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'jobs', default_format='json')  # -> or csv, ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
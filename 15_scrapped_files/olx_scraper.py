@@ -1,4 +1,7 @@
 import logging
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
 logging.basicConfig(
     filename='olx_log.log',
     level=logging.INFO,
@@ -6,51 +9,45 @@ logging.basicConfig(
 )
 
 class OLXScraper:
+    PARSE_ONLY = 'div.css-1sw7q4x'
+
     def __init__(self, base_url: str = "https://www.olx.uz/d/elektronika/telefony-i-aksesuary/"):
         self.base_url = base_url
 
+    def page_url(self, page: int) -> str:
+        return f"{self.base_url}?page={page}" if page > 1 else self.base_url
+
     def scrape_phones(self, max_pages: int = 3) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from crawl_engine import crawl_pages
+        phones = crawl_pages(self.page_url, self.parse_page, max_pages=max_pages, parse_key='olx_scraper.phones')
+        logging.info(f"Scraped {len(phones)} phones")
+        return phones
+
+    def parse_page(self, response):
+        from html_parser import parse_html
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
+        phone_elements = soup.select('div.css-1sw7q4x')
+        if not phone_elements:
+            return None
+
         phones = []
-        page = 1
-        while page <= max_pages:
-            url = f"{self.base_url}?page={page}" if page > 1 else self.base_url
+        for phone_elem in phone_elements:
             try:
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                response = requests.get(url, headers=headers)
-                response.raise_for_status()
-                logging.info(f"Scraped page {page}")
+                name = phone_elem.select_one('h6').text.strip()
+                price_elem = phone_elem.select_one('p[data-testid="ad-price"]')
+                price = price_elem.text.strip() if price_elem else "N/A"
+                location_elem = phone_elem.select_one('p[data-testid="location-date"]')
+                location = location_elem.text.split(' - ')[0].strip() if location_elem else "N/A"
+
+                phone = {
+                    'name': name,
+                    'price': price,
+                    'location': location
+                }
+                phones.append(phone)
             except Exception as e:
-                logging.error(f"Failed to scrape page {page}: {e}")
-                break
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            phone_elements = soup.select('div.css-1sw7q4x')
-            if not phone_elements:
-                break
-
-            for phone_elem in phone_elements:
-                try:
-                    name = phone_elem.select_one('h6').text.strip()
-                    price_elem = phone_elem.select_one('p[data-testid="ad-price"]')
-                    price = price_elem.text.strip() if price_elem else "N/A"
-                    location_elem = phone_elem.select_one('p[data-testid="location-date"]')
-                    location = location_elem.text.split(' - ')[0].strip() if location_elem else "N/A"
-
-                    phone = {
-                        'name': name,
-                        'price': price,
-                        'location': location
-                    }
-                    phones.append(phone)
-                except Exception as e:
-                    logging.warning(f"Failed to scrape phone: {e}")
-                    continue
-
-            page += 1
-
-        logging.info(f"Scraped {len(phones)} phones")
+                logging.warning(f"Failed to scrape phone: {e}")
+                continue
         return phones
 
 def get_unique_locations(phones: list) -> list:
@@ -66,17 +63,16 @@ def filter_phones(phones: list, location: str = None) -> list:
     return [phone for phone in phones if phone['location'] == location]
 
 def export_to_csv(phones: list):
-    import pandas as pd
+    from columnar_export import export_records
     try:
-        df = pd.DataFrame(phones)
-        df.to_csv('phones.csv', index=False)
+        export_records(phones, 'phones', 'phones')
         logging.info("Saved phones to CSV")
     except Exception as e:
         logging.error(f"Failed to save CSV: {e}")
         raise
 
 def generate_visual_report(phones: list):
-    import matplotlib.pyplot as plt
+    from chart_service import bar_chart, get_charts
     try:
         if not phones:
             return
@@ -101,50 +97,76 @@ def generate_visual_report(phones: list):
                     price_ranges[i] += 1
                     break
 
-        plt.figure(figsize=(8, 6))
-        plt.bar(labels, price_ranges, color='lightblue')
-        plt.xlabel('Price Range (UZS)')
-        plt.ylabel('Number of Phones')
-        plt.title('Price Distribution of Phone Listings')
-        plt.tight_layout()
-        plt.savefig('static/price_distribution.png')
-        plt.close()
-        logging.info("Made chart for report")
+        spec = bar_chart(labels, price_ranges,
+                         'Price Distribution of Phone Listings', 'Price Range (UZS)', 'Number of Phones',
+                         color='lightblue')
+        return get_charts().chart('price_distribution', spec)
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")
         raise
 
-from flask import Flask, render_template, send_file, request
+from flask import Flask, request
+from template_engine import app_templates, get_environment, report_response
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+SOURCE = 'olx'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, filters are applied to the newest run that finished
+    phones = OLXScraper().scrape_phones(max_pages=3)
+    if phones:
+        export_to_csv(phones)  # -> files and one dataset partition per finished scrape, page views only read
+    return phones
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = OLXScraper()
         location = request.form.get('location', '') if request.method == 'POST' else ''
         
-        phones = scraper.scrape_phones(max_pages=3)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        phones = cached.result
         phones = filter_phones(phones, location if location else None)
         locations = get_unique_locations(phones)
 
-        export_to_csv(phones)
-        generate_visual_report(phones)
-
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(phones=phones, locations=locations))
-        logging.info("Made HTML report")
+        chart = generate_visual_report(phones)
 
-        return app.send_static_file('report.html')
+        chart_url = chart.url() if chart is not None else None
+        return cached.mark(report_response('report.html', phones=phones, locations=locations, chart_url=chart_url))
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    from result_cache import get_result_cache
+    return jsonify({**get_result_cache().stats(), 'charts': get_charts().stats()})  # -> chart hit rate and render ms
+
 @app.route('/download')
 def download():
-    return send_file('phones.csv', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'phones', shape='phones')  # -> ?format=csv|json|ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,4 +1,7 @@
 import logging
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
 logging.basicConfig(
     filename='quote_log.log',
     level=logging.INFO,
@@ -6,48 +9,43 @@ logging.basicConfig(
 )
 
 class QuoteScraper:
+    PARSE_ONLY = 'div.quote'  # -> skip menus and footer, we only read the quotes
+
     def __init__(self, base_url: str = "http://quotes.toscrape.com"):
         self.base_url = base_url
 
+    def page_url(self, page: int) -> str:
+        return f"{self.base_url}/page/{page}/" if page > 1 else self.base_url
+
     def scrape_quotes(self) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from crawl_engine import crawl_pages
+        quotes = crawl_pages(self.page_url, self.parse_page, parse_key='quote_scraper.quotes')
+        logging.info(f"Scraped {len(quotes)} quotes")
+        return quotes
+
+    def parse_page(self, response):
+        from html_parser import parse_html
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
+        quote_elements = soup.find_all('div', class_='quote')
+        if not quote_elements:
+            return None
+
         quotes = []
-        page = 1
-        while True:
-            url = f"{self.base_url}/page/{page}/" if page > 1 else self.base_url
+        for quote_elem in quote_elements:
             try:
-                response = requests.get(url)
-                response.raise_for_status()
-                logging.info(f"Scraped page {page}")
+                quote_text = quote_elem.find('span', class_='text').text
+                author = quote_elem.find('small', class_='author').text
+                tags = [tag.text for tag in quote_elem.find_all('a', class_='tag')]
+
+                quote = {
+                    'quote_text': quote_text,
+                    'author': author,
+                    'tags': tags
+                }
+                quotes.append(quote)
             except Exception as e:
-                logging.error(f"Failed to scrape page {page}: {e}")
-                break
-
-            soup = BeautifulSoup(response.text, 'html.parser')
-            quote_elements = soup.find_all('div', class_='quote')
-            if not quote_elements:
-                break
-
-            for quote_elem in quote_elements:
-                try:
-                    quote_text = quote_elem.find('span', class_='text').text
-                    author = quote_elem.find('small', class_='author').text
-                    tags = [tag.text for tag in quote_elem.find_all('a', class_='tag')]
-
-                    quote = {
-                        'quote_text': quote_text,
-                        'author': author,
-                        'tags': tags
-                    }
-                    quotes.append(quote)
-                except Exception as e:
-                    logging.warning(f"Failed to scrape quote: {e}")
-                    continue
-
-            page += 1
-
-        logging.info(f"Scraped {len(quotes)} quotes")
+                logging.warning(f"Failed to scrape quote: {e}")
+                continue
         return quotes
 
 def get_unique_tags(quotes: list) -> list:
@@ -62,17 +60,16 @@ def filter_quotes(quotes: list, tag: str = None) -> list:
     return [quote for quote in quotes if tag in quote['tags']]
 
 def export_to_csv(quotes: list):
-    import pandas as pd
+    from columnar_export import export_records
     try:
-        df = pd.DataFrame(quotes)
-        df.to_csv('quotes.csv', index=False)
+        export_records(quotes, 'quotes', 'quotes')
         logging.info("Saved quotes to CSV")
     except Exception as e:
         logging.error(f"Failed to save CSV: {e}")
         raise
 
 def generate_visual_report(quotes: list):
-    import matplotlib.pyplot as plt
+    from chart_service import bar_chart, get_charts
     try:
         if not quotes:
             return
@@ -86,51 +83,75 @@ def generate_visual_report(quotes: list):
         names = list(top_authors.keys())
         counts = list(top_authors.values())
 
-        plt.figure(figsize=(8, 6))
-        plt.bar(names, counts, color='lightblue')
-        plt.xlabel('Authors')
-        plt.ylabel('Number of Quotes')
-        plt.title('Top 5 Authors by Number of Quotes')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('static/quotes_by_author.png')
-        plt.close()
-        logging.info("Made chart for report")
+        spec = bar_chart(names, counts, 'Top 5 Authors by Number of Quotes', 'Authors', 'Number of Quotes',
+                         color='lightblue', rotation=45)
+        return get_charts().chart('quotes_by_author', spec)
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")
         raise
 
-from flask import Flask, render_template, send_file, request
+from flask import Flask, request
+from template_engine import app_templates, get_environment, report_response
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+SOURCE = 'quotes'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, filters are applied to the newest run that finished
+    quotes = QuoteScraper().scrape_quotes()
+    if quotes:
+        export_to_csv(quotes)  # -> files and one dataset partition per finished scrape, page views only read
+    return quotes
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = QuoteScraper()
         tag = request.form.get('tag', '') if request.method == 'POST' else ''
         
-        quotes = scraper.scrape_quotes()
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        quotes = cached.result
         quotes = filter_quotes(quotes, tag if tag else None)
         tags = get_unique_tags(quotes)
 
-        export_to_csv(quotes)
-        generate_visual_report(quotes)
+        chart = generate_visual_report(quotes)
 
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(quotes=quotes, tags=tags))
-        logging.info("Made HTML report")
-
-        return app.send_static_file('report.html')
+        chart_url = chart.url() if chart is not None else None
+        return cached.mark(report_response('report.html', quotes=quotes, tags=tags, chart_url=chart_url))
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    from result_cache import get_result_cache
+    return jsonify({**get_result_cache().stats(), 'charts': get_charts().stats()})  # -> chart hit rate and render ms
+
 @app.route('/download')
 def download():
-    return send_file('quotes.csv', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'quotes', shape='quotes')  # -> ?format=csv|json|ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,56 +1,100 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
+
 class RedditScraper:
+    PARSE_ONLY = 'div.Post'
+
     def __init__(self, url: str = "https://www.reddit.com/r/Python/hot/"):
         self.url = url
 
     def scrape_posts(self) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from http_client import get_client
         posts = []
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(self.url, headers=headers)
+            response = get_client().get(self.url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            post_elements = soup.select('div.Post')
-            for post_elem in post_elements[:10]:
-                try:
-                    title = post_elem.select_one('h3').text.strip()
-                    upvotes = post_elem.select_one('div[data-test-id="post-vote-count"]').text.strip() if post_elem.select_one('div[data-test-id="post-vote-count"]') else '0'
-                    upvotes = upvotes.replace('k', '000').replace('.', '')
-                    date = post_elem.select_one('time').get('datetime') if post_elem.select_one('time') else 'N/A'
-
-                    posts.append({
-                        'title': title,
-                        'upvotes': upvotes,
-                        'date': date
-                    })
-                except Exception as e:
-                    continue
+            posts = self.parse_page(response)
         except Exception as e:
             print(f"Error: {e}")
         return posts
 
+    def parse_page(self, response) -> list:
+        from html_parser import parse_html
+        posts = []
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
+        post_elements = soup.select('div.Post')
+        for post_elem in post_elements[:10]:
+            try:
+                title = post_elem.select_one('h3').text.strip()
+                upvotes = post_elem.select_one('div[data-test-id="post-vote-count"]').text.strip() if post_elem.select_one('div[data-test-id="post-vote-count"]') else '0'
+                upvotes = upvotes.replace('k', '000').replace('.', '')
+                date = post_elem.select_one('time').get('datetime') if post_elem.select_one('time') else 'N/A'
+
+                posts.append({
+                    'title': title,
+                    'upvotes': upvotes,
+                    'date': date
+                })
+            except Exception as e:
+                continue
+        return posts
+
 def export_to_json(posts: list):
     import json
     with open('posts.json', 'w') as f:
         json.dump(posts, f, indent=2)
 
-from flask import Flask, render_template, send_file
+from flask import Flask, render_template
 app = Flask(__name__)
+SOURCE = 'reddit'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, the page shows the newest run that finished
+    posts = RedditScraper().scrape_posts()
+    export_to_json(posts)
+    return posts
 
 @app.route('/')
 def index():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = RedditScraper()
-        posts = scraper.scrape_posts()
-        export_to_json(posts)
-        return render_template('report.html', posts=posts)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        posts = cached.result
+        return cached.mark(render_template('report.html', posts=posts))
     except Exception as e:
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from result_cache import get_result_cache
+    return jsonify(get_result_cache().stats())  # -> hit ratio and how old each source's data is
+
 @app.route('/download')
 def download():
-    return send_file('posts.json', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'posts', default_format='json')  # -> or csv, ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,53 +1,98 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
+
 class WeatherScraper:
+    PARSE_ONLY = ('h1.CurrentConditions--location--1YWj_, span.CurrentConditions--tempValue--MHmYY, '
+                  'div.WeatherDetailsListItem--wxData--kK81o')
+
     def __init__(self, url: str = "https://weather.com/weather/today/l/New+York+NY+USNY0996:1:US"):
         self.url = url
 
     def scrape_weather(self) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+        from http_client import get_client
         weathers = []
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(self.url, headers=headers)
+            response = get_client().get(self.url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            city = soup.select_one('h1.CurrentConditions--location--1YWj_').text.strip()
-            temperature = soup.select_one('span.CurrentConditions--tempValue--MHmYY').text.strip()
-            details = soup.select('div.WeatherDetailsListItem--wxData--kK81o')
-            humidity = details[2].select_one('span').text.strip() if len(details) > 2 else 'N/A'
-            pressure = details[5].select_one('span').text.strip() if len(details) > 5 else 'N/A'
-
-            weathers.append({
-                'city': city,
-                'temperature': temperature,
-                'humidity': humidity,
-                'pressure': pressure
-            })
+            weathers = self.parse_page(response)
         except Exception as e:
             print(f"Error: {e}")
         return weathers
 
+    def parse_page(self, response) -> list:
+        from html_parser import parse_html
+        weathers = []
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
+        city = soup.select_one('h1.CurrentConditions--location--1YWj_').text.strip()
+        temperature = soup.select_one('span.CurrentConditions--tempValue--MHmYY').text.strip()
+        details = soup.select('div.WeatherDetailsListItem--wxData--kK81o')
+        humidity = details[2].select_one('span').text.strip() if len(details) > 2 else 'N/A'
+        pressure = details[5].select_one('span').text.strip() if len(details) > 5 else 'N/A'
+
+        weathers.append({
+            'city': city,
+            'temperature': temperature,
+            'humidity': humidity,
+            'pressure': pressure
+        })
+        return weathers
+
 def export_to_json(weathers: list):
     import json
     with open('weather.json', 'w') as f:
         json.dump(weathers, f, indent=2)
 
-from flask import Flask, render_template, send_file
+from flask import Flask, render_template
 app = Flask(__name__)
+SOURCE = 'weather'
+
+def scrape() -> list:
+    # -> one whole run on a job worker, the page shows the newest run that finished
+    weathers = WeatherScraper().scrape_weather()
+    export_to_json(weathers)
+    return weathers
 
 @app.route('/')
 def index():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = WeatherScraper()
-        weathers = scraper.scrape_weather()
-        export_to_json(weathers)
-        return render_template('report.html', weathers=weathers)
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        weathers = cached.result
+        return cached.mark(render_template('report.html', weathers=weathers))
     except Exception as e:
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from result_cache import get_result_cache
+    return jsonify(get_result_cache().stats())  # -> hit ratio and how old each source's data is
+
 @app.route('/download')
 def download():
-    return send_file('weather.json', as_attachment=True)
+    from download_stream import snapshot_download
+    return snapshot_download(SOURCE, scrape, 'weather', default_format='json')  # -> or csv, ndjson
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
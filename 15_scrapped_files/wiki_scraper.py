@@ -1,4 +1,7 @@
 import logging
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to use shared modules from repo root
 logging.basicConfig(
     filename='wiki_log.log',
     level=logging.INFO,
@@ -6,25 +9,32 @@ logging.basicConfig(
 )
 
 class WikiScraper:
+    PARSE_ONLY = '#mw-content-text'
+
     def __init__(self, base_url: str = "https://en.wikipedia.org/wiki/", article: str = "Python_(programming_language)"):
         self.url = f"{base_url}{article}"
 
     def scrape_article(self) -> tuple:
-        import requests
-        from bs4 import BeautifulSoup
-        contents = []
-        infobox = {}
-        images = []
+        from http_client import get_client
+        client = get_client()
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(self.url, headers=headers)
+            response = client.get(self.url)
             response.raise_for_status()
             logging.info("Scraped Wikipedia page")
         except Exception as e:
             logging.error(f"Failed to scrape page: {e}")
-            return contents, infobox, images
+            return [], {}, []
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+        contents, infobox, images = client.parse(response, 'wiki_scraper.article', self.parse_article)
+        logging.info(f"Scraped {len(contents)} paragraphs, {len(infobox)} infobox items, {len(images)} images")
+        return contents, infobox, images
+
+    def parse_article(self, response) -> tuple:
+        from html_parser import parse_html
+        contents = []
+        infobox = {}
+        images = []
+        soup = parse_html(response.text, only=self.PARSE_ONLY)
 
         current_heading = "Introduction"
         for element in soup.select('#mw-content-text .mw-parser-output > *'):
@@ -59,7 +69,6 @@ class WikiScraper:
             if src and src not in images:
                 images.append(src)
 
-        logging.info(f"Scraped {len(contents)} paragraphs, {len(infobox)} infobox items, {len(images)} images")
         return contents, infobox, images
 
 def get_unique_headings(contents: list) -> list:
@@ -75,6 +84,7 @@ def filter_contents(contents: list, heading: str = None) -> list:
 
 def export_to_csv(contents: list, infobox: dict, images: list):
     import pandas as pd
+    from columnar_export import export_records, get_formats
     try:
         content_df = pd.DataFrame(contents)
         content_df.to_csv('articles.csv', index=False, mode='w')
@@ -89,13 +99,20 @@ def export_to_csv(contents: list, infobox: dict, images: list):
             f.write("\nImage Links\n")
             images_df.to_csv(f, index=False)
 
+        # -> the csv mixes three tables in one file, the columnar files keep one table each
+        columnar = [fmt for fmt in get_formats() if fmt != 'csv']
+        export_records(contents, 'articles', 'articles', formats=columnar)
+        export_records([{'key': key, 'value': value} for key, value in infobox.items()], 'infobox', 'infobox',
+                       formats=columnar)
+        export_records([{'url': url} for url in images], 'images', 'images', formats=columnar)
+
         logging.info("Saved data to CSV")
     except Exception as e:
         logging.error(f"Failed to save CSV: {e}")
         raise
 
 def generate_visual_report(contents: list):
-    import matplotlib.pyplot as plt
+    from chart_service import bar_chart, get_charts
     try:
         if not contents:
             return
@@ -109,51 +126,90 @@ def generate_visual_report(contents: list):
         headings = list(top_headings.keys())
         counts = list(top_headings.values())
 
-        plt.figure(figsize=(10, 6))
-        plt.bar(headings, counts, color='lightgreen')
-        plt.xlabel('Headings')
-        plt.ylabel('Number of Paragraphs')
-        plt.title('Top 5 Headings by Number of Paragraphs')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('static/paragraphs_per_heading.png')
-        plt.close()
-        logging.info("Made chart for report")
+        spec = bar_chart(headings, counts, 'Top 5 Headings by Number of Paragraphs', 'Headings', 'Number of Paragraphs',
+                         color='lightgreen', rotation=45, figsize=(10, 6))
+        return get_charts().chart('paragraphs_per_heading', spec)
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")
         raise
 
-from flask import Flask, render_template, send_file, request
+from flask import Flask, request
+from template_engine import app_templates, get_environment, report_response
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+SOURCE = 'wiki'
+
+def scrape() -> tuple:
+    # -> one whole run on a job worker, filters are applied to the newest run that finished
+    contents, infobox, images = WikiScraper().scrape_article()
+    if contents:
+        export_to_csv(contents, infobox, images)  # -> files and one dataset partition per finished scrape
+    return contents, infobox, images
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader
+    from background_jobs import accepted
+    from result_cache import get_result_cache
     try:
-        scraper = WikiScraper()
         heading = request.form.get('heading', '') if request.method == 'POST' else ''
         
-        contents, infobox, images = scraper.scrape_article()
+        cached = get_result_cache().lookup(SOURCE, scrape)  # -> old data is served while one refresh runs
+        if cached.result is None:
+            return accepted(cached.job)  # -> nothing scraped yet, poll the job then load the page again
+        contents, infobox, images = cached.result
         contents = filter_contents(contents, heading if heading else None)
         headings = get_unique_headings(contents)
 
-        export_to_csv(contents, infobox, images)
-        generate_visual_report(contents)
-
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(contents=contents, infobox=infobox, images=images, headings=headings))
-        logging.info("Made HTML report")
+        chart = generate_visual_report(contents)
 
-        return app.send_static_file('report.html')
+        chart_url = chart.url() if chart is not None else None
+        return cached.mark(report_response('report.html', contents=contents, infobox=infobox, images=images,
+                                           headings=headings, chart_url=chart_url))
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
+@app.route('/jobs', methods=['POST'])
+def new_job():
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    return accepted(*get_result_cache().refresh(SOURCE, scrape))  # -> joins the run already going if there is one
+
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+@app.route('/cache-stats')
+def cache_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    from result_cache import get_result_cache
+    return jsonify({**get_result_cache().stats(), 'charts': get_charts().stats()})  # -> chart hit rate and render ms
+
 @app.route('/download')
 def download():
-    return send_file('articles.csv', as_attachment=True)
+    from download_stream import snapshot_download
+    tables = {
+        'articles': lambda result: result[0],
+        'infobox': lambda result: [{'key': key, 'value': value} for key, value in result[1].items()],
+        'images': lambda result: [{'url': url} for url in result[2]]
+    }
+    table = request.args.get('table', 'articles')  # -> the old csv had all three one after another
+    if table not in tables:
+        return f"Unknown table {table}, use one of {', '.join(tables)}", 400
+    return snapshot_download(SOURCE, scrape, table, shape=table, pick=tables[table])
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
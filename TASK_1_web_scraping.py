@@ -7,68 +7,128 @@ logging.basicConfig(
 )
 
 
+CONNECTION_STRING = (
+    'DRIVER={SQL Server};'
+    'SERVER=DESKTOP-XXXX\\SQLEXPRESS;'
+    'DATABASE=BooksDB;'
+    'Trusted_Connection=yes;'
+)
+
+
+def connect_database():
+    import pyodbc
+    return pyodbc.connect(CONNECTION_STRING)  # -> conect to sql server databse
+
+
 class DatabaseManager:
-    def __init__(self):
-        import pyodbc
+    COLUMNS = ('Title', 'Price', 'Rating', 'Category', 'Availability', 'ReviewCount')  # -> same order as book_row
+    KEY = ('Title',)  # -> a book is the same book when the title matches
+    RECORD_FIELDS = ('title', 'price', 'rating', 'category', 'availability', 'review_count', 'value_score')
+    FIELD_COLUMNS = dict(zip(RECORD_FIELDS, COLUMNS + ('ValueScore',)))  # -> what the query api may filter and sort on
+    COMPUTED = {
+        # -> rating per pound, worked out by the databse for every row whoever writes it, null when the price is 0
+        'ValueScore': {'sqlserver': 'AS CAST(Rating AS FLOAT) / NULLIF(Price, 0) PERSISTED',  # -> persisted to index
+                       'sqlite': 'REAL GENERATED ALWAYS AS (CAST(Rating AS REAL) / NULLIF(Price, 0)) VIRTUAL'}
+    }
+    INDEXES = {
+        'IX_Books_ValueScore': 'ValueScore DESC',  # -> top books for the chart
+        'IX_Books_Category_Price': 'Category, Price'  # -> category filter with a price range
+    }
+    SELECT_BOOKS = """
+            SELECT Title, Price, Rating, Category, Availability, ReviewCount, ValueScore
+            FROM Books
+            """
+    INSERT_BOOK = """
+            INSERT INTO Books (Title, Price, Rating, Category, Availability, ReviewCount)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """
+
+    def __init__(self, pool=None):
+        from db_pool import get_pool
         try:
-            self.conn = pyodbc.connect(
-                'DRIVER={SQL Server};'
-                'SERVER=DESKTOP-XXXX\\SQLEXPRESS;'
-                'DATABASE=BooksDB;'
-                'Trusted_Connection=yes;'
-            )  # -> conect to sql server databse
+            self.pool = pool or get_pool(CONNECTION_STRING, connect_database, name='BooksDB')
+            self.conn = self.pool.acquire()  # -> reuse an open connection, only connect when none is free
             self.cursor = self.conn.cursor()
             logging.info("Databse conected sucessfully")
         except Exception as e:
             logging.error(f"Failed to conect to databse: {e}")
             raise
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(broken=exc_type is not None and not self.pool.is_healthy(self.conn))
+
+    @staticmethod
+    def book_row(book: dict) -> tuple:
+        return (
+            book['title'],
+            book['price'],
+            book['rating'],
+            book['category'],
+            book['availability'],
+            book['review_count']
+        )
+
     def insert_book(self, book: dict):
         try:
-            query = """
-            INSERT INTO Books (Title, Price, Rating, Category, Availability, ReviewCount)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """
-            self.cursor.execute(query, (
-                book['title'],
-                book['price'],
-                book['rating'],
-                book['category'],
-                book['availability'],
-                book['review_count']
-            ))  # -> save book to databse
+            self.cursor.execute(self.INSERT_BOOK, self.book_row(book))  # -> save book to databse
             self.conn.commit()
             logging.info(f"Saved book {book['title']} to databse")
         except Exception as e:
             logging.error(f"Failed to save book: {e}")  # -> write error if save fails
             raise
 
+    def insert_books(self, books, batch_size: int = None) -> int:
+        from database import DEFAULT_BATCH_SIZE, bulk_insert
+        rows = (self.book_row(book) for book in books)  # -> books can be any iterable, even a generator
+        return bulk_insert(self.conn, self.cursor, self.INSERT_BOOK, rows, batch_size or DEFAULT_BATCH_SIZE, 'books')
+
+    def sync_books(self, books) -> dict:
+        from database import sync_rows
+        rows = (self.book_row(book) for book in books)
+        return sync_rows(self.conn, self.cursor, 'Books', self.COLUMNS, self.KEY, rows, 'books')
+
+    def book_sync(self):
+        from database import IncrementalSync
+        return IncrementalSync(self.conn, self.cursor, 'Books', self.COLUMNS, self.KEY, self.book_row, 'books')
+
     def fetch_books(self) -> list:
-        import pandas as pd
         try:
-            query = """
-            SELECT Title, Price, Rating, Category, Availability, ReviewCount, ValueScore
-            FROM Books
-            """
-            self.cursor.execute(query)  # -> get all books from databse
-            rows = self.cursor.fetchall()
-            books = []
-            for row in rows:
-                books.append({
-                    'title': row[0],
-                    'price': row[1],
-                    'rating': row[2],
-                    'category': row[3],
-                    'availability': row[4],
-                    'review_count': row[5],
-                    'value_score': row[6]
-                })
+            books = list(self.stream_books())  # -> get all books from databse
             logging.info(f"Got {len(books)} books from databse")
             return books
         except Exception as e:
             logging.error(f"Failed to fetch books: {e}")
             raise
 
+    def stream_books(self, fetch_size: int = None):
+        from database import DEFAULT_FETCH_SIZE, stream_records
+        return stream_records(self.conn, self.SELECT_BOOKS, 'Book', self.RECORD_FIELDS,
+                              fetch_size=fetch_size or DEFAULT_FETCH_SIZE)
+
+    def books_view(self):
+        from database import RowView, count_rows
+        return RowView(self.stream_books, count=lambda: count_rows(self.conn, 'Books'))
+
+    def ensure_indexes(self):
+        from database import ensure_columns, ensure_indexes
+        ensure_columns(self.conn, 'Books', self.COMPUTED, scope=self.pool)  # -> ValueScore first, it is indexed
+        ensure_indexes(self.conn, 'Books', self.INDEXES, scope=self.pool)
+
+    def query_books(self, where: dict = None, order_by=None, limit: int = None, offset: int = 0) -> list:
+        from database import query_records
+        return query_records(self.conn, 'Books', 'Book', self.FIELD_COLUMNS, self.KEY, where, order_by, limit, offset)
+
+    def top_books(self, n: int = 5) -> list:
+        return self.query_books(order_by='-value_score', limit=n)  # -> the database picks them, not python
+
+    def page_books(self, page: int = 1, per_page: int = None, where: dict = None, order_by=None) -> dict:
+        from database import DEFAULT_PAGE_SIZE, page_records
+        return page_records(self.conn, 'Books', 'Book', self.FIELD_COLUMNS, self.KEY, page,
+                            per_page or DEFAULT_PAGE_SIZE, where, order_by)
+
     def clear_table(self):
         try:
             self.cursor.execute("DELETE FROM Books")  # -> clear the books tabel
@@ -78,125 +138,195 @@ class DatabaseManager:
             logging.error(f"Failed to clear tabel: {e}")
             raise
 
-    def close(self):
-        self.conn.close()
-        logging.info("Databse closed")
+    def close(self, broken: bool = False):
+        if self.conn is None:
+            return  # -> already given back
+        self.cursor.close()
+        self.pool.release(self.conn, broken)
+        self.conn = None
+        logging.info("Gave databse connection back to pool")
 
 
 class BookScraper:
-    def __init__(self, base_url: str = "http://books.toscrape.com"):
+    LISTING_ONLY = 'article.product_pod'  # -> only the parts of the page we read get parsed
+    DETAILS_ONLY = 'ul.breadcrumb, article.product_page'
+
+    def __init__(self, base_url: str = "http://books.toscrape.com", max_concurrency: int = 8):
         self.base_url = base_url
+        self.max_concurrency = max_concurrency  # -> how many book pages we load at the same time
 
-    def scrape_books(self, max_pages: int = 2) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+    def scrape_books(self, max_pages: int = 2, on_item=None) -> list:
+        from http_client import fetch_all, get_client
+        client = get_client()
         books = []
         page = 1
         while page <= max_pages:
             url = f"{self.base_url}/catalogue/page-{page}.html" if page > 1 else f"{self.base_url}/index.html"
             try:
-                response = requests.get(url)  # -> get the web page
+                response = client.get(url)  # -> get the web page
                 response.raise_for_status()
                 logging.info(f"Skraped page {page}")
             except Exception as e:
                 logging.error(f"Failed to skrap page {page}: {e}")  # -> write error if scrap fails
                 break
 
-            soup = BeautifulSoup(response.text, 'html.parser')  # -> read the web page
-            book_elements = soup.select('article.product_pod')
-            if not book_elements:
+            listed = client.parse(response, 'task1.book_listing', self.parse_listing)  # -> reused if page is same
+            if not listed:
                 break
 
-            for book_elem in book_elements:
-                title = book_elem.select_one('h3 a')['title']
-                price = float(book_elem.select_one('.price_color').text.replace('£', ''))
-
-                rating_elem = book_elem.select_one('p.star-rating')
-                rating_classes = rating_elem['class']
-                rating = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}.get(rating_classes[1],
-                                                                                    0)  # -> get ratings
-
-                book_url = book_elem.select_one('h3 a')['href']
-                book_page = requests.get(f"{self.base_url}/catalogue/{book_url}")
-                book_soup = BeautifulSoup(book_page.text, 'html.parser')  # -> go to book page for more info
-
-                category = book_soup.select_one('.breadcrumb li:nth-child(3) a').text
-                availability = book_soup.select_one('.availability').text.strip()
-                review_count = int(book_soup.select_one('.product_page > p:nth-last-child(2)').text.split()[
-                                       0]) if book_soup.select_one('.product_page > p:nth-last-child(2)') else 0
+            book_pages = fetch_all([item[3] for item in listed],
+                                   max_per_host=self.max_concurrency)  # -> go to all book pages at once
+            for (title, price, rating, _), book_page in zip(listed, book_pages):
+                if isinstance(book_page, Exception):
+                    raise book_page
+                details = client.parse(book_page, 'task1.book_details', self.parse_details)
 
                 book = {
                     'title': title,
                     'price': price,
                     'rating': rating,
-                    'category': category,
-                    'availability': availability,
-                    'review_count': review_count
+                    'category': details['category'],
+                    'availability': details['availability'],
+                    'review_count': details['review_count']
                 }
                 books.append(book)
+                if on_item:
+                    on_item(book)  # -> hand it on right away, the databse does not have to wait for the last page
             page += 1
 
         logging.info(f"Skraped {len(books)} books")
         return books
 
+    def parse_listing(self, response) -> list:
+        from html_parser import parse_html
+        soup = parse_html(response.text, only=self.LISTING_ONLY)  # -> read the web page
+        listed = []
+        for book_elem in soup.select('article.product_pod'):
+            title = book_elem.select_one('h3 a')['title']
+            price = float(book_elem.select_one('.price_color').text.replace('£', ''))
+
+            rating_elem = book_elem.select_one('p.star-rating')
+            rating_classes = rating_elem['class']
+            rating = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}.get(rating_classes[1],
+                                                                                0)  # -> get ratings
+
+            book_url = book_elem.select_one('h3 a')['href']
+            listed.append((title, price, rating, f"{self.base_url}/catalogue/{book_url}"))
+        return listed
+
+    def parse_details(self, response) -> dict:
+        from html_parser import parse_html
+        book_soup = parse_html(response.text, only=self.DETAILS_ONLY)  # -> read book page for more info
+
+        category_elem = book_soup.select_one('.breadcrumb li:nth-child(3) a')
+        category = category_elem.text if category_elem else 'Unknown'  # -> a changed page should not stop the scrap
+        availability_elem = book_soup.select_one('.availability')
+        availability = availability_elem.text.strip() if availability_elem else 'Unknown'
+        review_count = int(book_soup.select_one('.product_page > p:nth-last-child(2)').text.split()[
+                               0]) if book_soup.select_one('.product_page > p:nth-last-child(2)') else 0
+        return {'category': category, 'availability': availability, 'review_count': review_count}
+
 
-def generate_visual_report(books: list):
-    import matplotlib.pyplot as plt  # -> to make charts in generate_visual_report
+def generate_visual_report(top_books: list):
+    from chart_service import bar_chart, get_charts
     try:
-        if not books:
+        if not top_books:
             return
 
-        top_books = sorted(books, key=lambda x: x['value_score'], reverse=True)[:5]  # -> sort by value score
         titles = [b['title'][:20] for b in top_books]
         value_scores = [b['value_score'] for b in top_books]
 
-        plt.figure(figsize=(8, 6))
-        plt.bar(titles, value_scores, color='lightgreen')  # -> make chart for top books
-        plt.xlabel('Books')
-        plt.ylabel('Value Score (Rating/Price)')
-        plt.title('Top 5 Books by Value Score')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('static/top_books.png')  # -> save the chart
-        plt.close()
-        logging.info("Made chart for report")
+        spec = bar_chart(titles, value_scores, 'Top 5 Books by Value Score', 'Books', 'Value Score (Rating/Price)',
+                         color='lightgreen', rotation=45)
+        return get_charts().chart('top_books', spec)  # -> reused while the top books stay the same
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")  # -> write error if chart fails
         raise
 
-from flask import Flask, render_template
+from flask import Flask, request
+from template_engine import app_templates, get_environment, report_response
 
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+
+
+def scrape_into_database() -> dict:
+    # -> one whole scrape run, it runs on a job worker so no web request waits for it
+    from background_jobs import report_progress
+    from write_behind import WriteBehindQueue
+    with DatabaseManager() as db:
+        sync = db.book_sync()  # -> only write books that are new, changed or gone
+        with WriteBehindQueue(sync.write_batch, name='books') as writer:
+            def save(book):
+                writer.put(book)  # -> saved while later pages load
+                report_progress(items=1)
+            BookScraper().scrape_books(max_pages=2, on_item=save)
+        return sync.finish()  # -> after a full scrape only, drops books that are not listed any more
 
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader
+    from background_jobs import start_scrape
+    from database import QueryError
+    if request.method == 'POST':
+        return start_scrape('task1_books', scrape_into_database)  # -> 202 with a job id, poll /jobs/<id> for progress
     try:
-        db = DatabaseManager()
-        scraper = BookScraper()
-
-        if request.method == 'POST':
-            db.clear_table()  # -> clear old data
-            books = scraper.scrape_books(max_pages=2)  # -> scrap new books
-            for book in books:
-                db.insert_book(book)  # -> save each book to databse
-
-        books = db.fetch_books()
-        generate_visual_report(books)
-
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(books=books))
-        logging.info("Made html report")
-
-        db.close()
-        return app.send_static_file('report.html')
+        with DatabaseManager() as db:  # -> connection goes back to the pool even if something fails
+            db.ensure_indexes()  # -> the page shows what the last finished scrape saved
+            chart = generate_visual_report(db.top_books(5))
+            shown = db.page_books(  # -> only the rows on this page come out of the databse
+                page=request.args.get('page', 1, type=int),
+                per_page=request.args.get('per_page', None, type=int),
+                where={
+                    'category': request.args.get('category'),
+                    'price__gte': request.args.get('min_price', None, type=float),
+                    'price__lte': request.args.get('max_price', None, type=float),
+                    'rating__gte': request.args.get('min_rating', None, type=int)
+                },
+                order_by=request.args.get('sort', '-value_score')
+            )
+
+        chart_url = chart.url() if chart is not None else None  # -> page goes out now, /charts/ waits for the render
+        return report_response('report.html', books=shown['items'], pages=shown,
+                               chart_url=chart_url)  # -> streamed, never written to disk
+    except QueryError as e:
+        return f"Bad query: {e}", 400
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
 
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)  # -> queued, running, done or failed with pages and books so far
+
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/chart-stats')
+def chart_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    return jsonify(get_charts().stats())  # -> hit rate, renders and average render ms
+
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+
+@app.route('/db-stats')
+def db_stats():
+    from flask import jsonify
+    from db_pool import pool_stats
+    return jsonify(pool_stats())  # -> wait time and utilization of the databse pool
+
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -7,64 +7,122 @@ logging.basicConfig(
 )
 
 
+CONNECTION_STRING = (
+    'DRIVER={SQL Server};'
+    'SERVER=DESKTOP-XXXX\\SQLEXPRESS;'
+    'DATABASE=JobsDB;'
+    'Trusted_Connection=yes;'
+)
+
+
+def connect_database():
+    import pyodbc
+    return pyodbc.connect(CONNECTION_STRING)  # -> conect to sql server databse
+
+
 class DatabaseManager:
-    def __init__(self):
-        import pyodbc
+    COLUMNS = ('JobTitle', 'Company', 'Location', 'PostDate', 'Description')  # -> same order as job_row
+    KEY = ('JobTitle', 'Company')  # -> same title at the same company is the same job
+    RECORD_FIELDS = ('job_title', 'company', 'location', 'post_date', 'description')
+    FIELD_COLUMNS = dict(zip(RECORD_FIELDS, COLUMNS))  # -> what the query api may filter and sort on
+    INDEXES = {
+        'IX_Jobs_Company': 'Company',  # -> jobs per company for the chart and the company filter
+        'IX_Jobs_Location': 'Location'
+    }
+    SELECT_JOBS = """
+            SELECT JobTitle, Company, Location, PostDate, Description
+            FROM Jobs
+            """
+    INSERT_JOB = """
+            INSERT INTO Jobs (JobTitle, Company, Location, PostDate, Description)
+            VALUES (?, ?, ?, ?, ?)
+            """
+
+    def __init__(self, pool=None):
+        from db_pool import get_pool
         try:
-            self.conn = pyodbc.connect(
-                'DRIVER={SQL Server};'
-                'SERVER=DESKTOP-XXXX\\SQLEXPRESS;'
-                'DATABASE=JobsDB;'
-                'Trusted_Connection=yes;'
-            )  # -> conect to sql server databse
+            self.pool = pool or get_pool(CONNECTION_STRING, connect_database, name='JobsDB')
+            self.conn = self.pool.acquire()  # -> reuse an open connection, only connect when none is free
             self.cursor = self.conn.cursor()
             logging.info("Databse conected sucessfully")
         except Exception as e:
             logging.error(f"Failed to conect to databse: {e}")
             raise
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(broken=exc_type is not None and not self.pool.is_healthy(self.conn))
+
+    @staticmethod
+    def job_row(job: dict) -> tuple:
+        return (
+            job['job_title'],
+            job['company'],
+            job['location'],
+            job['post_date'],
+            job['description']
+        )
+
     def insert_job(self, job: dict):
         try:
-            query = """
-            INSERT INTO Jobs (JobTitle, Company, Location, PostDate, Description)
-            VALUES (?, ?, ?, ?, ?)
-            """
-            self.cursor.execute(query, (
-                job['job_title'],
-                job['company'],
-                job['location'],
-                job['post_date'],
-                job['description']
-            ))  # -> save job to database
+            self.cursor.execute(self.INSERT_JOB, self.job_row(job))  # -> save job to database
             self.conn.commit()
             logging.info(f"Saved job {job['job_title']} to databse")
         except Exception as e:
             logging.error(f"Failed to save job: {e}")  # -> write error if save fails
             raise
 
+    def insert_jobs(self, jobs, batch_size: int = None) -> int:
+        from database import DEFAULT_BATCH_SIZE, bulk_insert
+        rows = (self.job_row(job) for job in jobs)
+        return bulk_insert(self.conn, self.cursor, self.INSERT_JOB, rows, batch_size or DEFAULT_BATCH_SIZE, 'jobs')
+
+    def sync_jobs(self, jobs) -> dict:
+        from database import sync_rows
+        rows = (self.job_row(job) for job in jobs)
+        return sync_rows(self.conn, self.cursor, 'Jobs', self.COLUMNS, self.KEY, rows, 'jobs')
+
+    def job_sync(self):
+        from database import IncrementalSync
+        return IncrementalSync(self.conn, self.cursor, 'Jobs', self.COLUMNS, self.KEY, self.job_row, 'jobs')
+
     def fetch_jobs(self) -> list:
         try:
-            query = """
-            SELECT JobTitle, Company, Location, PostDate, Description
-            FROM Jobs
-            """
-            self.cursor.execute(query)  # -> get all jobs from databse
-            rows = self.cursor.fetchall()
-            jobs = []
-            for row in rows:
-                jobs.append({
-                    'job_title': row[0],
-                    'company': row[1],
-                    'location': row[2],
-                    'post_date': row[3],
-                    'description': row[4]
-                })
+            jobs = list(self.stream_jobs())  # -> get all jobs from databse
             logging.info(f"Got {len(jobs)} jobs from databse")
             return jobs
         except Exception as e:
             logging.error(f"Failed to fetch jobs: {e}")  # -> write error if fetch fails
             raise
 
+    def stream_jobs(self, fetch_size: int = None):
+        from database import DEFAULT_FETCH_SIZE, stream_records
+        return stream_records(self.conn, self.SELECT_JOBS, 'Job', self.RECORD_FIELDS,
+                              fetch_size=fetch_size or DEFAULT_FETCH_SIZE)
+
+    def jobs_view(self):
+        from database import RowView, count_rows
+        return RowView(self.stream_jobs, count=lambda: count_rows(self.conn, 'Jobs'))
+
+    def ensure_indexes(self):
+        from database import ensure_indexes
+        ensure_indexes(self.conn, 'Jobs', self.INDEXES, scope=self.pool)
+
+    def query_jobs(self, where: dict = None, order_by=None, limit: int = None, offset: int = 0) -> list:
+        from database import query_records
+        return query_records(self.conn, 'Jobs', 'Job', self.FIELD_COLUMNS, self.KEY, where, order_by, limit, offset)
+
+    def page_jobs(self, page: int = 1, per_page: int = None, where: dict = None, order_by=None) -> dict:
+        from database import DEFAULT_PAGE_SIZE, page_records
+        return page_records(self.conn, 'Jobs', 'Job', self.FIELD_COLUMNS, self.KEY, page,
+                            per_page or DEFAULT_PAGE_SIZE, where, order_by)
+
+    def top_companies(self, n: int = 5) -> dict:
+        from database import count_by
+        return count_by(self.conn, 'Jobs', 'Company', limit=n)  # -> counted with GROUP BY, not in python
+
     def clear_table(self):
         try:
             self.cursor.execute("DELETE FROM Jobs")  # -> clear the jobs tabel
@@ -74,9 +132,13 @@ class DatabaseManager:
             logging.error(f"Failed to clear tabel: {e}")  # -> write error if clear fails
             raise
 
-    def close(self):
-        self.conn.close()
-        logging.info("Databse closed")  # -> write in diary we closed
+    def close(self, broken: bool = False):
+        if self.conn is None:
+            return  # -> already given back
+        self.cursor.close()
+        self.pool.release(self.conn, broken)
+        self.conn = None
+        logging.info("Gave databse connection back to pool")  # -> write in diary we closed
 
 
 class JobScraper:
@@ -84,7 +146,6 @@ class JobScraper:
         from selenium import webdriver  # -> to use browser for skraping
         from selenium.webdriver.chrome.service import Service  # -> to set up browser service
         from webdriver_manager.chrome import ChromeDriverManager  # -> to get browser driver
-        from selenium.webdriver.common.by import By  # -> to find stuff on web page
         try:
             service = Service(ChromeDriverManager().install())
             self.driver = webdriver.Chrome(service=service)  # -> start the browser
@@ -93,12 +154,15 @@ class JobScraper:
             logging.error(f"Failed to start browser: {e}")  # -> write error if browser fails
             raise
 
-    def scrape_jobs(self, max_jobs: int = 20) -> list:
-        from selenium.webdriver.common.by import By  # -> already imported, but needed here
+    def scrape_jobs(self, max_jobs: int = 20,
+                    url: str = "https://www.linkedin.com/jobs/search/?keywords=Python%20Developer",
+                    on_item=None) -> list:
+        from selenium.webdriver.common.by import By  # -> to find stuff on web page
         import time  # -> to wait while scraping
         jobs = []
-        url = "https://www.linkedin.com/jobs/search/?keywords=Python%20Developer"
+        from background_jobs import report_progress  # -> tell the scrape job how far we are
         self.driver.get(url)  # -> go to linkedin jobs page
+        report_progress(pages=1)
         logging.info("Opened LinkedIn jobs page")
 
         last_height = self.driver.execute_script("return document.body.scrollHeight")
@@ -123,6 +187,8 @@ class JobScraper:
                     }
                     if job not in jobs:  # -> dont add same job twice
                         jobs.append(job)
+                        if on_item:
+                            on_item(job)  # -> saved while we keep scrolling
                 except Exception as e:
                     logging.warning(f"Failed to skrap job: {e}")
                     continue
@@ -132,6 +198,7 @@ class JobScraper:
 
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")  # -> scroll to load more jobs
             time.sleep(2)  # -> wait for page to load
+            report_progress(pages=1)  # -> every scroll loads one more page of cards
             new_height = self.driver.execute_script("return document.body.scrollHeight")
             if new_height == last_height:
                 break
@@ -145,83 +212,115 @@ class JobScraper:
         logging.info("Browser closed")  # -> write in diary we closed browser
 
 
-def export_to_csv(jobs: list):
-    import pandas as pd  # -> to make csv file
+def export_to_csv(jobs):
+    from columnar_export import export_records
     try:
-        df = pd.DataFrame(jobs)
-        df.to_csv('jobs.csv', index=False)  # -> save jobs to csv file
+        export_records(jobs, 'jobs', 'jobs')  # -> jobs.csv, and jobs.parquet and jobs.arrow if pyarrow is there
         logging.info("Saved jobs to csv")
     except Exception as e:
         logging.error(f"Failed to save csv: {e}")  # -> write error if csv fails
         raise
 
 
-def generate_visual_report(jobs: list):
-    import matplotlib.pyplot as plt  # -> to make charts in generate_visual_report
+def generate_visual_report(top_companies: dict):
+    from chart_service import bar_chart, get_charts
     try:
-        if not jobs:
+        if not top_companies:
             return
 
-        companies = {}
-        for job in jobs:
-            company = job['company']
-            companies[company] = companies.get(company, 0) + 1
-
-        top_companies = dict(sorted(companies.items(), key=lambda x: x[1], reverse=True)[:5])  # -> get top 5 companiyas
         names = list(top_companies.keys())
         counts = list(top_companies.values())
 
-        plt.figure(figsize=(8, 6))
-        plt.bar(names, counts, color='lightblue')  # -> make chart for jobs by companies
-        plt.xlabel('Companies')
-        plt.ylabel('Number of Jobs')
-        plt.title('Top 5 Companies with Python Developer Jobs')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('static/jobs_by_company.png')  # -> save the chart
-        plt.close()
-        logging.info("Made chart for report")
+        spec = bar_chart(names, counts, 'Top 5 Companies with Python Developer Jobs', 'Companies', 'Number of Jobs',
+                         color='lightblue', rotation=45)
+        return get_charts().chart('jobs_by_company', spec)
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")
         raise
 
 
 
-from flask import Flask, render_template, send_file  # -> to make web page and send csv
+from flask import Flask, request  # -> to make web page
+from template_engine import app_templates, get_environment, report_response
 
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+
+
+def scrape_into_database() -> dict:
+    # -> one whole scrape run on a job worker, the browser only lives as long as the run
+    from background_jobs import report_progress
+    from write_behind import WriteBehindQueue
+    with DatabaseManager() as db:
+        sync = db.job_sync()  # -> only write jobs that are new, changed or gone
+        scraper = JobScraper()
+        try:
+            with WriteBehindQueue(sync.write_batch, name='jobs') as writer:
+                def save(job):
+                    writer.put(job)
+                    report_progress(items=1)
+                scraper.scrape_jobs(max_jobs=20, on_item=save)
+        finally:
+            scraper.close()
+        result = sync.finish()  # -> after a full scrape only
+        export_to_csv(db.jobs_view())  # -> files and one dataset partition per finished scrape, read a chunk at a time
+        return result
 
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader  # -> to make html report in index function
+    from background_jobs import start_scrape
+    from database import QueryError
+    if request.method == 'POST':
+        return start_scrape('task2_jobs', scrape_into_database)  # -> answers right away with a job id
     try:
-        db = DatabaseManager()
-        scraper = JobScraper()
-
-        if request.method == 'POST':
-            db.clear_table()  # -> clear old data
-            jobs = scraper.scrape_jobs(max_jobs=20)  # -> scrap new jobs
-            for job in jobs:
-                db.insert_job(job)
-
-        jobs = db.fetch_jobs()
-        export_to_csv(jobs)
-        generate_visual_report(jobs)
-
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(jobs=jobs))
-        logging.info("Made html report")
-
-        scraper.close()
-        db.close()
-        return app.send_static_file('report.html')
+        with DatabaseManager() as db:  # -> connection goes back to the pool even if something fails
+            db.ensure_indexes()  # -> report is made from the last finished scrape
+            chart = generate_visual_report(db.top_companies(5))
+            shown = db.page_jobs(  # -> only the rows on this page come out of the databse
+                page=request.args.get('page', 1, type=int),
+                per_page=request.args.get('per_page', None, type=int),
+                where={
+                    'company': request.args.get('company'),
+                    'location': request.args.get('location'),
+                    'job_title__like': f"%{request.args['q']}%" if request.args.get('q') else None
+                },
+                order_by=request.args.get('sort')
+            )
+
+        chart_url = chart.url() if chart is not None else None
+        return report_response('report.html', jobs=shown['items'], pages=shown, chart_url=chart_url)
+    except QueryError as e:
+        return f"Bad query: {e}", 400
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
 
+@app.route('/jobs/<job_id>')
+def scrape_job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)  # -> how far the scrape is, pages loaded and jobs found
+
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/chart-stats')
+def chart_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    return jsonify(get_charts().stats())  # -> hit rate, renders and average render ms
+
+
+@app.route('/db-stats')
+def db_stats():
+    from flask import jsonify
+    from db_pool import pool_stats
+    return jsonify(pool_stats())  # -> wait time and utilization of the databse pool
+
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
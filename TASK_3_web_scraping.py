@@ -6,64 +6,121 @@ logging.basicConfig(
 )
 
 
+CONNECTION_STRING = (
+    'DRIVER={SQL Server};'
+    'SERVER=DESKTOP-XXXX\\SQLEXPRESS;'
+    'DATABASE=CryptoDB;'
+    'Trusted_Connection=yes;'
+)
+
+
+def connect_database():
+    import pyodbc
+    return pyodbc.connect(CONNECTION_STRING)  # -> connect to SQL Server database
+
+
 class DatabaseManager:
-    def __init__(self):
-        import pyodbc
+    COLUMNS = ('Name', 'Price', 'Change24h', 'Change7d', 'MarketCap')  # -> same order as crypto_row
+    KEY = ('Name',)
+    RECORD_FIELDS = ('name', 'price', 'change_24h', 'change_7d', 'market_cap')  # -> what fetch and stream give back
+    FIELD_COLUMNS = dict(zip(RECORD_FIELDS, COLUMNS))  # -> what the query api may filter and sort on
+    INDEXES = {
+        'IX_Cryptocurrencies_MarketCap': 'MarketCap DESC'  # -> the default order of every read
+    }
+    SELECT_CRYPTOS = """
+            SELECT Name, Price, Change24h, Change7d, MarketCap
+            FROM Cryptocurrencies
+            ORDER BY MarketCap DESC
+            """
+    INSERT_CRYPTO = """
+            INSERT INTO Cryptocurrencies (Name, Price, Change24h, Change7d, MarketCap)
+            VALUES (?, ?, ?, ?, ?)
+            """
+
+    def __init__(self, pool=None):
+        from db_pool import get_pool
         try:
-            self.conn = pyodbc.connect(
-                'DRIVER={SQL Server};'
-                'SERVER=DESKTOP-XXXX\\SQLEXPRESS;'
-                'DATABASE=CryptoDB;'
-                'Trusted_Connection=yes;'
-            )  # -> connect to SQL Server database
+            self.pool = pool or get_pool(CONNECTION_STRING, connect_database, name='CryptoDB')
+            self.conn = self.pool.acquire()  # -> reuse an open connection, only connect when none is free
             self.cursor = self.conn.cursor()
             logging.info("Database connected successfully")  # -> write in log that we connected
         except Exception as e:
             logging.error(f"Failed to connect to database: {e}")  # -> write error if we cannot connect
             raise
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(broken=exc_type is not None and not self.pool.is_healthy(self.conn))
+
+    @staticmethod
+    def crypto_row(crypto: dict) -> tuple:
+        return (
+            crypto['name'],
+            crypto['price'],
+            crypto['change_24h'],
+            crypto['change_7d'],
+            crypto['market_cap']
+        )
+
     def insert_crypto(self, crypto: dict):
         try:
-            query = """
-            INSERT INTO Cryptocurrencies (Name, Price, Change24h, Change7d, MarketCap)
-            VALUES (?, ?, ?, ?, ?)
-            """
-            self.cursor.execute(query, (
-                crypto['name'],
-                crypto['price'],
-                crypto['change_24h'],
-                crypto['change_7d'],
-                crypto['market_cap']
-            ))  # -> save cryptocurrency to database
+            self.cursor.execute(self.INSERT_CRYPTO, self.crypto_row(crypto))  # -> save cryptocurrency to database
             self.conn.commit()
             logging.info(f"Saved cryptocurrency {crypto['name']} to database")
         except Exception as e:
             logging.error(f"Failed to save cryptocurrency: {e}")  # -> write error if save fails
             raise
 
+    def insert_cryptos(self, cryptos, batch_size: int = None) -> int:
+        from database import DEFAULT_BATCH_SIZE, bulk_insert
+        rows = (self.crypto_row(crypto) for crypto in cryptos)
+        return bulk_insert(self.conn, self.cursor, self.INSERT_CRYPTO, rows, batch_size or DEFAULT_BATCH_SIZE,
+                           'cryptocurrencies')
+
+    def sync_cryptos(self, cryptos) -> dict:
+        from database import sync_rows
+        rows = (self.crypto_row(crypto) for crypto in cryptos)
+        return sync_rows(self.conn, self.cursor, 'Cryptocurrencies', self.COLUMNS, self.KEY, rows, 'cryptocurrencies')
+
+    def crypto_sync(self):
+        from database import IncrementalSync
+        return IncrementalSync(self.conn, self.cursor, 'Cryptocurrencies', self.COLUMNS, self.KEY, self.crypto_row,
+                               'cryptocurrencies')
+
     def fetch_cryptos(self) -> list:
         try:
-            query = """
-            SELECT Name, Price, Change24h, Change7d, MarketCap
-            FROM Cryptocurrencies
-            """
-            self.cursor.execute(query)  # -> get all cryptocurrencies from database
-            rows = self.cursor.fetchall()
-            cryptos = []
-            for row in rows:
-                cryptos.append({
-                    'name': row[0],
-                    'price': row[1],
-                    'change_24h': row[2],
-                    'change_7d': row[3],
-                    'market_cap': row[4]
-                })
+            cryptos = list(self.stream_cryptos())  # -> get all cryptocurrencies from database
             logging.info(f"Got {len(cryptos)} cryptocurrencies from database")
             return cryptos
         except Exception as e:
             logging.error(f"Failed to fetch cryptocurrencies: {e}")  # -> write error if fetch fails
             raise
 
+    def stream_cryptos(self, fetch_size: int = None):
+        from database import DEFAULT_FETCH_SIZE, stream_records
+        return stream_records(self.conn, self.SELECT_CRYPTOS, 'Crypto', self.RECORD_FIELDS,
+                              fetch_size=fetch_size or DEFAULT_FETCH_SIZE)
+
+    def cryptos_view(self):
+        from database import RowView, count_rows
+        return RowView(self.stream_cryptos, count=lambda: count_rows(self.conn, 'Cryptocurrencies'))
+
+    def ensure_indexes(self):
+        from database import ensure_indexes
+        ensure_indexes(self.conn, 'Cryptocurrencies', self.INDEXES, scope=self.pool)
+
+    def query_cryptos(self, where: dict = None, order_by='-market_cap', limit: int = None, offset: int = 0) -> list:
+        from database import query_records
+        return query_records(self.conn, 'Cryptocurrencies', 'Crypto', self.FIELD_COLUMNS, self.KEY, where, order_by,
+                             limit, offset)
+
+    def page_cryptos(self, page: int = 1, per_page: int = None, where: dict = None, order_by=None) -> dict:
+        from database import DEFAULT_PAGE_SIZE, page_records
+        return page_records(self.conn, 'Cryptocurrencies', 'Crypto', self.FIELD_COLUMNS, self.KEY, page,
+                            per_page or DEFAULT_PAGE_SIZE, where, order_by or '-market_cap')
+
     def clear_table(self):
         try:
             self.cursor.execute("DELETE FROM Cryptocurrencies")  # -> clear the cryptocurrencies table
@@ -73,28 +130,41 @@ class DatabaseManager:
             logging.error(f"Failed to clear table: {e}")  # -> write error if clear fails
             raise
 
-    def close(self):
-        self.conn.close()
-        logging.info("Database closed")  # -> write in log that we closed
+    def close(self, broken: bool = False):
+        if self.conn is None:
+            return  # -> already given back
+        self.cursor.close()
+        self.pool.release(self.conn, broken)
+        self.conn = None
+        logging.info("Gave database connection back to pool")  # -> write in log that we closed
 
 
 class CryptoScraper:
+    PARSE_ONLY = 'table.cmc-table'
+
     def __init__(self, base_url: str = "https://coinmarketcap.com"):
         self.base_url = base_url
 
-    def scrape_cryptos(self, max_cryptos: int = 20) -> list:
-        import requests
-        from bs4 import BeautifulSoup
+    def scrape_cryptos(self, max_cryptos: int = 20, on_item=None) -> list:
+        from http_client import get_client
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}  # -> pretend to be a browser
-            response = requests.get(self.base_url, headers=headers)  # -> get the web page
+            response = get_client().get(self.base_url)  # -> get the web page, shared client sends browser headers
             response.raise_for_status()
             logging.info("Scraped CoinMarketCap page")
         except Exception as e:
             logging.error(f"Failed to scrape page: {e}")  # -> write error if scrape fails
             raise
 
-        soup = BeautifulSoup(response.text, 'html.parser')  # -> read the web page
+        cryptos = self.parse_page(response, max_cryptos)
+        logging.info(f"Scraped {len(cryptos)} cryptocurrencies")
+        if on_item:
+            for crypto in cryptos:  # -> one page holds them all, so they come out together
+                on_item(crypto)
+        return cryptos
+
+    def parse_page(self, response, max_cryptos: int = 20) -> list:
+        from html_parser import parse_html
+        soup = parse_html(response.text, only=self.PARSE_ONLY)  # -> read the web page
         table = soup.find('table', class_='cmc-table')
         if not table:
             raise ValueError("Could not find the table")
@@ -121,67 +191,129 @@ class CryptoScraper:
                 logging.warning(f"Failed to scrape cryptocurrency: {e}")
                 continue
 
-        logging.info(f"Scraped {len(cryptos)} cryptocurrencies")
         return cryptos
 
 
-def generate_visual_report(cryptos: list):
-    import matplotlib.pyplot as plt
+def generate_visual_report(cryptos):
+    from chart_service import bar_chart, get_charts
     try:
-        if not cryptos:
+        names, changes = [], []
+        for crypto in cryptos:  # -> one pass, works on a database view too
+            names.append(crypto['name'])
+            changes.append(crypto['change_24h'])
+        if not names:
             return
 
-        names = [c['name'] for c in cryptos]
-        changes = [c['change_24h'] for c in cryptos]
-
-        plt.figure(figsize=(10, 6))
-        plt.bar(names, changes, color='lightcoral')  # -> make chart for 24h change
-        plt.xlabel('Cryptocurrencies')
-        plt.ylabel('24h Change (%)')
-        plt.title('24h Change Percentages of Top 20 Cryptocurrencies')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('static/change_24h.png')
-        plt.close()
-        logging.info("Made chart for report")
+        spec = bar_chart(names, changes,
+                         '24h Change Percentages of Top 20 Cryptocurrencies', 'Cryptocurrencies', '24h Change (%)',
+                         color='lightcoral', rotation=45, figsize=(10, 6))
+        return get_charts().chart('change_24h', spec)
     except Exception as e:
         logging.error(f"Failed to make chart: {e}")  # -> write error if chart fails
         raise
 
-from flask import Flask, render_template
+from flask import Flask, request
+from template_engine import app_templates, get_environment, report_response
 
 app = Flask(__name__)
+get_environment(app_templates(app))  # -> report.html is parsed and compiled at startup, not on the first request
+
+
+def scrape_into_database() -> dict:
+    # -> one whole scrape run, done on a job worker thread
+    from background_jobs import report_progress
+    from timeseries_store import get_store
+    from write_behind import WriteBehindQueue
+    with DatabaseManager() as db:
+        sync = db.crypto_sync()  # -> prices change, so mostly updates and few inserts
+        with WriteBehindQueue(sync.write_batch, name='cryptocurrencies') as writer:
+            def save(crypto):
+                writer.put(crypto)
+                report_progress(items=1)
+            cryptos = CryptoScraper().scrape_cryptos(max_cryptos=20, on_item=save)
+        counts = sync.finish()
+    get_store().append_snapshot(cryptos)  # -> the table only keeps the latest prices, history goes here
+    return counts
 
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    from jinja2 import Environment, FileSystemLoader
+    from background_jobs import start_scrape
+    from database import QueryError
+    if request.method == 'POST':
+        return start_scrape('task3_cryptos', scrape_into_database)  # -> 202 and a job id, no waiting on the site
     try:
-        db = DatabaseManager()
-        scraper = CryptoScraper()
-
-        if request.method == 'POST':
-            db.clear_table()
-            cryptos = scraper.scrape_cryptos(max_cryptos=20)  # -> scrape new cryptocurrencies
-            cryptos = sorted(cryptos, key=lambda x: x['market_cap'], reverse=True)  # -> sort by market cap
-            for crypto in cryptos:
-                db.insert_crypto(crypto)
-
-        cryptos = db.fetch_cryptos()  # -> get cryptocurrencies from database
-        generate_visual_report(cryptos)  # -> make chart
-
-        env = Environment(loader=FileSystemLoader('templates'))
-        template = env.get_template('report.html')
-        with open('report.html', 'w') as f:
-            f.write(template.render(cryptos=cryptos))
-        logging.info("Made HTML report")
-
-        db.close()
-        return app.send_static_file('report.html')
+        with DatabaseManager() as db:  # -> connection goes back to the pool even if something fails
+            db.ensure_indexes()  # -> prices on the page are from the last finished scrape
+            shown = db.page_cryptos(  # -> only the rows on this page come out of the database
+                page=request.args.get('page', 1, type=int),
+                per_page=request.args.get('per_page', None, type=int),
+                where={
+                    'market_cap__gte': request.args.get('min_market_cap', None, type=float),
+                    'change_24h__gte': request.args.get('min_change', None, type=float),
+                    'change_24h__lte': request.args.get('max_change', None, type=float)
+                },
+                order_by=request.args.get('sort')
+            )
+            chart = generate_visual_report(shown['items'])  # -> chart the coins on this page
+
+        chart_url = chart.url() if chart is not None else None
+        return report_response('report.html', cryptos=shown['items'], pages=shown, chart_url=chart_url)
+    except QueryError as e:
+        return f"Bad query: {e}", 400
     except Exception as e:
         logging.error(f"Web app error: {e}")
         return f"Error: {e}", 500
 
 
+@app.route('/jobs/<job_id>')
+def job(job_id: str):
+    from background_jobs import job_status
+    return job_status(job_id)
+
+
+@app.route('/charts/<filename>')
+def chart_file(filename: str):
+    from chart_service import chart_response
+    return chart_response(filename)
+
+@app.route('/chart-stats')
+def chart_stats():
+    from flask import jsonify
+    from chart_service import get_charts
+    return jsonify(get_charts().stats())  # -> hit rate, renders and average render ms
+
+
+@app.route('/http-stats')
+def http_client_stats():
+    from flask import jsonify
+    from http_client import http_stats
+    return jsonify(http_stats())  # -> connection reuse, per site limits and http cache hits
+
+
+@app.route('/db-stats')
+def db_stats():
+    from flask import jsonify
+    from db_pool import pool_stats
+    return jsonify(pool_stats())  # -> wait time and utilization of the database pool
+
+
+@app.route('/history/<name>')
+def history(name: str):
+    import time
+    from flask import jsonify
+    from timeseries_store import get_store
+    try:
+        resolution = request.args.get('resolution', '1h')
+        days = request.args.get('days', 7, type=float)
+        candles = get_store().ohlc(name, resolution, start=time.time() - days * 86400)  # -> read from rollups
+        return jsonify({'name': name, 'resolution': resolution, 'candles': candles})
+    except ValueError as e:
+        return f"Bad query: {e}", 400
+    except Exception as e:
+        logging.error(f"History error: {e}")
+        return f"Error: {e}", 500
+
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
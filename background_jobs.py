@@ -0,0 +1,169 @@
+import contextvars
+import logging
+import threading
+import time
+import uuid
+
+DEFAULT_WORKERS = 2  # -> scrape runs at the same time, every run already loads its pages in parallel
+DEFAULT_KEEP = 100  # -> finished jobs we still answer /jobs/<id> for
+
+_current = contextvars.ContextVar('scrape_job', default=None)  # -> the job the running code belongs to
+
+
+class Job:
+    def __init__(self, source: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.source = source
+        self.status = 'queued'  # -> queued, running, done or failed
+        self.pages = 0
+        self.items = 0
+        self.merged = 0  # -> requests that asked for this source while the job was already going
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_progress(self, pages: int = 0, items: int = 0):
+        with self._lock:  # -> page fetches report from many threads at once
+            self.pages += pages
+            self.items += items
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        ends = self.finished or time.time()
+        return {
+            'id': self.id,
+            'source': self.source,
+            'status': self.status,
+            'pages': self.pages,
+            'items': self.items,
+            'merged': self.merged,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'seconds': round(ends - self.started, 3) if self.started else None
+        }
+
+
+def report_progress(pages: int = 0, items: int = 0):
+    # -> called from scraping code, does nothing when it is not running inside a job
+    job = _current.get()
+    if job is not None:
+        job.add_progress(pages, items)
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, keep: int = DEFAULT_KEEP):
+        from concurrent.futures import ThreadPoolExecutor
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._inflight = {}  # -> source -> the queued or running job for it
+        self._latest = {}  # -> source -> newest job that finished without error
+
+    def submit(self, source: str, run) -> tuple:
+        # -> gives back (job, merged), merged is True when a run for this source was already going
+        with self._lock:
+            job = self._inflight.get(source)
+            if job is not None:
+                job.merged += 1
+                return job, True
+            job = Job(source)
+            self._jobs[job.id] = job
+            self._inflight[source] = job
+            self._forget_old()
+        self._executor.submit(self._run, job, run)
+        logging.info(f"Queued scrape job {job.id} for {source}")
+        return job, False
+
+    def _run(self, job: Job, run):
+        token = _current.set(job)
+        job.status = 'running'
+        job.started = time.time()
+        status = 'failed'
+        try:
+            job.result = run()
+            status = 'done'
+            if isinstance(job.result, list) and not job.items:
+                job.items = len(job.result)  # -> scrapers that only hand back a list at the end
+        except Exception as e:
+            logging.error(f"Scrape job {job.id} for {job.source} failed: {e}")
+            job.error = str(e)
+        finally:
+            _current.reset(token)
+            with self._lock:
+                job.finished = time.time()
+                job.status = status
+                del self._inflight[job.source]
+                if status == 'done':
+                    self._latest[job.source] = job
+            job.done.set()
+        logging.info(f"Scrape job {job.id} for {job.source} {status}: {job.pages} pages, {job.items} items")
+
+    def _forget_old(self):
+        finished = [job for job in self._jobs.values()
+                    if job.finished is not None and self._latest.get(job.source) is not job]
+        for job in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job.id]  # -> oldest first, the latest good run of a source is always kept
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self, source: str):
+        with self._lock:
+            return self._latest.get(source)
+
+    def running(self, source: str):
+        with self._lock:
+            return self._inflight.get(source)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner() -> JobRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
+
+
+def set_runner(runner: JobRunner) -> JobRunner:
+    global _runner
+    with _runner_lock:
+        old, _runner = _runner, runner
+    return old
+
+
+def accepted(job: Job, merged: bool = False):
+    # -> flask answer for a job that is queued or running, 202 with where to poll
+    from flask import jsonify, request
+    response = jsonify({**job.to_dict(), 'already_running': merged})
+    response.status_code = 202
+    response.headers['Location'] = f"{request.script_root}/jobs/{job.id}"  # -> script_root when mounted under a prefix
+    return response
+
+
+def start_scrape(source: str, run):
+    return accepted(*get_runner().submit(source, run))
+
+
+def job_status(job_id: str):
+    from flask import jsonify
+    job = get_runner().get(job_id)
+    if job is None:
+        return jsonify({'error': f"No job {job_id}"}), 404
+    return jsonify(job.to_dict())
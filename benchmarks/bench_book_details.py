@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.local_server import server_url, start_server
+
+BOOKS_PER_PAGE = 20
+PAGES = 3
+LATENCY = 0.05  # -> pretend every page takes 50ms like a real site
+
+LISTING_ITEM = """
+<article class="product_pod">
+  <h3><a href="book_{n}/index.html" title="Book {n}">Book {n}</a></h3>
+  <p class="star-rating Three"></p>
+  <p class="price_color">£{n}.50</p>
+</article>"""
+
+DETAIL_PAGE = """<html><body>
+<ul class="breadcrumb"><li><a>Home</a></li><li><a>Books</a></li><li><a>Category {n}</a></li></ul>
+<article class="product_page">
+  <p class="availability">In stock</p>
+  <p>{n} reviews</p>
+  <p>last</p>
+</article></body></html>"""
+
+
+def route(path: str):
+    if path == '/index.html' or path.startswith('/catalogue/page-'):
+        page = 1 if path == '/index.html' else int(path.split('page-')[1].split('.')[0])
+        items = ''
+        if page <= PAGES:
+            start = (page - 1) * BOOKS_PER_PAGE
+            items = ''.join(LISTING_ITEM.format(n=n) for n in range(start, start + BOOKS_PER_PAGE))
+        return f"<html><body>{items}</body></html>"
+    if path.startswith('/catalogue/book_'):
+        return DETAIL_PAGE.format(n=path.split('book_')[1].split('/')[0])
+    return None
+
+
+def run(scraper_cls, base_url: str, max_concurrency: int) -> tuple:
+    scraper = scraper_cls(base_url=base_url, max_concurrency=max_concurrency)
+    start = time.perf_counter()
+    books = scraper.scrape_books(max_pages=PAGES)
+    return time.perf_counter() - start, books
+
+
+def main():
+    from TASK_1_web_scraping import BookScraper
+    from http_client import get_client
+    server = start_server(route, latency=LATENCY)
+    base_url = server_url(server)
+    try:
+        serial_time, serial_books = run(BookScraper, base_url, 1)
+        print(f"max_concurrency=1: {len(serial_books)} books in {serial_time:.2f}s")
+        for cap in (4, 8, 16):
+            took, books = run(BookScraper, base_url, cap)
+            assert books == serial_books, "concurrent fetch changed the output"
+            print(f"max_concurrency={cap}: {len(books)} books in {took:.2f}s ({serial_time / took:.1f}x faster)")
+        for host, counts in get_client().connection_stats().items():
+            print(f"{host}: {counts['requests']} requests, {counts['new_connections']} new connections, "
+                  f"{counts['reused']} reused")
+        for host, limits in get_client().host_limits().items():
+            print(f"{host}: {limits}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import book_records, crypto_records, job_records, sqlite_manager
+
+ROWS = 2000
+
+# -> (file, single insert, bulk insert, records)
+TABLES = [
+    ('TASK_1_web_scraping.py', 'insert_book', 'insert_books', book_records),
+    ('TASK_2_web_scraping.py', 'insert_job', 'insert_jobs', job_records),
+    ('TASK_3_web_scraping.py', 'insert_crypto', 'insert_cryptos', crypto_records),
+]
+
+
+def timed_insert(file: str, insert, records: list) -> float:
+    # -> a fresh database file each time, commits have to reach the disk like on a real server
+    path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    db = sqlite_manager(file, path)
+    start = time.perf_counter()
+    insert(db, records)
+    took = time.perf_counter() - start
+    db.close()
+    return took
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())  # -> the TASK modules log into the working dir
+    print(f"{ROWS} rows into sqlite on disk")
+    print(f"{'manager':26}{'row by row':>12}{'batch 100':>12}{'batch 500':>12}{'batch 2000':>12}   rows/s best")
+    for file, single, bulk, make_records in TABLES:
+        records = make_records(ROWS)
+        timings = [timed_insert(file, lambda db, rows: [getattr(db, single)(row) for row in rows], records)]
+        for batch_size in (100, 500, 2000):
+            timings.append(timed_insert(file, lambda db, rows: getattr(db, bulk)(rows, batch_size), records))
+        print(f"{file:26}" + ''.join(f"{took:11.3f}s" for took in timings) +
+              f"   {ROWS / min(timings):9.0f} ({timings[0] / min(timings):.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+
+REQUESTS = 200
+CHANGES_EVERY = 20  # -> a new scrape changes the data every this many requests
+THREADS = 8  # -> flask workers asking for the chart at the same time
+WORKERS = 4  # -> render processes
+
+
+def spec_for(request: int) -> dict:
+    from chart_service import bar_chart
+    version = request // CHANGES_EVERY
+    names = [f'Book {version * 5 + n}' for n in range(5)]
+    return bar_chart(names, [(version + n) % 7 / 3 for n in range(5)], 'Top 5 Books by Value Score', 'Books',
+                     'Value Score (Rating/Price)', color='lightgreen', rotation=45)
+
+
+def pyplot_in_request(spec: dict, path: str):
+    # -> what generate_visual_report did before, in the request thread every time
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=spec['figsize'])
+    plt.bar(spec['labels'], spec['values'], color=spec['color'])
+    plt.xlabel(spec['xlabel'])
+    plt.ylabel(spec['ylabel'])
+    plt.title(spec['title'])
+    plt.xticks(rotation=spec['rotation'])
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+def main():
+    if importlib.util.find_spec('matplotlib') is None:
+        print("matplotlib is not installed, there is nothing to render")
+        return
+    from chart_service import ChartService
+    folder = tempfile.mkdtemp()
+    os.chdir(folder)
+    os.makedirs('static')
+    specs = [spec_for(n) for n in range(REQUESTS)]
+    print(f"{REQUESTS} requests, data changes every {CHANGES_EVERY}, {THREADS} threads, {WORKERS} render processes\n")
+
+    start = time.perf_counter()
+    for spec in specs:
+        pyplot_in_request(spec, os.path.join('static', 'top_books.png'))
+    before = time.perf_counter() - start
+    print(f"{'pyplot in every request':28}{before / REQUESTS * 1000:10.1f} ms per request{before:10.2f} s total")
+
+    service = ChartService(os.path.join('static', 'charts'), workers=WORKERS)
+    service.chart('warm_up', spec_for(-CHANGES_EVERY)).result()  # -> start the render processes, not a request
+    service.hits = service.misses = service.joined = service.renders = 0
+    service.render_ms = 0.0
+    waits = []
+
+    def worker(offset: int):
+        for spec in specs[offset::THREADS]:
+            clock = time.perf_counter()
+            service.chart('top_books', spec).result()
+            waits.append(time.perf_counter() - clock)
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    after = time.perf_counter() - start
+    print(f"{'chart service':28}{sum(waits) / len(waits) * 1000:10.1f} ms per request{after:10.2f} s total")
+    print(f"\nstats {service.stats()}")
+    service.close()
+
+
+if __name__ == '__main__':
+    main()
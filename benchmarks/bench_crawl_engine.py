@@ -0,0 +1,60 @@
+import importlib.util
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # -> to import the scrapers
+from benchmarks.local_server import server_url, start_server
+
+PAGES = 30
+QUOTES_PER_PAGE = 10
+LATENCY = 0.05  # -> pretend every page takes 50ms like a real site
+
+QUOTE = """
+<div class="quote">
+  <span class="text">Quote {n}</span>
+  <small class="author">Author {author}</small>
+  <a class="tag">tag{tag}</a><a class="tag">common</a>
+</div>"""
+
+
+def route(path: str):
+    page = 1 if path == '/' else int(path.strip('/').split('/')[1])
+    quotes = ''
+    if page <= PAGES:
+        start = (page - 1) * QUOTES_PER_PAGE
+        quotes = ''.join(QUOTE.format(n=n, author=n % 7, tag=n % 5) for n in range(start, start + QUOTES_PER_PAGE))
+    return f"<html><body>{quotes}</body></html>"
+
+
+def load_quote_scraper():
+    path = os.path.join(ROOT, '15_scrapped_files', 'quote_scraper (1).py')
+    spec = importlib.util.spec_from_file_location('quote_scraper', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    from crawl_engine import crawl_pages
+    scraper = load_quote_scraper().QuoteScraper(base_url=None)
+    server = start_server(route, latency=LATENCY)
+    scraper.base_url = server_url(server)
+    try:
+        baseline = None
+        for prefetch in (0, 1, 3, 7):
+            start = time.perf_counter()
+            quotes = crawl_pages(scraper.page_url, scraper.parse_page, prefetch=prefetch)
+            took = time.perf_counter() - start
+            if baseline is None:
+                baseline = (took, quotes)
+            assert quotes == baseline[1], "prefetching changed the output"
+            print(f"prefetch={prefetch}: {PAGES} pages, {len(quotes)} quotes in {took:.2f}s, "
+                  f"{PAGES / took:.1f} pages/s ({baseline[0] / took:.1f}x)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
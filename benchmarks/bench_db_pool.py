@@ -0,0 +1,70 @@
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import book_records, load_module, sqlite_manager, sqlite_pool
+
+CLIENTS = 16
+REQUESTS = 25  # -> per client
+CONNECT_COST = 0.02  # -> login to sql server over the network, sqlite alone connects in microseconds
+BOOKS = 200
+
+
+def serve(db_module, pool, latencies: list, lock: threading.Lock):
+    # -> what one dashboard GET does with the database
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        with db_module.DatabaseManager(pool=pool) as db:
+            db.fetch_books()
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+
+def run(label: str, path: str, **pool_options):
+    import sqlite3
+    from db_pool import ConnectionPool
+    db_module = load_module(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         'TASK_1_web_scraping.py'))
+
+    def connect():
+        time.sleep(CONNECT_COST)
+        return sqlite3.connect(path, check_same_thread=False)
+
+    pool = ConnectionPool(connect, name=label, **pool_options)
+    latencies = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=serve, args=(db_module, pool, latencies, lock)) for _ in range(CLIENTS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    took = time.perf_counter() - start
+    stats = pool.stats()
+    pool.close()
+    latencies.sort()
+    print(f"{label:22}{len(latencies) / took:10.0f}{statistics.median(latencies) * 1000:10.1f}"
+          f"{latencies[int(len(latencies) * 0.95)] * 1000:10.1f}{stats['created']:9}{stats['avg_wait_ms']:10.2f}"
+          f"{stats['avg_utilization']:8.2f}")
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())  # -> the TASK modules log into the working dir
+    path = os.path.join(os.getcwd(), 'books.sqlite3')
+    db = sqlite_manager('TASK_1_web_scraping.py', path, pool=sqlite_pool(path))
+    db.insert_books(book_records(BOOKS))
+    db.close()
+
+    print(f"{CLIENTS} clients x {REQUESTS} requests, {CONNECT_COST * 1000:.0f}ms to connect")
+    print(f"{'':22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'connects':>9}{'wait ms':>10}{'util':>8}")
+    run('connect per request', path, min_size=0, max_size=CLIENTS, max_idle=0)  # -> what index() did before
+    for size in (4, 8, 16):
+        run(f'pool max {size}', path, min_size=1, max_size=size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+
+RECORDS = 1_000_000
+BOOKS = {'value_score': ('ratio', 'rating', 'price'), 'normalized_price': ('normalized', 'price')}
+MOVIES = {'decade': ('bucket', 'year', 10)}
+
+
+def books(count: int) -> list:
+    return [{'title': f'Book {n}', 'price': 10 + n % 5000 / 100, 'rating': n % 5 + 1} for n in range(count)]
+
+
+def movies(count: int) -> list:
+    return [{'title': f'Movie {n}', 'year': 1920 + n % 105, 'rating': 7 + n % 30 / 10} for n in range(count)]
+
+
+def loop_books(records: list):
+    # -> one record at a time, the way the scrapers did it before
+    prices = [record['price'] for record in records]
+    low, high = min(prices), max(prices)
+    for record in records:
+        record['value_score'] = record['rating'] / record['price'] if record['price'] else 0.0
+        record['normalized_price'] = (record['price'] - low) / (high - low) if high != low else 0.0
+
+
+def loop_movies(records: list):
+    for record in records:
+        record['decade'] = (record['year'] // 10) * 10
+
+
+def timed(run) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def main():
+    import numpy as np
+    from derived_metrics import add_metrics, compute_columns
+    print(f"{RECORDS} records\n")
+    print(f"{'':12}{'python loop s':>16}{'add_metrics s':>16}{'arrays only s':>16}")
+    for label, make, loop, derived in (('books', books, loop_books, BOOKS), ('movies', movies, loop_movies, MOVIES)):
+        expected = make(RECORDS)
+        looped = timed(lambda: loop(expected))
+        records = make(RECORDS)
+        bulk = timed(lambda: add_metrics(records, derived))
+        for name in derived:
+            assert np.allclose([r[name] for r in records], [r[name] for r in expected]), f"{name} differs"
+        fields = {field for _, *args in derived.values() for field in args if isinstance(field, str)}
+        columns = {field: np.array([r[field] for r in records], dtype=float) for field in fields}
+        arrays = timed(lambda: compute_columns(columns, derived))  # -> what a columnar caller pays, no dicts at all
+        print(f"{label:12}{looped:16.3f}{bulk:16.3f}{arrays:16.3f}")
+
+
+if __name__ == '__main__':
+    main()
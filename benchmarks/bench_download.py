@@ -0,0 +1,98 @@
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # -> to import the scrapers
+from benchmarks.fixtures import book_records, load_module
+
+RECORDS = 200_000
+
+
+def old_download(app, books: list, keep: bool = True) -> bytes:
+    # -> what index() and /download did before, the csv is written whole, then sent from disk
+    from flask import send_file
+    from columnar_export import export_records
+    export_records(books, 'books', 'books', formats=['csv'], dataset_dir=None)
+    with app.test_request_context('/download'):
+        response = send_file(os.path.abspath('books.csv'), as_attachment=True)  # -> relative is from the app
+        return drain(response.response, keep)
+
+
+def drain(chunks, keep: bool) -> bytes:
+    # -> keep=False is a client that writes to disk as it reads, only the server side is in memory then
+    if keep:
+        return b''.join(chunks)
+    for _ in chunks:
+        pass
+    return b''
+
+
+def streamed(client, path: str, headers: dict = None, keep: bool = True) -> tuple:
+    start = time.perf_counter()
+    response = client.get(path, headers=headers or {}, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks, b'')
+    first_byte = time.perf_counter() - start
+    body = first + drain(chunks, keep)
+    response.close()
+    return response, body, first_byte, time.perf_counter() - start
+
+
+def peak_mb(run) -> float:
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    from result_cache import ResultCache, set_result_cache
+    os.chdir(tempfile.mkdtemp())
+    app = load_module(os.path.join(ROOT, '15_scrapped_files', 'book_scraper.py')).app
+    books = book_records(RECORDS)
+    cache = ResultCache('.result_cache')
+    cache.put('books', books)  # -> the snapshot /download reads, as if a scrape just finished
+    set_result_cache(cache)
+    client = app.test_client()
+    print(f"{RECORDS} books\n")
+    print(f"{'':30}{'first byte ms':>14}{'total ms':>10}{'size KB':>10}{'peak MB':>10}")
+
+    start = time.perf_counter()
+    old = old_download(app, books)
+    took = time.perf_counter() - start
+    print(f"{'write csv, send file':30}{took * 1000:14.0f}{took * 1000:10.0f}{len(old) / 1024:10.0f}"
+          f"{peak_mb(lambda: old_download(app, books, keep=False)):10.1f}")
+
+    for label, path, headers in (('stream csv', '/download', None),
+                                 ('stream csv, gzip', '/download', {'Accept-Encoding': 'gzip'}),
+                                 ('stream ndjson, gzip', '/download?format=ndjson', {'Accept-Encoding': 'gzip'}),
+                                 ('stream json', '/download?format=json', None)):
+        response, body, first_byte, total = streamed(client, path, headers)
+        memory = peak_mb(lambda: streamed(client, path, headers, keep=False))
+        print(f"{label:30}{first_byte * 1000:14.1f}{total * 1000:10.0f}{len(body) / 1024:10.0f}{memory:10.1f}")
+
+    response, plain, _, _ = streamed(client, '/download')
+    assert plain == old, "streamed csv differs from the file export"
+    response, packed, _, _ = streamed(client, '/download', {'Accept-Encoding': 'gzip'})
+    assert gzip.decompress(packed) == old
+    etag = response.headers['ETag'].strip('"')
+    half = len(packed) // 2
+    resumed, tail, _, took = streamed(client, '/download', {'Accept-Encoding': 'gzip', 'Range': f'bytes={half}-',
+                                                             'If-Range': f'"{etag}"'})
+    assert resumed.status_code == 206 and packed[:half] + tail == packed, "resumed download does not fit"
+    print(f"{'resume gzip from the middle':30}{'':14}{took * 1000:10.0f}{len(tail) / 1024:10.0f}"
+          f"   {resumed.headers['Content-Range']}")
+    not_modified, _, _, took = streamed(client, '/download', {'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'})
+    print(f"{'If-None-Match':30}{'':14}{took * 1000:10.1f}{'':>10}   status {not_modified.status_code}")
+    rows = [json.loads(line) for line in streamed(client, '/download?format=ndjson')[1].splitlines()]
+    assert len(rows) == RECORDS
+
+
+if __name__ == '__main__':
+    main()
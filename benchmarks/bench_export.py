@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import book_records, job_records
+
+RECORDS = 200_000
+
+
+def quote_records(count: int) -> list:
+    return [{'quote_text': f'"Quote number {n} about life and books."', 'author': f'Author {n % 300}',
+             'tags': [f'tag{n % 13}', f'tag{n % 7}']} for n in range(count)]
+
+
+def timed(run) -> tuple:
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def pandas_csv(records: list, path: str):
+    import pandas as pd
+    pd.DataFrame(records).to_csv(path, index=False)  # -> what every export_to_csv did before
+
+
+def main():
+    import pandas as pd
+    from columnar_export import available_formats, read_table, write_records
+    os.chdir(tempfile.mkdtemp())
+    formats = available_formats()
+    if 'parquet' not in formats:
+        print("pyarrow is not installed, only csv is measured")
+
+    print(f"{RECORDS} records each\n")
+    print(f"{'':22}{'write ms':>10}{'size KB':>10}{'read ms':>10}")
+    for shape, records in (('books', book_records(RECORDS)), ('jobs', job_records(RECORDS)),
+                           ('quotes', quote_records(RECORDS))):
+        print(shape)
+        _, took = timed(lambda: pandas_csv(records, f'{shape}_pandas.csv'))
+        _, read = timed(lambda: pd.read_csv(f'{shape}_pandas.csv'))
+        print(f"{'  pandas csv':22}{took * 1000:10.0f}{os.path.getsize(f'{shape}_pandas.csv') / 1024:10.0f}"
+              f"{read * 1000:10.0f}")
+        for fmt in formats:
+            path = f'{shape}.{fmt}'
+            _, took = timed(lambda: write_records(records, path, shape))
+            if fmt == 'csv':
+                table, read = timed(lambda: pd.read_csv(path))
+            else:
+                table, read = timed(lambda: read_table(path))
+                assert table.num_rows == len(records)
+            print(f"{'  ' + fmt:22}{took * 1000:10.0f}{os.path.getsize(path) / 1024:10.0f}{read * 1000:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
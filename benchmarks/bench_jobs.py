@@ -0,0 +1,76 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # -> to import the scrapers
+from benchmarks.bench_crawl_engine import PAGES, route
+from benchmarks.fixtures import load_module
+from benchmarks.local_server import server_url, start_server
+
+LATENCY = 0.05  # -> seconds per page, like a real site
+CLIENTS = 20  # -> people pressing scrape at the same time
+
+
+def main():
+    from background_jobs import JobRunner, get_runner, set_runner
+    from http_client import HttpClient, set_client
+    os.chdir(tempfile.mkdtemp())  # -> the scrapers log into the working dir
+    set_client(HttpClient())  # -> no http cache, every page goes to the local server
+    server = start_server(route, latency=LATENCY)
+    app = load_module(os.path.join(ROOT, '15_scrapped_files', 'quote_scraper (1).py'))
+    runs = []
+
+    def scrape():
+        runs.append(1)
+        return app.QuoteScraper(base_url=server_url(server)).scrape_quotes()
+    app.scrape = scrape  # -> same run the app does, just against the local server
+    set_runner(JobRunner())
+    client = app.app.test_client()
+    try:
+        start = time.perf_counter()
+        expected = scrape()
+        inline = time.perf_counter() - start
+        runs.clear()
+        print(f"{PAGES} pages, {LATENCY * 1000:.0f} ms each, {CLIENTS} clients asking at once\n")
+        print(f"{'scrape inside the request':32}{inline * 1000:10.1f} ms until the answer")
+
+        answers = [None] * CLIENTS
+        took = [0.0] * CLIENTS
+
+        def ask(n):
+            clock = time.perf_counter()
+            answers[n] = client.post('/jobs')
+            took[n] = time.perf_counter() - clock
+        threads = [threading.Thread(target=ask, args=(n,)) for n in range(CLIENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ids = {answer.get_json()['id'] for answer in answers}
+        assert all(answer.status_code == 202 for answer in answers)
+        print(f"{'POST /jobs':32}{max(took) * 1000:10.1f} ms slowest answer, {len(ids)} job for {CLIENTS} posts")
+
+        job_id = ids.pop()
+        polls = []
+        while True:
+            status = client.get(f'/jobs/{job_id}').get_json()
+            polls.append((status['pages'], status['items']))
+            if status['status'] in ('done', 'failed'):
+                break
+            time.sleep(0.1)
+        print(f"{'polled progress':32}{' -> '.join(f'{p}p/{i}i' for p, i in polls[::max(1, len(polls) // 6)])}")
+        print(f"{'job finished':32}{status['seconds'] * 1000:10.1f} ms, {status['pages']} pages, "
+              f"{status['items']} items, {status['merged']} posts merged")
+        assert status['status'] == 'done', status
+        assert len(runs) == 1, f"{len(runs)} scrapes ran for one source"
+        assert get_runner().latest(app.SOURCE).result == expected, "job result differs from the inline scrape"
+    finally:
+        server.shutdown()
+        get_runner().shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import HTML_SCRAPERS, NOT_HTML, FakeResponse, load_scraper
+
+RUNS = 20
+
+
+def time_parse(parse, response, runs: int = RUNS) -> tuple:
+    result = parse(response)  # -> warm up, also compiles the selectors
+    start = time.perf_counter()
+    for _ in range(runs):
+        parse(response)
+    return (time.perf_counter() - start) / runs * 1000, result
+
+
+def main():
+    import html_parser
+    backends = list(reversed(html_parser.available_backends()))  # -> html.parser first as the baseline
+    print(f"{'scraper':24}" + ''.join(f"{backend:>14}" for backend in backends) + '   speedup  (ms per page)')
+    for name, file, class_name, method, make_page in HTML_SCRAPERS:
+        scraper = load_scraper(file, class_name)
+        response = FakeResponse(make_page())
+        timings = []
+        baseline = None
+        for backend in backends:
+            html_parser.set_backend(backend)
+            took, result = time_parse(getattr(scraper, method), response)
+            if baseline is None:
+                baseline = result
+            assert result == baseline, f"{name} gives different data with {backend}"
+            timings.append(took)
+        print(f"{name:24}" + ''.join(f"{took:14.2f}" for took in timings) + f"   {timings[0] / timings[-1]:6.1f}x")
+    print(f"skipped: {', '.join(NOT_HTML)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import ctypes
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # -> to import the scrapers
+from benchmarks.fixtures import HTML_SCRAPERS, FakeResponse, load_scraper
+
+RUNS = 20
+
+
+def peak_rss_kb() -> int:
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+
+
+def child(name: str, backend: str, partial: bool):
+    # -> one parse in a fresh process, peak rss sees the lxml tree in C as well as the soup objects
+    import html_parser
+    _, file, class_name, method, make_page = next(entry for entry in HTML_SCRAPERS if entry[0] == name)
+    html_parser.set_backend(backend)
+    html_parser.set_partial_parsing(partial)
+    scraper = load_scraper(file, class_name)
+    response = FakeResponse(make_page())
+    parse = getattr(scraper, method)
+    parse(response)  # -> imports and selectors before the baseline
+    gc.collect()
+    ctypes.CDLL(None).malloc_trim(0)  # -> hand back what building the page freed, or the parse reuses it unseen
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')  # -> resets the peak to what is in use now, linux only like the rest of the memory numbers
+    before = peak_rss_kb()
+    parse(response)
+    print(json.dumps({'peak_kb': peak_rss_kb() - before}))
+
+
+def peak_kb(name: str, backend: str, partial: bool) -> int:
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', name, backend, str(int(partial))],
+                         capture_output=True, text=True, check=True, cwd=ROOT,
+                         env={**os.environ, 'PYTHONMALLOC': 'malloc'}).stdout  # -> so malloc_trim frees soups too
+    return json.loads(out.strip().splitlines()[-1])['peak_kb']
+
+
+def measure(parse, response, runs: int = RUNS) -> tuple:
+    result = parse(response)  # -> warm up, also compiles the selectors
+    start = time.perf_counter()
+    for _ in range(runs):
+        parse(response)
+    return (time.perf_counter() - start) / runs * 1000, result
+
+
+def main():
+    import html_parser
+    default = html_parser.get_backend()
+    for backend in html_parser.available_backends():
+        html_parser.set_backend(backend)
+        html_parser.set_partial_parsing(None)
+        print(f"\n{backend}{' (default)' if backend == default else ''}, "
+              f"only= {'on' if html_parser.partial_parsing(backend) else 'off'} unless set_partial_parsing(True)")
+        print(f"{'scraper':24}{'full ms':>10}{'part ms':>10}{'faster':>8}{'full KB':>11}{'part KB':>11}{'smaller':>9}")
+        for name, file, class_name, method, make_page in HTML_SCRAPERS:
+            scraper = load_scraper(file, class_name)
+            response = FakeResponse(make_page())
+            parse = getattr(scraper, method)
+            html_parser.set_partial_parsing(False)
+            full_ms, full = measure(parse, response)
+            html_parser.set_partial_parsing(True)
+            part_ms, part = measure(parse, response)
+            assert part == full, f"{name} gives different data when only part of the page is parsed"
+            full_kb, part_kb = peak_kb(name, backend, False), peak_kb(name, backend, True)
+            print(f"{name:24}{full_ms:10.2f}{part_ms:10.2f}{full_ms / part_ms:7.1f}x"
+                  f"{full_kb:11}{part_kb:11}{full_kb / max(part_kb, 1):8.1f}x")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3], sys.argv[4] == '1')
+    else:
+        main()
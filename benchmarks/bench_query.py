@@ -0,0 +1,62 @@
+import heapq
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import book_records, sqlite_manager
+
+BOOKS = 200_000
+RUNS = 5
+
+
+def timed(read) -> tuple:
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = read()
+        took = time.perf_counter() - start
+        best = took if best is None else min(best, took)
+    return result, best
+
+
+def plan(db, query: str, params: tuple) -> str:
+    db.cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+    return '; '.join(row[-1] for row in db.cursor.fetchall())
+
+
+def main():
+    from database import select_query
+    os.chdir(tempfile.mkdtemp())  # -> the TASK modules log into the working dir
+    db = sqlite_manager('TASK_1_web_scraping.py', os.path.join(tempfile.mkdtemp(), 'books.sqlite3'))
+    db.insert_books(book_records(BOOKS), batch_size=10000)
+    print(f"{BOOKS} books, best of {RUNS}\n")
+    print(f"{'':34}{'python ms':>12}{'sql ms':>10}{'speedup':>10}")
+
+    def python_top():
+        return heapq.nsmallest(5, db.fetch_books(), key=lambda x: (-x['value_score'], x['title']))  # -> ties by title
+
+    def python_page():
+        books = [b for b in db.fetch_books() if b['category'] == 'Category 3' and 20 <= b['price'] <= 40]
+        books.sort(key=lambda x: (-x['rating'], x['title']))
+        return books[100:150]
+
+    where = {'category': 'Category 3', 'price__gte': 20, 'price__lte': 40}
+    cases = [
+        ('top 5 by value score', python_top, lambda: db.top_books(5), {}, '-value_score', 5, 0),
+        ('category + price, page 3 of 50', python_page,
+         lambda: db.page_books(3, 50, where, '-rating')['items'], where, '-rating', 50, 100)
+    ]
+    for label, python, sql, case_where, order_by, limit, offset in cases:
+        expected, python_took = timed(python)
+        got, sql_took = timed(sql)
+        assert [b['title'] for b in got] == [b['title'] for b in expected], f"{label} gave different rows"
+        print(f"{label:34}{python_took * 1000:12.1f}{sql_took * 1000:10.2f}{python_took / sql_took:9.0f}x")
+        query, params = select_query(db.conn, 'Books', db.FIELD_COLUMNS, db.KEY, case_where, order_by, limit, offset)
+        print(f"{'':4}plan: {plan(db, query, params)}")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import http.client
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.bench_templates import REPORT
+from benchmarks.fixtures import book_records
+
+ROWS = 10_000
+CLIENTS = 50
+REQUESTS = 2  # -> per client
+
+
+def as_records(books: list) -> list:
+    # -> what the TASK apps pass, rows from database.record_type instead of dicts
+    from database import record_type
+    record = record_type('Book', tuple(books[0]))
+    return [record(**book) for book in books]
+
+
+def make_app(folder: str, books: list):
+    from flask import Flask
+    from template_engine import get_template, report_response
+    app = Flask(__name__, static_folder=os.path.join(folder, 'static'),
+                template_folder=os.path.join(folder, 'templates'))
+    pages = {'page': 1, 'pages': 1}
+
+    @app.route('/file')
+    def to_file():
+        # -> what index() did before, every request writes the shared file then sends it
+        with open(os.path.join(folder, 'static', 'report.html'), 'w') as f:
+            get_template('report.html', os.path.join(folder, 'templates')).stream(books=books, pages=pages).dump(f)
+        return app.send_static_file('report.html')
+
+    @app.route('/stream')
+    def streamed():
+        return report_response('report.html', books=books, pages=pages)
+
+    records = as_records(books)
+
+    @app.route('/records')
+    def from_records():
+        return report_response('report.html', books=records, pages=pages)
+
+    return app
+
+
+def fetch(port: int, path: str, headers: dict = None) -> tuple:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    start = time.perf_counter()
+    conn.request('GET', path, headers=headers or {})
+    response = conn.getresponse()
+    first = response.read(1)
+    first_byte = time.perf_counter() - start
+    body = first + response.read()
+    total = time.perf_counter() - start
+    conn.close()
+    return first_byte, total, response.status, response.getheader('ETag'), len(body)
+
+
+def under_load(port: int, path: str, headers: dict = None) -> list:
+    results = []
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(REQUESTS):
+            try:
+                result = fetch(port, path, headers)
+            except http.client.HTTPException:
+                result = None  # -> another request rewrote the file while this one was sending it
+            with lock:
+                results.append(result)
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def percentiles(values: list) -> str:
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return f"{statistics.median(values) * 1000:9.0f}{p95 * 1000:9.0f}"
+
+
+def main():
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # -> no line per request
+    folder = tempfile.mkdtemp()
+    os.chdir(folder)
+    os.makedirs('templates')
+    os.makedirs('static')
+    with open(os.path.join('templates', 'report.html'), 'w') as f:
+        f.write(REPORT)
+    server = make_server('127.0.0.1', 0, make_app(folder, book_records(ROWS)), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    try:
+        _, _, _, etag, size = fetch(port, '/stream')  # -> warm up, and the ETag a browser would keep
+        _, _, _, record_etag, _ = fetch(port, '/records')
+        assert record_etag, "no ETag for a report made from database records"
+        print(f"{ROWS} row report ({size / 1024:.0f} KB), {CLIENTS} clients x {REQUESTS} requests\n")
+        print(f"{'':28}{'first byte ms':>18}{'total ms':>18}")
+        print(f"{'':28}{'p50':>9}{'p95':>9}{'p50':>9}{'p95':>9}")
+        for label, path, headers in (('write file, send file', '/file', None),
+                                     ('stream from memory', '/stream', None),
+                                     ('If-None-Match, 304', '/stream', {'If-None-Match': etag}),
+                                     ('records, If-None-Match', '/records', {'If-None-Match': record_etag})):
+            results = under_load(port, path, headers)
+            good = [r for r in results if r is not None]
+            statuses = {status for _, _, status, _, _ in good}
+            print(f"{label:28}{percentiles([r[0] for r in good])}{percentiles([r[1] for r in good])}"
+                  f"   status {sorted(statuses)}, {len(results) - len(good)} broken")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
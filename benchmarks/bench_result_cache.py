@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # -> to import the scrapers
+from benchmarks.bench_crawl_engine import PAGES, route
+from benchmarks.fixtures import load_module
+from benchmarks.local_server import server_url, start_server
+
+LATENCY = 0.05  # -> seconds per page, like a real site
+LOOKUPS = 1000
+CLIENTS = 50  # -> GETs landing at once right after the data went stale
+
+
+def per_lookup(cache, source: str, scrape, ttl: float = None) -> float:
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        cache.lookup(source, scrape, ttl=ttl)
+    return (time.perf_counter() - start) / LOOKUPS
+
+
+def main():
+    from background_jobs import JobRunner, get_runner, set_runner
+    from http_client import HttpClient, set_client
+    from result_cache import ResultCache
+    folder = tempfile.mkdtemp()
+    os.chdir(folder)  # -> the scrapers log into the working dir
+    set_client(HttpClient())  # -> no http cache, every page goes to the local server
+    set_runner(JobRunner())
+    server = start_server(route, latency=LATENCY)
+    app = load_module(os.path.join(ROOT, '15_scrapped_files', 'quote_scraper (1).py'))
+    crawls = []
+
+    def scrape():
+        crawls.append(1)
+        return app.QuoteScraper(base_url=server_url(server)).scrape_quotes()
+
+    try:
+        start = time.perf_counter()
+        expected = scrape()
+        crawl = time.perf_counter() - start
+        print(f"{PAGES} pages, {LATENCY * 1000:.0f} ms each\n")
+        print(f"{'re-crawl on every GET':28}{crawl * 1000:12.3f} ms per GET")
+
+        cache = ResultCache(os.path.join(folder, 'results'))
+        cold = cache.lookup(app.SOURCE, scrape)
+        assert cold.state == 'miss' and cold.result is None
+        cold.job.wait()
+        took = per_lookup(cache, app.SOURCE, scrape)
+        print(f"{'fresh hit':28}{took * 1000:12.3f} ms per GET")
+
+        crawls.clear()
+        answers = [None] * CLIENTS
+
+        def ask(n):
+            clock = time.perf_counter()
+            cached = cache.lookup(app.SOURCE, scrape, ttl=0)  # -> everything is stale
+            answers[n] = (time.perf_counter() - clock, cached)
+        threads = [threading.Thread(target=ask, args=(n,)) for n in range(CLIENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(cached.state == 'stale' and cached.result == expected for _, cached in answers)
+        for job in {cached.job for _, cached in answers}:
+            job.wait()
+        print(f"{'stale, refresh going':28}{max(took for took, _ in answers) * 1000:12.3f} ms slowest of {CLIENTS} "
+              f"GETs, {len(crawls)} crawl for all of them")
+        assert len(crawls) == 1, f"{len(crawls)} refreshes ran for one source"
+        cache.close()
+
+        crawls.clear()
+        start = time.perf_counter()
+        restarted = ResultCache(os.path.join(folder, 'results'))  # -> same folder, like the app coming back up
+        warm = restarted.lookup(app.SOURCE, scrape)
+        took = time.perf_counter() - start
+        assert warm.state == 'fresh' and warm.result == expected and not crawls
+        print(f"{'first GET after restart':28}{took * 1000:12.3f} ms, {warm.state}, age {warm.age:.2f}s, no crawl")
+        print(f"\nstats {restarted.stats()}")
+        restarted.close()
+    finally:
+        server.shutdown()
+        get_runner().shutdown()
+
+
+if __name__ == '__main__':
+    main()
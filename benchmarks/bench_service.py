@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # -> to import the scrapers
+
+
+def rss_kb() -> int:
+    # -> what the process holds right now, peak would count memory already given back
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(args: list):
+    os.chdir(tempfile.mkdtemp())  # -> apps write logs and caches into the working dir
+    if args[0] == '--app':
+        from benchmarks.fixtures import load_module
+        try:
+            load_module(args[1])
+            ok = True
+        except Exception:
+            ok = False
+        print(json.dumps({'ok': ok, 'rss_kb': rss_kb(), 'modules': len(sys.modules)}))
+        return
+    import scrape_service
+    report = {'started_rss_kb': rss_kb(), 'started_modules': len(sys.modules), 'failed': []}
+    for name in scrape_service.SOURCES:
+        try:
+            scrape_service.load_source(name)
+        except Exception:
+            report['failed'].append(name)
+    report.update({'loaded_rss_kb': rss_kb(), 'loaded_modules': len(sys.modules)})
+    print(json.dumps(report))
+
+
+def run(*args) -> tuple:
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), *args], capture_output=True, text=True,
+                         check=True, cwd=ROOT).stdout
+    return time.perf_counter() - start, json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    from scrape_service import SOURCES
+    print(f"{len(SOURCES)} sources\n")
+    print(f"{'':34}{'start s':>10}{'rss MB':>10}{'modules':>10}")
+    total_time = total_rss = 0.0
+    failed = []
+    for name, source in SOURCES.items():
+        took, report = run('--app', source['path'])
+        if not report['ok']:
+            failed.append(name)
+            continue  # -> a missing dependency stops that app from starting at all
+        total_time += took
+        total_rss += report['rss_kb']
+    started = len(SOURCES) - len(failed)
+    print(f"{f'{started} separate processes':34}{total_time:10.2f}{total_rss / 1024:10.0f}{'':>10}"
+          f"   could not start: {', '.join(failed) or 'none'}")
+
+    took, report = run('--service')
+    print(f"{'one service, nothing opened yet':34}{took:10.2f}{report['started_rss_kb'] / 1024:10.0f}"
+          f"{report['started_modules']:10}")
+    print(f"{'one service, every source loaded':34}{'':>10}{report['loaded_rss_kb'] / 1024:10.0f}"
+          f"{report['loaded_modules']:10}   could not load: {', '.join(report['failed']) or 'none'}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        child(sys.argv[1:])
+    else:
+        main()
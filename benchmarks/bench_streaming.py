@@ -0,0 +1,62 @@
+import heapq
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import sqlite_manager
+
+ROWS = 1_000_000
+
+
+def books(count: int):
+    # -> made on the fly, a million dicts up front would swamp the numbers we want to see
+    for n in range(count):
+        yield {'title': f'Book {n}', 'price': 10 + n % 50 + 0.99, 'rating': n % 5 + 1,
+               'category': f'Category {n % 20}', 'availability': f'In stock ({n % 30} available)',
+               'review_count': n % 7}
+
+
+def fetchall_dicts(db):
+    # -> how fetch_books read the table before, kept here to compare against
+    db.cursor.execute(db.SELECT_BOOKS)
+    return [{'title': row[0], 'price': row[1], 'rating': row[2], 'category': row[3], 'availability': row[4],
+             'review_count': row[5], 'value_score': row[6]} for row in db.cursor.fetchall()]
+
+
+def measure(label: str, read):
+    # -> the report reads the rows twice, top 5 for the chart then every row for the html
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = read()
+    first = None
+    for _ in rows:
+        first = time.perf_counter() - start
+        break
+    top = heapq.nlargest(5, rows, key=lambda x: x['value_score'])
+    total = sum(1 for _ in rows)
+    took = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:18}{first * 1000:12.1f}{took:10.2f}{peak / 1024 / 1024:12.1f}{total:10}")
+    return [book['title'] for book in top]
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())  # -> the TASK modules log into the working dir
+    db = sqlite_manager('TASK_1_web_scraping.py', os.path.join(tempfile.mkdtemp(), 'books.sqlite3'))
+    start = time.perf_counter()
+    db.insert_books(books(ROWS), batch_size=10000)
+    print(f"{ROWS} books written in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'':18}{'first ms':>12}{'total s':>10}{'peak MB':>12}{'rows':>10}")
+    expected = measure('fetchall + dicts', lambda: fetchall_dicts(db))
+    assert measure('fetch_books', db.fetch_books) == expected
+    assert measure('books_view', db.books_view) == expected
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
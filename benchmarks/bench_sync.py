@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import book_records, sqlite_manager
+
+BOOKS = 5000
+CHANGED = 0.03  # -> share of books whose price moved since the last scrape
+NEW = 0.02
+GONE = 0.02
+
+
+def next_scrape(books: list) -> list:
+    step_changed, step_gone = int(1 / CHANGED), int(1 / GONE)
+    scraped = []
+    for n, book in enumerate(books):
+        if n % step_gone == 1:
+            continue
+        if n % step_changed == 0:
+            book = dict(book, price=round(book['price'] + 1, 2))
+        scraped.append(book)
+    fresh = book_records(len(books) + int(len(books) * NEW))[len(books):]
+    return scraped + fresh
+
+
+def table(db) -> list:
+    db.cursor.execute(f"SELECT {', '.join(db.COLUMNS)} FROM Books ORDER BY Title")
+    return db.cursor.fetchall()
+
+
+def refresh(label: str, update) -> list:
+    path = os.path.join(tempfile.mkdtemp(), 'books.sqlite3')
+    db = sqlite_manager('TASK_1_web_scraping.py', path)
+    db.insert_books(book_records(BOOKS))
+    scraped = next_scrape(book_records(BOOKS))
+    changes = db.conn.total_changes
+    start = time.perf_counter()
+    counts = update(db, scraped)
+    took = time.perf_counter() - start
+    written = db.conn.total_changes - changes
+    print(f"{label:20}{took * 1000:10.1f}{written:10}   {counts or ''}")
+    rows = table(db)
+    db.close()
+    return rows
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())  # -> the TASK modules log into the working dir
+    print(f"{BOOKS} books, {CHANGED:.0%} changed, {NEW:.0%} new, {GONE:.0%} gone")
+    print(f"{'':20}{'ms':>10}{'rows':>10}")
+
+    def replace(db, books):
+        db.clear_table()
+        db.insert_books(books)
+
+    replaced = refresh('clear and reinsert', replace)
+    synced = refresh('sync', lambda db, books: db.sync_books(books))
+    assert replaced == synced, "sync left the table different from a full reinsert"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import book_records
+
+ROWS = 1000
+RUNS = 50
+
+# -> about what a report page looks like, a table of every book with a few filters and a macro
+REPORT = """<!DOCTYPE html>
+<html><head><title>Book report</title></head><body>
+{% macro stars(rating) %}{% for _ in range(rating) %}*{% endfor %}{% endmacro %}
+<h1>{{ books|length }} books</h1>
+<form method="get"><select name="category">
+{% for category in books|map(attribute='category')|unique|sort %}<option>{{ category }}</option>{% endfor %}
+</select></form>
+<table>
+<tr><th>Title</th><th>Price</th><th>Rating</th><th>Category</th><th>Availability</th><th>Reviews</th><th>Value</th></tr>
+{% for book in books %}
+<tr class="{{ loop.cycle('odd', 'even') }}">
+  <td>{{ book.title|title }}</td>
+  <td>{{ '%.2f'|format(book.price) }}</td>
+  <td>{{ stars(book.rating) }}</td>
+  <td>{{ book.category|e }}</td>
+  <td>{% if 'In stock' in book.availability %}{{ book.availability }}{% else %}sold out{% endif %}</td>
+  <td>{{ book.review_count }}</td>
+  <td>{{ '%.3f'|format(book.rating / book.price if book.price else 0) }}</td>
+</tr>
+{% endfor %}
+</table>
+{% if pages %}<p>Page {{ pages.page }} of {{ pages.pages }}</p>{% endif %}
+</body></html>
+"""
+
+
+def per_request(render) -> float:
+    render()  # -> first call is startup, not a request
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        html = render()
+    took = (time.perf_counter() - start) / RUNS
+    assert html.count('<tr class=') == ROWS
+    return took
+
+
+def main():
+    from jinja2 import Environment, FileSystemLoader
+    from template_engine import make_environment, precompile
+    folder = tempfile.mkdtemp()
+    os.chdir(folder)
+    os.makedirs('templates')
+    with open(os.path.join('templates', 'report.html'), 'w') as f:
+        f.write(REPORT)
+    books = book_records(ROWS)
+    pages = {'page': 1, 'pages': 1}
+    print(f"{ROWS} row report, {RUNS} requests\n")
+    print(f"{'':36}{'ms per request':>16}")
+
+    def fresh_environment():
+        env = Environment(loader=FileSystemLoader('templates'))  # -> what every index() used to do
+        return env.get_template('report.html').render(books=books, pages=pages)
+    before = per_request(fresh_environment)
+    print(f"{'new Environment per request':36}{before * 1000:16.2f}")
+
+    for label, auto_reload in (('shared, dev mode (auto reload)', True), ('shared, compiled once', False)):
+        env = make_environment(bytecode_dir='bytecode', auto_reload=auto_reload)
+        precompile(env)
+        took = per_request(lambda: env.get_template('report.html').render(books=books, pages=pages))
+        print(f"{label:36}{took * 1000:16.2f}   {before / took:.2f}x")
+
+    print(f"\n{'startup, compile report.html':36}{'ms':>16}")
+    for label, bytecode_dir in (('no bytecode on disk', 'cold'), ('bytecode from last run', 'bytecode')):
+        start = time.perf_counter()
+        precompile(make_environment(bytecode_dir=bytecode_dir))
+        print(f"{label:36}{(time.perf_counter() - start) * 1000:16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+
+COINS = 20
+DAYS = 14
+EVERY = 300  # -> one scrape every 5 minutes
+RUNS = 5
+
+
+def snapshots(start: float):
+    for step in range(DAYS * 86400 // EVERY):
+        ts = start + step * EVERY
+        yield ts, [{'name': f'Coin {n}', 'price': round((n + 1) * 100 * (1 + 0.05 * math.sin(step / (40 + n))), 2),
+                    'change_24h': round(math.sin(step / 50) * 5, 2), 'change_7d': round(math.cos(step / 90) * 9, 2),
+                    'market_cap': (COINS - n) * 10 ** 9 + step * 1000} for n in range(COINS)]
+
+
+def best_of(run) -> tuple:
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = run()
+        took = time.perf_counter() - start
+        best = took if best is None else min(best, took)
+    return result, best
+
+
+def candles_from(rows, width: int) -> list:
+    # -> what a chart has to do without rollups, bucket every raw price in python
+    candles = {}
+    for ts, price in rows:
+        bucket = ts - ts % width
+        if bucket not in candles:
+            candles[bucket] = [price, price, price, price, 0]
+        candle = candles[bucket]
+        candle[1] = max(candle[1], price)
+        candle[2] = min(candle[2], price)
+        candle[3] = price
+        candle[4] += 1
+    return [candles[bucket] for bucket in sorted(candles)]
+
+
+def main():
+    from timeseries_store import TimeSeriesStore
+    folder = tempfile.mkdtemp()
+    os.chdir(folder)  # -> the store logs into the working dir
+    store = TimeSeriesStore(os.path.join(folder, 'history.sqlite3'))
+    raw = sqlite3.connect(os.path.join(folder, 'raw.sqlite3'))
+    raw.execute("CREATE TABLE prices (coin TEXT, ts INTEGER, price REAL, change_24h REAL, change_7d REAL, "
+                "market_cap INTEGER)")
+    raw.execute("CREATE INDEX idx_prices_coin_ts ON prices (coin, ts)")
+
+    start = 1_700_000_000 - 1_700_000_000 % 86400
+    took_store = took_raw = 0.0
+    count = 0
+    for ts, cryptos in snapshots(start):
+        clock = time.perf_counter()
+        store.append_snapshot(cryptos, ts)
+        took_store += time.perf_counter() - clock
+        clock = time.perf_counter()
+        raw.executemany("INSERT INTO prices VALUES (?, ?, ?, ?, ?, ?)",
+                        [(c['name'], int(ts * 1000), c['price'], c['change_24h'], c['change_7d'], c['market_cap'])
+                         for c in cryptos])
+        raw.commit()
+        took_raw += time.perf_counter() - clock
+        count += 1
+
+    points = count * COINS
+    print(f"{COINS} coins, {DAYS} days every {EVERY}s, {points} points\n")
+    print(f"{'':28}{'append us/snap':>16}{'file KB':>10}")
+    print(f"{'raw rows':28}{took_raw / count * 1e6:16.0f}{os.path.getsize(os.path.join(folder, 'raw.sqlite3')) / 1024:10.0f}")
+    print(f"{'chunks + rollups':28}{took_store / count * 1e6:16.0f}"
+          f"{os.path.getsize(os.path.join(folder, 'history.sqlite3')) / 1024:10.0f}")
+    stats = store.stats()
+    print(f"chunk data {stats['bytes'] / 1024:.0f} KB, {stats['bytes_per_point']} bytes per point (5 values + time)\n")
+
+    end = start + DAYS * 86400
+    since = end - 7 * 86400
+    print(f"{'7 day chart of Coin 3':28}{'ms':>10}{'candles':>10}")
+    for resolution, width in (('1h', 3600), ('1d', 86400)):
+        def scan():
+            rows = raw.execute("SELECT ts, price FROM prices WHERE coin = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                               ('Coin 3', int(since * 1000), int(end * 1000))).fetchall()
+            return candles_from(rows, width * 1000)
+
+        def decoded():
+            rows = [(int(p['ts'] * 1000), p['price']) for p in store.points('Coin 3', since, end)]
+            return candles_from(rows, width * 1000)
+
+        expected, took = best_of(scan)
+        print(f"{'  raw scan ' + resolution:28}{took * 1000:10.2f}{len(expected):10}")
+        from_chunks, took = best_of(decoded)
+        print(f"{'  chunk decode ' + resolution:28}{took * 1000:10.2f}{len(from_chunks):10}")
+        candles, took = best_of(lambda: store.ohlc('Coin 3', resolution, since, end))
+        print(f"{'  rollups ' + resolution:28}{took * 1000:10.2f}{len(candles):10}")
+        got = [[c['open'], c['high'], c['low'], c['close'], c['count']] for c in candles]
+        assert got == expected == from_chunks, f"{resolution} candles differ from the raw rows"
+    store.close()
+    raw.close()
+
+
+if __name__ == '__main__':
+    main()
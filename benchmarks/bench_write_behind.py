@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # -> to import the scrapers
+from benchmarks.fixtures import ROOT, book_records, load_module, sqlite_manager
+
+BOOKS = 2000
+SCRAPE_DELAY = 0.001  # -> seconds per book, the detail page download
+ROUND_TRIP = 0.005  # -> seconds per statement sent to the database
+ROW_COST = 0.0005  # -> seconds per row the database writes
+
+
+class SlowCursor:
+    # -> sqlite answers in microseconds, this makes it cost about what a remote sql server does
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        time.sleep(ROUND_TRIP)
+        return self._cursor.execute(query, params)
+
+    def executemany(self, query, rows):
+        rows = list(rows)
+        time.sleep(ROUND_TRIP + ROW_COST * len(rows))
+        return self._cursor.executemany(query, rows)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SlowConnection:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self):
+        return SlowCursor(self._conn.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def scrape(books: list, on_item=None) -> list:
+    found = []
+    for book in books:
+        time.sleep(SCRAPE_DELAY)
+        found.append(book)
+        if on_item:
+            on_item(book)
+    return found
+
+
+def database(label: str, books: list):
+    from db_pool import ConnectionPool
+    path = os.path.join(tempfile.mkdtemp(), f'{label}.sqlite3')
+    db = sqlite_manager('TASK_1_web_scraping.py', path)
+    db.insert_books(books[::2] + [dict(books[1], title='Gone book')])  # -> half known, one no longer listed
+    db.close()
+    module = load_module(os.path.join(ROOT, 'TASK_1_web_scraping.py'))
+    return module.DatabaseManager(pool=ConnectionPool(lambda: SlowConnection(path)))  # -> table is there already
+
+
+def table(db) -> list:
+    db.cursor.execute(f"SELECT {', '.join(db.COLUMNS)} FROM Books ORDER BY Title")
+    return db.cursor.fetchall()
+
+
+def main():
+    from write_behind import WriteBehindQueue
+    os.chdir(tempfile.mkdtemp())  # -> the TASK modules log into the working dir
+    books = book_records(BOOKS)
+    print(f"{BOOKS} books, {SCRAPE_DELAY * 1000:.1f} ms each to scrape, "
+          f"{ROUND_TRIP * 1000:.0f} ms per statement + {ROW_COST * 1000:.1f} ms per row to write\n")
+    print(f"{'':24}{'scrape s':>10}{'total s':>10}")
+
+    db = database('sequential', books)
+    start = time.perf_counter()
+    scraped = scrape(books)
+    scraped_at = time.perf_counter() - start
+    counts = db.sync_books(scraped)
+    took = time.perf_counter() - start
+    print(f"{'scrape then sync':24}{scraped_at:10.2f}{took:10.2f}   {counts}")
+    expected = table(db)
+    db.close()
+
+    db = database('write_behind', books)
+    start = time.perf_counter()
+    sync = db.book_sync()
+    with WriteBehindQueue(sync.write_batch, name='books') as writer:
+        scrape(books, on_item=writer.put)
+        scraped_at = time.perf_counter() - start
+    counts = sync.finish()
+    took = time.perf_counter() - start
+    print(f"{'write-behind':24}{scraped_at:10.2f}{took:10.2f}   {counts}")
+    print(f"{'':24}queue {writer.stats()}")
+    assert table(db) == expected, "write-behind left the table different from a plain sync"
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def path_url(url: str) -> str:
+    # -> path and query exactly as requests puts them on the wire, so replay finds the page again
+    from requests.models import PreparedRequest
+    request = PreparedRequest()
+    request.prepare_url(url, None)
+    return request.path_url
+
+
+class Corpus:
+    def __init__(self, name: str, directory: str = CORPUS_DIR):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self.pages = {}  # -> request path -> file, status and content type
+        self.meta = {}
+        self._lock = threading.Lock()
+        manifest = os.path.join(self.path, 'manifest.json')
+        if os.path.exists(manifest):
+            with open(manifest, encoding='utf-8') as f:
+                data = json.load(f)
+            self.pages = data['pages']
+            self.meta = data['meta']
+
+    def exists(self) -> bool:
+        return bool(self.pages)
+
+    def add(self, path: str, status: int, content_type: str, body: bytes):
+        with self._lock:
+            name = self.pages[path]['file'] if path in self.pages else f"{len(self.pages):04d}.body"
+            self.pages[path] = {'file': name, 'status': status, 'content_type': content_type, 'bytes': len(body)}
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, name), 'wb') as f:
+            f.write(body)
+
+    def save(self, origin: str, synthetic: bool = False):
+        self.meta = {'origin': origin, 'synthetic': synthetic, 'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({'meta': self.meta, 'pages': self.pages}, f, indent=2, sort_keys=True)
+
+    def body(self, path: str) -> bytes:
+        with open(os.path.join(self.path, self.pages[path]['file']), 'rb') as f:
+            return f.read()
+
+    def digest(self) -> str:
+        # -> results from two runs are only comparable when this matches
+        sha = hashlib.sha256()
+        for path in sorted(self.pages):
+            sha.update(path.encode('utf-8'))
+            sha.update(self.body(path))
+        return sha.hexdigest()[:16]
+
+    def route(self):
+        bodies = {path: self.body(path) for path in self.pages}  # -> read once, replay from memory
+
+        def replay(path: str):
+            if path not in self.pages:
+                return None
+            page = self.pages[path]
+            return page['status'], page['content_type'], bodies[path]
+        return replay
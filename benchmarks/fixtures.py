@@ -0,0 +1,248 @@
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeResponse:
+    # -> enough of requests.Response for the parse_* methods
+    def __init__(self, text: str, url: str = 'http://fixture.local/'):
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.url = url
+        self.status_code = 200
+        self.from_cache = False
+
+
+def load_module(path: str, name: str = None):
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)  # -> scrapers import the shared modules from the repo root
+    name = name or os.path.splitext(os.path.basename(path))[0].replace(' ', '_').replace('(', '').replace(')', '')
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def page(body: str, title: str = 'Fixture') -> str:
+    # -> real pages carry a lot of menus and scripts around the part we want
+    nav = ''.join(f'<li><a href="/section/{n}">Section {n}</a></li>' for n in range(150))
+    script = 'var data = [' + ','.join(str(n) for n in range(3000)) + '];'
+    footer = ''.join(f'<p class="footer-note">Footer note {n} with some words in it.</p>' for n in range(60))
+    return (f'<!DOCTYPE html><html><head><title>{title}</title><script>{script}</script></head><body>'
+            f'<header><nav><ul>{nav}</ul></nav></header><main>{body}</main><footer>{footer}</footer></body></html>')
+
+
+def book_listing(count: int = 20) -> str:
+    items = ''.join(
+        f'<li><article class="product_pod"><div class="image_container"><a href="book_{n}/index.html">'
+        f'<img src="cover_{n}.jpg" alt="Book {n}"></a></div><p class="star-rating {("One", "Two", "Three", "Four", "Five")[n % 5]}"></p>'
+        f'<h3><a href="book_{n}/index.html" title="Book {n}">Book {n}</a></h3>'
+        f'<div class="product_price"><p class="price_color">£{10 + n}.99</p><p class="instock availability">In stock</p></div>'
+        f'</article></li>' for n in range(count))
+    return page(f'<ol class="row">{items}</ol>', 'Books')
+
+
+def book_detail(n: int = 1) -> str:
+    return page(f'<ul class="breadcrumb"><li><a href="/">Home</a></li><li><a href="/books">Books</a></li>'
+                f'<li><a href="/category/{n % 10}">Category {n % 10}</a></li><li class="active">Book {n}</li></ul>'
+                f'<article class="product_page"><h1>Book {n}</h1><p class="price_color">£{n}.99</p>'
+                f'<p class="instock availability">In stock ({n} available)</p>'
+                f'<p>{"A long description of the book. " * 40}</p><p>{n} reviews</p><p>end</p></article>', 'Book')
+
+
+def quotes(count: int = 10) -> str:
+    items = ''.join(
+        f'<div class="quote"><span class="text">"Quote number {n} about life."</span>'
+        f'<span>by <small class="author">Author {n % 7}</small></span>'
+        f'<div class="tags"><a class="tag" href="/tag/a{n % 5}">a{n % 5}</a><a class="tag" href="/tag/life">life</a></div></div>'
+        for n in range(count))
+    return page(items, 'Quotes')
+
+
+def olx(count: int = 40) -> str:
+    items = ''.join(
+        f'<div class="css-1sw7q4x"><a href="/ad/{n}"><h6>Phone {n}</h6></a>'
+        f'<p data-testid="ad-price">{(n + 1) * 150000} sum</p>'
+        f'<p data-testid="location-date">City {n % 6} - Today 12:{n % 60:02d}</p></div>' for n in range(count))
+    return page(items, 'OLX')
+
+
+def flipkart(count: int = 24) -> str:
+    items = ''.join(
+        f'<div class="_1AtVbE"><a href="/p/{n}"><div class="_4rR01T">Mobile {n}</div>'
+        f'<div class="_3LWZlK">{3 + (n % 20) / 10:.1f}</div><div class="_30jeq3">₹{(n + 1) * 2500:,}</div></a></div>'
+        for n in range(count))
+    return page(items, 'Flipkart')
+
+
+def imdb(count: int = 250) -> str:
+    items = ''.join(
+        f'<li class="ipc-metadata-list-summary-item"><div><h3 class="ipc-title__text">{n + 1}. Movie {n}</h3>'
+        f'<span class="sc-b189961a-8">{1930 + n % 90}</span>'
+        f'<span class="ipc-rating-star--imdb">{8 + (n % 10) / 10:.1f}\xa0(1M)</span></div></li>' for n in range(count))
+    return page(f'<ul class="ipc-metadata-list">{items}</ul>', 'IMDb')
+
+
+def wiki(sections: int = 40) -> str:
+    body = ''
+    for n in range(sections):
+        body += f'<h2><span class="mw-headline">Section {n}</span></h2>'
+        body += ''.join(f'<p>Paragraph {p} of section {n}. {"Some article text. " * 30}</p>' for p in range(5))
+        body += f'<figure><img src="//upload.example.org/img_{n}.png"></figure>'
+    infobox = ''.join(f'<tr><th>Field {n}</th><td>Value {n}</td></tr>' for n in range(30))
+    return page(f'<div id="mw-content-text"><div class="mw-parser-output"><table class="infobox">{infobox}</table>'
+                f'{body}</div></div>', 'Wikipedia')
+
+
+def coinmarketcap(count: int = 100) -> str:
+    rows = ''.join(
+        f'<tr><td>{n + 1}</td><td><p class="sc-71024e3e-0 ehyYKa">Coin {n}</p></td>'
+        f'<td><div class="sc-b3fc6b7-0 dzgUIj">${(n + 1) * 12.5:,.2f}</div>'
+        f'<div class="sc-b3fc6db-0"><a href="/c/{n}"><span>${(n + 1) * 12.5:,.2f}</span></a></div></td>'
+        f'<td><span class="sc-a59753b0-0 sc-6a540de-0">{n % 7 - 3}.{n % 10}%</span></td>'
+        f'<td><span class="sc-a59753b0-0">{n % 5 - 2}.{n % 10}%</span></td>'
+        f'<td><span class="sc-11478c5b-1">${(n + 1) * 1000000:,}</span></td></tr>' for n in range(count))
+    return page(f'<table class="cmc-table"><thead><tr><th>#</th></tr></thead><tbody>{rows}</tbody></table>', 'CMC')
+
+
+def goodreads(count: int = 100) -> str:
+    rows = ''.join(
+        f'<tr itemtype="http://schema.org/Book"><td><a class="bookTitle" href="/b/{n}"><span>Book {n}</span></a>'
+        f'<a class="authorName" href="/a/{n}"><span>Author {n}</span></a>'
+        f'<span class="minirating">4.{n % 10} avg rating — {n * 1000} ratings</span></td></tr>' for n in range(count))
+    return page(f'<table class="tableList">{rows}</table>', 'Goodreads')
+
+
+def indeed(count: int = 15) -> str:
+    items = ''.join(
+        f'<div class="jobsearch-SerpJobCard"><h2 class="title"><a href="/j/{n}">Developer {n}</a></h2>'
+        f'<div class="recJobLoc" data-rc-loc="City {n % 4}"></div><span class="salaryText">${50 + n}k</span>'
+        f'<div class="summary">{"Job summary text. " * 10}</div></div>' for n in range(count))
+    return page(items, 'Indeed')
+
+
+def reddit(count: int = 25) -> str:
+    items = ''.join(
+        f'<div class="Post"><h3>Post {n}</h3><div data-test-id="post-vote-count">{n}.{n % 10}k</div>'
+        f'<time datetime="2025-04-{n % 28 + 1:02d}">today</time></div>' for n in range(count))
+    return page(items, 'Reddit')
+
+
+def weather() -> str:
+    details = ''.join(f'<div class="WeatherDetailsListItem--wxData--kK81o"><span>{n * 10}</span></div>'
+                      for n in range(8))
+    return page('<h1 class="CurrentConditions--location--1YWj_">New York, NY</h1>'
+                f'<span class="CurrentConditions--tempValue--MHmYY">21°</span>{details}', 'Weather')
+
+
+def amazon(count: int = 48) -> str:
+    items = ''.join(
+        f'<div class="s-result-item"><h2><a href="/dp/{n}"><span>Phone {n}</span></a></h2>'
+        f'<span class="a-price"><span class="a-price-whole">{100 + n * 10}</span>'
+        f'<span class="a-price-fraction">99</span></span>'
+        f'<span class="a-icon-alt">{3 + (n % 20) / 10:.1f} out of 5 stars</span></div>' for n in range(count))
+    return page(items, 'Amazon')
+
+
+def linkedin(count: int = 25, card: str = 'base-card') -> str:
+    items = ''.join(
+        f'<div class="{card} job-search-card"><h3 class="base-search-card__title">Python Developer {n}</h3>'
+        f'<h4 class="base-search-card__subtitle">Company {n % 9}</h4>'
+        f'<span class="job-search-card__location">City {n % 5}</span>'
+        f'<time class="job-search-card__listdate">{n % 7 + 1} days ago</time>'
+        f'<div class="job-search-card__snippet">{"Work with python. " * 5}</div></div>' for n in range(count))
+    return page(items, 'LinkedIn')
+
+
+def rss(count: int = 30) -> str:
+    items = ''.join(
+        f'<item><title>Headline {n}</title><link>https://news.example.org/{n}</link>'
+        f'<pubDate>Tue, 29 Apr 2025 {n % 24:02d}:00:00 GMT</pubDate>'
+        f'<source url="https://publisher{n % 4}.example.org">Publisher {n % 4}</source></item>' for n in range(count))
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>News</title>{items}</channel></rss>'
+
+
+# -> (name, file, class, parse method, page maker) for every scraper that parses html
+HTML_SCRAPERS = [
+    ('task1_books_listing', 'TASK_1_web_scraping.py', 'BookScraper', 'parse_listing', book_listing),
+    ('task1_books_detail', 'TASK_1_web_scraping.py', 'BookScraper', 'parse_details', book_detail),
+    ('task3_cryptos', 'TASK_3_web_scraping.py', 'CryptoScraper', 'parse_page', coinmarketcap),
+    ('book_scraper_listing', '15_scrapped_files/book_scraper.py', 'BookScraper', 'parse_listing', book_listing),
+    ('book_scraper_detail', '15_scrapped_files/book_scraper.py', 'BookScraper', 'parse_details', book_detail),
+    ('quote_scraper', '15_scrapped_files/quote_scraper (1).py', 'QuoteScraper', 'parse_page', quotes),
+    ('olx_scraper', '15_scrapped_files/olx_scraper.py', 'OLXScraper', 'parse_page', olx),
+    ('flipkart_scraper', '15_scrapped_files/flipkart_scraper.py', 'FlipkartScraper', 'parse_page', flipkart),
+    ('imdb_scraper', '15_scrapped_files/imdb_scraper.py', 'IMDBScraper', 'parse_page', imdb),
+    ('wiki_scraper', '15_scrapped_files/wiki_scraper.py', 'WikiScraper', 'parse_article', wiki),
+    ('coinmarketcap_scraper', '15_scrapped_files/coinmarketcap_scraper.py', 'CoinMarketCapScraper', 'parse_page',
+     coinmarketcap),
+    ('goodreads_scraper', '15_scrapped_files/goodreads_scraper.py', 'GoodreadsScraper', 'parse_page', goodreads),
+    ('indeed_scraper', '15_scrapped_files/indeed_scraper.py', 'IndeedScraper', 'parse_page', indeed),
+    ('reddit_scraper', '15_scrapped_files/reddit_scraper.py', 'RedditScraper', 'parse_page', reddit),
+    ('weather_scraper', '15_scrapped_files/weather_scraper.py', 'WeatherScraper', 'parse_page', weather),
+]
+
+# -> these drive a browser, read rss or make up data, so there is no html for us to parse
+NOT_HTML = ['amazon_scraper (selenium)', 'linkedin_scraper (selenium)', 'TASK_2 JobScraper (selenium)',
+            'googlenews_scraper (feedparser)', 'twitter_scraper (static data)']
+
+
+# -> same tables as on sql server, sqlite stands in when there is no server around
+# -> the key indexes let sync find a row without reading the whole table
+# -> computed columns like Books.ValueScore are left out, ensure_indexes adds them the way the apps do
+SQLITE_SCHEMAS = {
+    'TASK_1_web_scraping.py': ["CREATE TABLE IF NOT EXISTS Books (Title TEXT, Price REAL, Rating INTEGER, "
+                               "Category TEXT, Availability TEXT, ReviewCount INTEGER)",
+                               "CREATE INDEX IF NOT EXISTS IX_Books_Title ON Books (Title)"],
+    'TASK_2_web_scraping.py': ["CREATE TABLE IF NOT EXISTS Jobs (JobTitle TEXT, Company TEXT, Location TEXT, "
+                               "PostDate TEXT, Description TEXT)",
+                               "CREATE INDEX IF NOT EXISTS IX_Jobs_JobTitle_Company ON Jobs (JobTitle, Company)"],
+    'TASK_3_web_scraping.py': ["CREATE TABLE IF NOT EXISTS Cryptocurrencies (Name TEXT, Price REAL, Change24h REAL, "
+                               "Change7d REAL, MarketCap INTEGER)",
+                               "CREATE INDEX IF NOT EXISTS IX_Cryptocurrencies_Name ON Cryptocurrencies (Name)"],
+}
+
+
+def sqlite_pool(path: str, **kwargs):
+    import sqlite3
+    from db_pool import ConnectionPool
+    return ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False), name=os.path.basename(path), **kwargs)
+
+
+def sqlite_manager(file: str, path: str, pool=None):
+    module = load_module(os.path.join(ROOT, file))
+    db = module.DatabaseManager(pool=pool or sqlite_pool(path))  # -> same manager, sqlite connections
+    for statement in SQLITE_SCHEMAS[file]:
+        db.cursor.execute(statement)
+    db.conn.commit()
+    db.ensure_indexes()  # -> the same computed columns and indexes the apps make on sql server
+    return db
+
+
+def book_records(count: int) -> list:
+    return [{'title': f'Book {n}', 'price': 10 + n % 50 + 0.99, 'rating': n % 5 + 1, 'category': f'Category {n % 20}',
+             'availability': f'In stock ({n % 30} available)', 'review_count': n % 7} for n in range(count)]
+
+
+def job_records(count: int) -> list:
+    return [{'job_title': f'Python Developer {n}', 'company': f'Company {n % 40}', 'location': f'City {n % 9}',
+             'post_date': f'{n % 30 + 1} days ago', 'description': 'Work with python. ' * 5} for n in range(count)]
+
+
+def crypto_records(count: int) -> list:
+    return [{'name': f'Coin {n}', 'price': (n + 1) * 1.5, 'change_24h': n % 7 - 3.5, 'change_7d': n % 11 - 5.5,
+             'market_cap': (count - n) * 1000000} for n in range(count)]
+
+
+def load_scraper(file: str, class_name: str):
+    module = load_module(os.path.join(ROOT, file))
+    scraper_cls = getattr(module, class_name)
+    scraper = scraper_cls.__new__(scraper_cls)  # -> skip __init__, some start browsers or need args
+    scraper.base_url = 'http://fixture.local'
+    scraper.url = 'http://fixture.local/'
+    return scraper
@@ -0,0 +1,48 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CHUNK = 16 * 1024
+
+
+def start_server(route, latency: float = 0.0, bandwidth: int = None) -> ThreadingHTTPServer:
+    # -> route(path) gives back the html body for a path, a (status, content type, body) tuple, or None for 404
+    # -> bandwidth is bytes per second for each response, None sends as fast as the socket takes it
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # -> keep connections open like a real site
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            answer = route(self.path)
+            if answer is None:
+                self.send_error(404)
+                return
+            status, content_type, body = answer if isinstance(answer, tuple) else (200, 'text/html; charset=utf-8',
+                                                                                   answer)
+            data = body.encode('utf-8') if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            if not bandwidth:
+                self.wfile.write(data)
+                return
+            for start in range(0, len(data), CHUNK):
+                chunk = data[start:start + CHUNK]
+                self.wfile.write(chunk)
+                time.sleep(len(chunk) / bandwidth)  # -> slow link, the page arrives bit by bit
+
+        def log_message(self, format, *args):
+            pass  # -> keep benchmark output clean
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_url(server: ThreadingHTTPServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
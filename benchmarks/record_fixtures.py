@@ -0,0 +1,115 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # -> to import the scrapers
+from benchmarks.corpus import Corpus, path_url
+from benchmarks.fixtures import load_module
+from benchmarks.local_server import server_url, start_server
+from benchmarks.sources import SOURCES, point_at
+
+
+def recording_client(corpus: Corpus):
+    from http_client import HttpClient
+    from rate_limiter import RateLimiter
+
+    class RecordingClient(HttpClient):
+        def get(self, url: str, **kwargs):
+            response = super().get(url, **kwargs)
+            corpus.add(path_url(url), response.status_code,
+                       response.headers.get('Content-Type', 'text/html; charset=utf-8'), response.content)
+            return response
+
+    return RecordingClient(rate_limiter=RateLimiter())  # -> no http cache so every page really comes from the site
+
+
+def record_browser(scraper, corpus: Corpus):
+    # -> keep what chrome shows after its scripts and scrolling ran, taken just before the browser closes
+    driver = scraper.driver
+    opened = {}
+    get, quit = driver.get, driver.quit
+
+    def recording_get(url):
+        get(url)
+        opened['url'] = url
+
+    def recording_quit():
+        if 'url' in opened:
+            corpus.add(path_url(opened['url']), 200, 'text/html; charset=utf-8', driver.page_source.encode('utf-8'))
+        quit()
+
+    driver.get, driver.quit = recording_get, recording_quit
+
+
+def start_url(source: dict) -> str:
+    return next(value for value in {**source['init'], **source['args']}.values()
+                if isinstance(value, str) and value.startswith('http'))
+
+
+def record(name: str, synthetic: bool = False) -> Corpus:
+    from http_client import set_client
+    source = SOURCES[name]
+    shutil.rmtree(Corpus(name).path, ignore_errors=True)  # -> never mix pages from two recordings
+    corpus = Corpus(name)
+
+    if synthetic and source['kind'] != 'requests':
+        # -> browser and rss scrapers load one page, write it straight in so chrome is not needed here
+        answer = source['synthetic'](path_url(start_url(source)))
+        status, content_type, body = answer if isinstance(answer, tuple) else (200, 'text/html; charset=utf-8', answer)
+        corpus.add(path_url(start_url(source)), status, content_type, body.encode('utf-8'))
+        corpus.save(start_url(source), synthetic=True)
+        return corpus
+
+    server = start_server(source['synthetic']) if synthetic else None
+    init, args = source['init'], source['args']
+    if server:
+        init, args = point_at(init, server_url(server)), point_at(args, server_url(server))
+    client = recording_client(corpus)
+    old = set_client(client)
+    try:
+        if source['kind'] == 'feedparser':
+            client.get(init['url'])  # -> feedparser fetches by itself, so get the feed the same way once
+        else:
+            module = load_module(os.path.join(ROOT, source['file']))
+            scraper = getattr(module, source['class'])(**init)
+            if source['kind'] == 'selenium':
+                record_browser(scraper, corpus)
+            getattr(scraper, source['scrape'])(**args)
+            if source.get('close'):
+                getattr(scraper, source['close'])()
+    finally:
+        set_client(old)
+        client.close()
+        if server:
+            server.shutdown()
+    corpus.save(start_url(source), synthetic=synthetic)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the pages every scraper reads into benchmarks/corpus")
+    parser.add_argument('sources', nargs='*', help=f"default all: {', '.join(SOURCES)}")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="record from made up pages on a local server instead of the live sites")
+    options = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())  # -> scrapers write their log files into the working dir
+    for name in options.sources or SOURCES:
+        if SOURCES[name]['kind'] == 'static':
+            print(f"{name:24} nothing to record, it makes up its data")
+            continue
+        try:
+            corpus = record(name, synthetic=options.synthetic)
+        except Exception as e:
+            print(f"{name:24} failed: {e}")
+            continue
+        size = sum(page['bytes'] for page in corpus.pages.values())
+        statuses = sorted({page['status'] for page in corpus.pages.values()})
+        print(f"{name:24} {len(corpus.pages):5} pages {size / 1024:9.0f} KB  status {statuses}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # -> to import the scrapers
+from benchmarks.corpus import Corpus
+from benchmarks.sources import SOURCES, count_items, point_at
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+STARTUP_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+METRICS = ('pages_per_sec', 'items_per_sec', 'parse_ms_per_page', 'peak_rss_kb')
+
+
+def peak_rss_kb() -> int:
+    try:
+        import resource
+    except ImportError:  # -> windows has no resource module
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset // 1024
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # -> mac reports bytes, linux kilobytes
+
+
+def run_child(name: str, origin: str, backend: str = None) -> dict:
+    # -> runs in its own process so peak rss belongs to this scraper only
+    import html_parser
+    from benchmarks.fixtures import load_module
+    source = SOURCES[name]
+    if backend:
+        html_parser.set_backend(backend)
+    html_parser.parse_html('<html></html>')  # -> import the parser before the clock starts, every process pays it once
+    if source['kind'] == 'requests':
+        from http_client import HttpClient, set_client
+        from rate_limiter import RateLimiter
+        set_client(HttpClient(rate_limiter=RateLimiter()))  # -> no http cache, every page goes to the replay server
+
+    module = load_module(os.path.join(ROOT, source['file']))
+    init = point_at(source['init'], origin) if origin else source['init']
+    args = point_at(source['args'], origin) if origin else source['args']
+    scraper = getattr(module, source['class'])(**init)
+
+    parse_time = [0.0, 0]
+    parse_lock = threading.Lock()
+
+    def timed(parse):
+        def run(*parse_args, **parse_kwargs):
+            start = time.perf_counter()
+            try:
+                return parse(*parse_args, **parse_kwargs)
+            finally:
+                with parse_lock:
+                    parse_time[0] += time.perf_counter() - start
+                    parse_time[1] += 1
+        return run
+
+    for method in source['parse']:
+        setattr(scraper, method, timed(getattr(scraper, method)))  # -> scrapers look the method up on self
+
+    start = time.perf_counter()
+    result = getattr(scraper, source['scrape'])(**args)
+    seconds = time.perf_counter() - start
+    if source.get('close'):
+        getattr(scraper, source['close'])()
+    return {
+        'seconds': seconds,
+        'items': count_items(result),
+        'parsed_pages': parse_time[1],
+        'parse_ms_per_page': parse_time[0] / parse_time[1] * 1000 if parse_time[1] else None,
+        'peak_rss_kb': peak_rss_kb()
+    }
+
+
+def run_source(name: str, options) -> dict:
+    from benchmarks.local_server import server_url, start_server
+    source = SOURCES[name]
+    corpus = Corpus(name)
+    if source['kind'] != 'static' and not corpus.exists():
+        return {'skipped': 'no corpus, run benchmarks/record_fixtures.py first'}
+
+    served = [0]
+    server = None
+    if source['kind'] != 'static':
+        replay = corpus.route()
+
+        def counting(path):
+            served[0] += 1
+            return replay(path)
+        server = start_server(counting, latency=options.latency, bandwidth=options.bandwidth)
+
+    runs = []
+    try:
+        for _ in range(options.runs):
+            served[0] = 0
+            command = [sys.executable, os.path.abspath(__file__), '--child', name]
+            if server:
+                command += ['--origin', server_url(server)]
+            if options.backend:
+                command += ['--backend', options.backend]
+            done = subprocess.run(command, capture_output=True, text=True, cwd=tempfile.gettempdir())
+            if done.returncode != 0:
+                error = (done.stderr.strip().splitlines() or ['exit code %d' % done.returncode])[-1]
+                return {'error': error}
+            run = json.loads(done.stdout.strip().splitlines()[-1])
+            run['pages'] = served[0]
+            runs.append(run)
+    finally:
+        if server:
+            server.shutdown()
+
+    seconds = statistics.median(run['seconds'] for run in runs)
+    parse_ms = [run['parse_ms_per_page'] for run in runs if run['parse_ms_per_page'] is not None]
+    rss = [run['peak_rss_kb'] for run in runs if run['peak_rss_kb'] is not None]
+    return {
+        'kind': source['kind'],
+        'corpus': corpus.digest() if corpus.exists() else None,
+        'pages': runs[-1]['pages'],
+        'items': runs[-1]['items'],
+        'seconds': round(seconds, 4),
+        'pages_per_sec': round(runs[-1]['pages'] / seconds, 2) if seconds else None,
+        'items_per_sec': round(runs[-1]['items'] / seconds, 2) if seconds else None,
+        'parse_ms_per_page': round(statistics.median(parse_ms), 3) if parse_ms else None,
+        'peak_rss_kb': max(rss) if rss else None
+    }
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=ROOT,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, cwd=ROOT).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old: dict, new: dict):
+    # -> percent change per metric, only for scrapers measured on the same corpus
+    print(f"\n{'scraper':24}" + ''.join(f"{metric:>20}" for metric in METRICS))
+    for name, result in new['results'].items():
+        before = old['results'].get(name, {})
+        if 'pages' not in result or 'pages' not in before:
+            continue
+        if before.get('corpus') != result.get('corpus'):
+            print(f"{name:24} corpus changed, not comparable")
+            continue
+        cells = ''
+        for metric in METRICS:
+            if before.get(metric) and result.get(metric) is not None:
+                cells += f"{(result[metric] - before[metric]) / before[metric] * 100:+19.1f}%"
+            else:
+                cells += f"{'-':>20}"
+        print(f"{name:24}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every scraper against its recorded corpus on a local server")
+    parser.add_argument('sources', nargs='*', help=f"default all: {', '.join(SOURCES)}")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds before each response")
+    parser.add_argument('--bandwidth', type=int, default=None, help="bytes per second for each response")
+    parser.add_argument('--runs', type=int, default=3, help="median of this many runs")
+    parser.add_argument('--backend', default=None, help="html parser backend, default is the fastest installed")
+    parser.add_argument('--output', default=None, help="json file, default benchmarks/results/<commit>.json")
+    parser.add_argument('--compare', default=None, help="older results json to diff against")
+    parser.add_argument('--startup-budget', default=STARTUP_BUDGET, help="json budget for startup_profile, "
+                                                                         "the run fails when an entry point is over")
+    parser.add_argument('--skip-startup', action='store_true', help="do not profile startup")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--origin', default=None, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.child:
+        print(json.dumps(run_child(options.child, options.origin, options.backend)))
+        return
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'backend': options.backend,
+        'latency': options.latency,
+        'bandwidth': options.bandwidth,
+        'runs': options.runs,
+        'results': {}
+    }
+    over = []
+    if not options.skip_startup:
+        from startup_profile import load_budget, over_budget, print_report, profile, top_imports
+        startup = profile()
+        print_report(startup, top=3)
+        print()
+        over = over_budget(startup, load_budget(options.startup_budget))
+        for name, result in startup.items():
+            top = {row['module']: row['cumulative_us'] for row in top_imports(result.pop('imports'))}
+            report.setdefault('startup', {})[name] = {**result, 'top_imports_us': top}
+    print(f"{'scraper':24}{'pages':>7}{'items':>7}{'pages/s':>10}{'items/s':>10}{'parse ms':>10}{'rss MB':>9}")
+    for name in options.sources or SOURCES:
+        result = run_source(name, options)
+        report['results'][name] = result
+        if 'pages' not in result:
+            print(f"{name:24} {result.get('skipped') or result.get('error')}")
+            continue
+        parse_ms = f"{result['parse_ms_per_page']:10.2f}" if result['parse_ms_per_page'] is not None else f"{'-':>10}"
+        rss = f"{result['peak_rss_kb'] / 1024:9.1f}" if result['peak_rss_kb'] else f"{'-':>9}"
+        print(f"{name:24}{result['pages']:7}{result['items']:7}{result['pages_per_sec']:10.1f}"
+              f"{result['items_per_sec']:10.1f}{parse_ms}{rss}")
+
+    output = options.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nSaved results to {output}")
+
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+    if over:
+        for line in over:
+            print(f"OVER BUDGET: {line}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import re
+
+from benchmarks import fixtures
+
+SYNTHETIC_PAGES = 3  # -> listing pages the made up sites have before they run out
+
+
+def books_route(path: str):
+    book = re.match(r'/catalogue/book_(\d+)/index.html', path)
+    if book:
+        return fixtures.book_detail(int(book.group(1)))
+    listing = re.match(r'/catalogue/page-(\d+).html', path)
+    if path == '/index.html' or (listing and int(listing.group(1)) <= SYNTHETIC_PAGES):
+        return fixtures.book_listing()
+    return None  # -> 404 past the last page, like the real site
+
+
+def quotes_route(path: str):
+    listing = re.match(r'/page/(\d+)/', path)
+    if listing and int(listing.group(1)) > SYNTHETIC_PAGES:
+        return fixtures.page('<div class="col-md-8">No quotes found!</div>', 'Quotes')
+    return fixtures.quotes()
+
+
+def feed_route(path: str):
+    return 200, 'application/rss+xml; charset=utf-8', fixtures.rss()
+
+
+# -> every scraper in the repo and how to run it
+# -> kind: requests goes through http_client, selenium drives chrome, feedparser reads rss, static makes up data
+# -> init and args are passed to the class and the scrape method, any http url in them is pointed at the replay server
+# -> parse names the methods timed as parse ms per page, synthetic makes the pages for record_fixtures --synthetic
+SOURCES = {
+    'task1_books': {
+        'file': 'TASK_1_web_scraping.py', 'class': 'BookScraper', 'kind': 'requests', 'scrape': 'scrape_books',
+        'init': {'base_url': 'http://books.toscrape.com'}, 'args': {'max_pages': 2},
+        'parse': ['parse_listing', 'parse_details'], 'synthetic': books_route
+    },
+    'task2_jobs': {
+        'file': 'TASK_2_web_scraping.py', 'class': 'JobScraper', 'kind': 'selenium', 'scrape': 'scrape_jobs',
+        'init': {}, 'args': {'url': 'https://www.linkedin.com/jobs/search/?keywords=Python%20Developer'},
+        'close': 'close', 'parse': [], 'synthetic': lambda path: fixtures.linkedin(card='job-search-card')
+    },
+    'task3_cryptos': {
+        'file': 'TASK_3_web_scraping.py', 'class': 'CryptoScraper', 'kind': 'requests', 'scrape': 'scrape_cryptos',
+        'init': {'base_url': 'https://coinmarketcap.com'}, 'args': {},
+        'parse': ['parse_page'], 'synthetic': lambda path: fixtures.coinmarketcap()
+    },
+    'amazon_scraper': {
+        'file': '15_scrapped_files/amazon_scraper.py', 'class': 'AmazonScraper', 'kind': 'selenium',
+        'scrape': 'scrape_products', 'init': {'url': 'https://www.amazon.com/s?k=mobile+phones'}, 'args': {},
+        'parse': [], 'synthetic': lambda path: fixtures.amazon()
+    },
+    'book_scraper': {
+        'file': '15_scrapped_files/book_scraper.py', 'class': 'BookScraper', 'kind': 'requests',
+        'scrape': 'scrape_books', 'init': {'base_url': 'https://books.toscrape.com'}, 'args': {},
+        'parse': ['parse_listing', 'parse_details'], 'synthetic': books_route
+    },
+    'coinmarketcap_scraper': {
+        'file': '15_scrapped_files/coinmarketcap_scraper.py', 'class': 'CoinMarketCapScraper', 'kind': 'requests',
+        'scrape': 'scrape_cryptos', 'init': {'url': 'https://coinmarketcap.com/'}, 'args': {},
+        'parse': ['parse_page'], 'synthetic': lambda path: fixtures.coinmarketcap()
+    },
+    'flipkart_scraper': {
+        'file': '15_scrapped_files/flipkart_scraper.py', 'class': 'FlipkartScraper', 'kind': 'requests',
+        'scrape': 'scrape_products', 'init': {'base_url': 'https://www.flipkart.com/mobiles/pr?sid=tyy%2C4io'},
+        'args': {}, 'parse': ['parse_page'], 'synthetic': lambda path: fixtures.flipkart()
+    },
+    'goodreads_scraper': {
+        'file': '15_scrapped_files/goodreads_scraper.py', 'class': 'GoodreadsScraper', 'kind': 'requests',
+        'scrape': 'scrape_books', 'init': {'url': 'https://www.goodreads.com/list/show/1.Best_Books_Ever'},
+        'args': {}, 'parse': ['parse_page'], 'synthetic': lambda path: fixtures.goodreads()
+    },
+    'googlenews_scraper': {
+        'file': '15_scrapped_files/googlenews_scraper.py', 'class': 'GoogleNewsScraper', 'kind': 'feedparser',
+        'scrape': 'scrape_articles', 'init': {'url': 'https://news.google.com/rss'}, 'args': {},
+        'parse': [], 'synthetic': feed_route
+    },
+    'imdb_scraper': {
+        'file': '15_scrapped_files/imdb_scraper.py', 'class': 'IMDBScraper', 'kind': 'requests',
+        'scrape': 'scrape_movies', 'init': {'base_url': 'https://www.imdb.com/chart/top/'}, 'args': {},
+        'parse': ['parse_page'], 'synthetic': lambda path: fixtures.imdb()
+    },
+    'indeed_scraper': {
+        'file': '15_scrapped_files/indeed_scraper.py', 'class': 'IndeedScraper', 'kind': 'requests',
+        'scrape': 'scrape_jobs', 'init': {'url': 'https://www.indeed.com/jobs?q=software+developer'}, 'args': {},
+        'parse': ['parse_page'], 'synthetic': lambda path: fixtures.indeed()
+    },
+    'linkedin_scraper': {
+        'file': '15_scrapped_files/linkedin_scraper.py', 'class': 'LinkedInScraper', 'kind': 'selenium',
+        'scrape': 'scrape_jobs', 'init': {'url': 'https://www.linkedin.com/jobs/search/?keywords=python%20developer'},
+        'args': {}, 'parse': [], 'synthetic': lambda path: fixtures.linkedin()
+    },
+    'olx_scraper': {
+        'file': '15_scrapped_files/olx_scraper.py', 'class': 'OLXScraper', 'kind': 'requests',
+        'scrape': 'scrape_phones', 'init': {'base_url': 'https://www.olx.uz/d/elektronika/telefony-i-aksesuary/'},
+        'args': {}, 'parse': ['parse_page'], 'synthetic': lambda path: fixtures.olx()
+    },
+    'quote_scraper': {
+        'file': '15_scrapped_files/quote_scraper (1).py', 'class': 'QuoteScraper', 'kind': 'requests',
+        'scrape': 'scrape_quotes', 'init': {'base_url': 'http://quotes.toscrape.com'}, 'args': {},
+        'parse': ['parse_page'], 'synthetic': quotes_route
+    },
+    'reddit_scraper': {
+        'file': '15_scrapped_files/reddit_scraper.py', 'class': 'RedditScraper', 'kind': 'requests',
+        'scrape': 'scrape_posts', 'init': {'url': 'https://www.reddit.com/r/Python/hot/'}, 'args': {},
+        'parse': ['parse_page'], 'synthetic': lambda path: fixtures.reddit()
+    },
+    'twitter_scraper': {
+        'file': '15_scrapped_files/twitter_scraper.py', 'class': 'TwitterScraper', 'kind': 'static',
+        'scrape': 'scrape_tweets', 'init': {}, 'args': {}, 'parse': [], 'synthetic': None
+    },
+    'weather_scraper': {
+        'file': '15_scrapped_files/weather_scraper.py', 'class': 'WeatherScraper', 'kind': 'requests',
+        'scrape': 'scrape_weather',
+        'init': {'url': 'https://weather.com/weather/today/l/New+York+NY+USNY0996:1:US'}, 'args': {},
+        'parse': ['parse_page'], 'synthetic': lambda path: fixtures.weather()
+    },
+    'wiki_scraper': {
+        'file': '15_scrapped_files/wiki_scraper.py', 'class': 'WikiScraper', 'kind': 'requests',
+        'scrape': 'scrape_article', 'init': {'base_url': 'https://en.wikipedia.org/wiki/'}, 'args': {},
+        'parse': ['parse_article'], 'synthetic': lambda path: fixtures.wiki()
+    },
+}
+
+
+def point_at(kwargs: dict, origin: str) -> dict:
+    # -> swap the scheme and host of every url for origin, keep path and query so the corpus keys still match
+    from urllib.parse import urlsplit
+    pointed = {}
+    for key, value in kwargs.items():
+        if isinstance(value, str) and value.startswith(('http://', 'https://')):
+            parts = urlsplit(value)
+            value = origin + parts.path + (f"?{parts.query}" if parts.query else '')
+        pointed[key] = value
+    return pointed
+
+
+def count_items(result) -> int:
+    if isinstance(result, tuple):
+        return sum(len(part) for part in result)  # -> wiki gives back contents, infobox and images
+    return len(result or [])
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_CHART_DIR = os.path.join('static', 'charts')
+DEFAULT_WORKERS = 2  # -> render processes, a chart keeps one core busy for a moment
+DEFAULT_FORMATS = ('png', 'svg')
+DEFAULT_WAIT = 30.0  # -> seconds a /charts/ request waits for a render that is still going
+KEEP_PER_CHART = 20  # -> older versions of one chart are deleted from disk
+
+
+def bar_chart(labels, values, title: str, xlabel: str, ylabel: str, color: str = 'lightblue', rotation: int = 0,
+              figsize: tuple = (8, 6)) -> dict:
+    # -> a chart as plain data, it is hashed for the cache key and sent to a render process as is
+    return {
+        'kind': 'bar',
+        'labels': [str(label) for label in labels],
+        'values': [0.0 if value is None else float(value) for value in values],
+        'title': title,
+        'xlabel': xlabel,
+        'ylabel': ylabel,
+        'color': color,
+        'rotation': rotation,
+        'figsize': list(figsize)
+    }
+
+
+def chart_key(spec: dict) -> str:
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def render_chart(spec: dict, paths: dict) -> float:
+    # -> runs in a render process, a Figure without pyplot draws on the headless Agg canvas and has no global state
+    from matplotlib.figure import Figure
+    start = time.perf_counter()
+    fig = Figure(figsize=spec['figsize'])
+    ax = fig.subplots()
+    ax.bar(spec['labels'], spec['values'], color=spec['color'])
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel(spec['ylabel'])
+    ax.set_title(spec['title'])
+    if spec['rotation']:
+        ax.tick_params(axis='x', labelrotation=spec['rotation'])
+    fig.tight_layout()
+    for fmt, path in paths.items():
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fig.savefig(tmp, format=fmt)
+        os.replace(tmp, path)  # -> a browser never gets half a file
+    return (time.perf_counter() - start) * 1000
+
+
+def prime_renderer() -> int:
+    # -> runs in a render process, matplotlib is imported there before the first real chart needs it
+    from matplotlib.figure import Figure
+    Figure()
+    return os.getpid()
+
+
+class PendingChart:
+    def __init__(self, name: str, paths: dict, future=None):
+        self.name = name
+        self.paths = paths  # -> format -> file under static/, ready once result() returns
+        self.future = future  # -> None when it came from the cache
+
+    def result(self, timeout: float = None) -> dict:
+        if self.future is not None:
+            self.future.result(timeout)  # -> raises the render error, if there was one
+        return self.paths
+
+    def url(self, fmt: str = 'png') -> str:
+        # -> /charts/<name>-<key>.png of the app asking, the file for exactly this data, other requests never touch it
+        from flask import request
+        return f"{request.script_root}/charts/{os.path.basename(self.paths[fmt])}"
+
+
+class ChartService:
+    def __init__(self, folder: str = DEFAULT_CHART_DIR, workers: int = DEFAULT_WORKERS,
+                 formats: tuple = DEFAULT_FORMATS):
+        self.folder = folder
+        self.workers = workers
+        self.formats = formats
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0  # -> asked for while the same chart was still rendering
+        self.renders = 0
+        self.failures = 0
+        self.render_ms = 0.0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = {}  # -> key -> future of the render going on
+        os.makedirs(folder, exist_ok=True)
+
+    def _executor(self):
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # -> spawn like on windows, forking a process that runs flask threads can hang the child
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def warm(self) -> int:
+        # -> starts the render processes, gives back how many answered
+        futures = [self._executor().submit(prime_renderer) for _ in range(self.workers)]
+        return len({future.result() for future in futures})
+
+    def chart(self, name: str, spec: dict) -> PendingChart:
+        # -> gives back right away, the request can go on while a render process draws the chart
+        key = chart_key(spec)
+        paths = {fmt: os.path.join(self.folder, f"{name}-{key}.{fmt}") for fmt in self.formats}
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                self.joined += 1
+                return PendingChart(name, paths, future)
+            if all(os.path.exists(path) for path in paths.values()):
+                self.hits += 1
+                cached = True
+            else:
+                self.misses += 1
+                cached = False
+                future = self._executor().submit(render_chart, spec, paths)
+                self._pending[key] = future
+        if cached:
+            return PendingChart(name, paths)
+        future.add_done_callback(lambda done: self._finished(name, key, paths, done))
+        return PendingChart(name, paths, future)
+
+    def _finished(self, name: str, key: str, paths: dict, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.exception() is not None:
+                self.failures += 1
+                logging.error(f"Failed to render chart {name}: {future.exception()}")
+                return
+            took = future.result()
+            self.renders += 1
+            self.render_ms += took
+        logging.info(f"Rendered chart {name} in {took:.0f} ms")
+        self._prune(name)
+
+    def ready(self, filename: str, timeout: float = DEFAULT_WAIT) -> str:
+        # -> path of a chart file once it is on disk, waits here if it is still rendering, None if there is none
+        filename = os.path.basename(filename)
+        key = os.path.splitext(filename)[0].rsplit('-', 1)[-1]
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception as e:
+                logging.error(f"Chart {filename} is not ready: {e!r}")
+                return None
+        path = os.path.join(self.folder, filename)
+        return path if os.path.exists(path) else None
+
+    def _prune(self, name: str):
+        versions = {}
+        for entry in os.scandir(self.folder):
+            if entry.name.startswith(f"{name}-") and not entry.name.endswith('.tmp'):
+                key = entry.name[len(name) + 1:].rsplit('.', 1)[0]
+                versions[key] = max(versions.get(key, 0), entry.stat().st_mtime)
+        for key in sorted(versions, key=versions.get)[:max(0, len(versions) - KEEP_PER_CHART)]:
+            for fmt in self.formats:
+                try:
+                    os.remove(os.path.join(self.folder, f"{name}-{key}.{fmt}"))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            asked = self.hits + self.misses + self.joined
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'joined': self.joined,
+                'hit_rate': round((self.hits + self.joined) / asked, 3) if asked else None,
+                'renders': self.renders,
+                'failures': self.failures,
+                'avg_render_ms': round(self.render_ms / self.renders, 1) if self.renders else None,
+                'rendering': len(self._pending)
+            }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+        logging.info(f"Chart service stats: {self.stats()}")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_charts() -> ChartService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ChartService()
+        return _service
+
+
+def set_charts(service: ChartService) -> ChartService:
+    global _service
+    with _service_lock:
+        old, _service = _service, service
+    return old
+
+
+def chart_response(filename: str):
+    # -> for a /charts/<filename> route, the name changes with the data so browsers can keep the file
+    from flask import abort, send_file
+    path = get_charts().ready(filename)
+    if path is None:
+        abort(404)
+    return send_file(os.path.abspath(path), max_age=365 * 24 * 3600)
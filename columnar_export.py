@@ -0,0 +1,199 @@
+import csv
+import importlib.util
+import logging
+import os
+import shutil
+import time
+import uuid
+
+DEFAULT_DATASET_DIR = 'datasets'  # -> every scrape is added here, one folder per record shape and day
+DEFAULT_CHUNK_SIZE = 10000  # -> records turned into one arrow batch at a time
+PARQUET_COMPRESSION = 'zstd'
+PARQUET_LEVEL = 3
+
+# -> column types for each scraper's records, in the order the files get them
+SHAPES = {
+    'books': [('title', 'string'), ('price', 'float64'), ('rating', 'int8'), ('category', 'string'),
+              ('availability', 'string'), ('value_score', 'float64'), ('normalized_price', 'float64')],
+    'jobs': [('job_title', 'string'), ('company', 'string'), ('location', 'string'), ('post_date', 'string'),
+             ('description', 'string')],
+    'quotes': [('quote_text', 'string'), ('author', 'string'), ('tags', 'list<string>')],
+    'phones': [('name', 'string'), ('price', 'string'), ('location', 'string')],  # -> olx price is text
+    'products': [('name', 'string'), ('price', 'float64'), ('rating', 'float32')],
+    'movies': [('title', 'string'), ('year', 'int16'), ('rating', 'float32'), ('decade', 'int16')],
+    'articles': [('heading', 'string'), ('paragraph', 'string')],
+    'infobox': [('key', 'string'), ('value', 'string')],
+    'images': [('url', 'string')]
+}
+
+_formats = None
+_schemas = {}
+
+
+def available_formats() -> list:
+    formats = ['csv']
+    if importlib.util.find_spec('pyarrow'):
+        formats += ['parquet', 'arrow']
+    return formats
+
+
+def get_formats() -> list:
+    global _formats
+    if _formats is None:
+        _formats = available_formats()  # -> everything that is installed
+        logging.info(f"Exporting records as {', '.join(_formats)}")
+    return _formats
+
+
+def set_formats(formats: list):
+    global _formats
+    missing = [name for name in formats if name not in available_formats()]
+    if missing:
+        raise ValueError(f"Export formats {missing} need pyarrow, can use {available_formats()}")
+    _formats = list(formats)
+
+
+def _arrow_type(pa, name: str):
+    if name.startswith('list<'):
+        return pa.list_(_arrow_type(pa, name[5:-1]))
+    return getattr(pa, name)()
+
+
+def arrow_schema(shape: str):
+    import pyarrow as pa
+    if shape not in _schemas:
+        _schemas[shape] = pa.schema([(field, _arrow_type(pa, kind)) for field, kind in SHAPES[shape]])
+    return _schemas[shape]
+
+
+def _chunks(records, size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _batch(chunk: list, shape: str):
+    import pyarrow as pa
+    schema = arrow_schema(shape)
+    # -> column by column with .get, so dicts and database records both work and a missing key is null
+    arrays = [pa.array([record.get(field.name) for record in chunk], type=field.type) for field in schema]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _CsvWriter:
+    def __init__(self, path: str, shape: str):
+        self.fields = [field for field, _ in SHAPES[shape]]
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file, lineterminator='\n')  # -> same line ends pandas wrote
+        self.writer.writerow(self.fields)
+
+    def write(self, chunk: list):
+        self.writer.writerows([record.get(field) for field in self.fields] for record in chunk)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, shape: str):
+        import pyarrow.parquet as pq
+        self.shape = shape
+        self.writer = pq.ParquetWriter(path, arrow_schema(shape), compression=PARQUET_COMPRESSION,
+                                       compression_level=PARQUET_LEVEL)
+
+    def write(self, chunk: list):
+        self.writer.write_batch(_batch(chunk, self.shape))
+
+    def close(self):
+        self.writer.close()
+
+
+class _ArrowWriter:
+    # -> arrow ipc file, left uncompressed so readers can memory map it without copying
+    def __init__(self, path: str, shape: str):
+        import pyarrow as pa
+        self.shape = shape
+        self.sink = pa.OSFile(path, 'wb')
+        self.writer = pa.ipc.new_file(self.sink, arrow_schema(shape))
+
+    def write(self, chunk: list):
+        self.writer.write_batch(_batch(chunk, self.shape))
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+
+_WRITERS = {'csv': _CsvWriter, 'parquet': _ParquetWriter, 'arrow': _ArrowWriter}
+
+
+def write_records(records, path: str, shape: str, fmt: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.')
+    return export_records(records, os.path.splitext(path)[0], shape, formats=[fmt], chunk_size=chunk_size,
+                          dataset_dir=None)[fmt]
+
+
+def export_records(records, name: str, shape: str, formats: list = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   dataset_dir: str = DEFAULT_DATASET_DIR) -> dict:
+    # -> one pass over records feeds every format, so a database view is only read once
+    # -> files are written next to their final name and moved in place, a download never sees half a file
+    formats = get_formats() if formats is None else formats
+    if not formats:
+        return {}
+    writers = {}
+    written = 0
+    try:
+        for fmt in formats:
+            writers[fmt] = _WRITERS[fmt](f"{name}.{fmt}.tmp", shape)
+        for chunk in _chunks(records, chunk_size):
+            for writer in writers.values():
+                writer.write(chunk)
+            written += len(chunk)
+    except Exception as e:
+        logging.error(f"Failed to export {shape} as {', '.join(formats)}: {e}")
+        for fmt, writer in writers.items():
+            writer.close()
+            os.remove(f"{name}.{fmt}.tmp")
+        raise
+
+    for fmt, writer in writers.items():
+        writer.close()
+        os.replace(f"{name}.{fmt}.tmp", f"{name}.{fmt}")
+    if dataset_dir and 'parquet' in writers:
+        append_partition(f"{name}.parquet", shape, dataset_dir)
+    logging.info(f"Exported {written} {shape} as {', '.join(formats)}")
+    return {fmt: written for fmt in formats}
+
+
+def append_partition(path: str, shape: str, dataset_dir: str = DEFAULT_DATASET_DIR, scrape_date: str = None) -> str:
+    # -> hive layout, datasets/books/scrape_date=2024-05-01/part-....parquet, so readers can skip whole days
+    scrape_date = scrape_date or time.strftime('%Y-%m-%d')
+    folder = os.path.join(dataset_dir, shape, f"scrape_date={scrape_date}")
+    os.makedirs(folder, exist_ok=True)
+    part = f"part-{time.strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+    hidden = os.path.join(folder, f".{part}.tmp")  # -> dataset readers skip dot files while it is copied
+    shutil.copyfile(path, hidden)
+    os.replace(hidden, os.path.join(folder, part))
+    return os.path.join(folder, part)
+
+
+def read_table(path: str):
+    import pyarrow as pa
+    if path.endswith('.arrow'):
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()  # -> columns point into the mapped file
+    import pyarrow.parquet as pq
+    return pq.read_table(path)
+
+
+def read_dataset(shape: str, dataset_dir: str = DEFAULT_DATASET_DIR, since: str = None, columns: list = None):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    partitioning = ds.partitioning(pa.schema([('scrape_date', pa.string())]), flavor='hive')
+    dataset = ds.dataset(os.path.join(dataset_dir, shape), format='parquet', partitioning=partitioning)
+    where = ds.field('scrape_date') >= since if since else None  # -> days before since are never opened
+    return dataset.to_table(columns=columns, filter=where)
@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+import logging
+
+DEFAULT_PREFETCH = 3  # -> how many pages we load ahead of the one being read
+
+
+def _drop(future):
+    # -> collect the result of a page we dont need anymore so asyncio does not warn about it
+    if not future.cancel() and not future.cancelled():
+        future.exception()
+
+
+async def crawl_pages_async(page_url, extract, max_pages: int = None, prefetch: int = DEFAULT_PREFETCH,
+                            parse_key: str = None) -> list:
+    from concurrent.futures import ThreadPoolExecutor
+    from background_jobs import report_progress
+    from http_client import get_client
+    client = get_client()
+    loop = asyncio.get_running_loop()
+
+    def fetch_page(url):
+        response = client.get(url)
+        response.raise_for_status()
+        if parse_key:
+            return client.parse(response, parse_key, extract)  # -> reuse old parse if page did not change
+        return extract(response)
+
+    items = []
+    pending = {}
+    page = 1
+    next_page = 1
+    executor = ThreadPoolExecutor(max_workers=max(1, prefetch + 1))
+    try:
+        while max_pages is None or page <= max_pages:
+            while len(pending) <= max(0, prefetch) and (max_pages is None or next_page <= max_pages):
+                pending[next_page] = loop.run_in_executor(executor, contextvars.copy_context().run, fetch_page,
+                                                          page_url(next_page))  # -> keeps the scrape job it belongs to
+                next_page += 1  # -> start the next pages while this one is still loading
+
+            try:
+                page_items = await pending.pop(page)
+                logging.info(f"Scraped page {page}")
+            except Exception as e:
+                logging.error(f"Failed to scrape page {page}: {e}")
+                break
+
+            if page_items is None:
+                break  # -> empty page means we are past the last one
+            items.extend(page_items)
+            report_progress(items=len(page_items))
+            page += 1
+    finally:
+        for future in pending.values():
+            _drop(future)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return items
+
+
+def crawl_pages(page_url, extract, max_pages: int = None, prefetch: int = DEFAULT_PREFETCH,
+                parse_key: str = None) -> list:
+    # -> same list the old while loops gave back, so scrapers can call it instead
+    return asyncio.run(crawl_pages_async(page_url, extract, max_pages=max_pages, prefetch=prefetch,
+                                         parse_key=parse_key))
@@ -0,0 +1,437 @@
+import logging
+import threading
+from collections import namedtuple
+from decimal import Decimal
+
+DEFAULT_BATCH_SIZE = 500  # -> rows sent and committed together
+DEFAULT_FETCH_SIZE = 1000  # -> rows pulled per round trip when streaming
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000  # -> one page never pulls more than this, whatever the url asks for
+OPERATORS = {'eq': '=', 'ne': '<>', 'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>=', 'like': 'LIKE'}
+
+
+def enable_fast_executemany(cursor):
+    # -> pyodbc packs the whole batch into one round trip instead of one per row, sqlite has no such switch
+    if hasattr(cursor, 'fast_executemany'):
+        cursor.fast_executemany = True
+
+
+def bulk_insert(conn, cursor, query: str, rows, batch_size: int = DEFAULT_BATCH_SIZE, label: str = 'rows') -> int:
+    # -> rows is any iterable of parameter tuples, it is read one batch at a time
+    enable_fast_executemany(cursor)
+    saved = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            saved += _insert_batch(conn, cursor, query, batch, saved, label)
+            batch = []
+    if batch:
+        saved += _insert_batch(conn, cursor, query, batch, saved, label)
+    return saved
+
+
+def _insert_batch(conn, cursor, query: str, batch: list, saved: int, label: str) -> int:
+    try:
+        cursor.executemany(query, batch)
+        conn.commit()  # -> one commit per batch, not per row
+        logging.info(f"Saved {len(batch)} {label} to database ({saved + len(batch)} so far)")
+        return len(batch)
+    except Exception as e:
+        conn.rollback()  # -> batches before this one stay saved
+        logging.error(f"Failed to save batch of {len(batch)} {label} after {saved}: {e}")
+        raise
+
+
+_sync_locks = {}
+_sync_locks_lock = threading.Lock()
+
+
+def _sync_lock(table: str) -> threading.Lock:
+    with _sync_locks_lock:
+        return _sync_locks.setdefault(table, threading.Lock())
+
+
+def _same(old, new) -> bool:
+    if isinstance(old, (int, float, Decimal)) and isinstance(new, (int, float, Decimal)):
+        return round(float(old), 6) == round(float(new), 6)  # -> sql server gives back Decimal for money columns
+    return old == new
+
+
+def _load(cursor, columns: tuple, key_at: list, query: str, params: tuple = ()) -> tuple:
+    cursor.execute(query, params)
+    existing = {}
+    repeated = set()
+    for row in cursor.fetchall():
+        row_key = tuple(row[i] for i in key_at)
+        if row_key in existing:
+            repeated.add(row_key)  # -> left over from the old clear and reinsert, rewrite these
+        existing[row_key] = tuple(row)
+    return existing, repeated
+
+
+def _diff(wanted: dict, existing: dict, repeated: set, value_at: list) -> tuple:
+    inserts, updates, deletes = [], [], []
+    unchanged = 0
+    for row_key, row in wanted.items():
+        old = existing.get(row_key)
+        if old is None:
+            inserts.append(row)
+        elif row_key in repeated:
+            deletes.append(row_key)
+            inserts.append(row)
+        elif old == row or all(_same(old[i], row[i]) for i in value_at):  # -> plain compare first, it is fast
+            unchanged += 1
+        else:
+            updates.append(tuple(row[i] for i in value_at) + row_key)
+    return inserts, updates, deletes, unchanged
+
+
+def _key_match(key: tuple) -> str:
+    # -> = never matches null, and a page can leave a key part out, so null has to match null here
+    return ' AND '.join(f"({name} = ? OR ({name} IS NULL AND ? IS NULL))" for name in key)
+
+
+def _key_params(row_key: tuple) -> tuple:
+    return tuple(value for part in row_key for value in (part, part))  # -> every key part is asked for twice
+
+
+def _apply(cursor, table: str, columns: tuple, key: tuple, inserts: list, updates: list, deletes: list):
+    where = _key_match(key)
+    value_columns = [name for name in columns if name not in key]
+    enable_fast_executemany(cursor)
+    if deletes:
+        cursor.executemany(f"DELETE FROM {table} WHERE {where}", [_key_params(row_key) for row_key in deletes])
+    if updates:
+        split = len(value_columns)
+        cursor.executemany(f"UPDATE {table} SET {', '.join(f'{name} = ?' for name in value_columns)} "
+                           f"WHERE {where}", [update[:split] + _key_params(update[split:]) for update in updates])
+    if inserts:
+        cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) "
+                           f"VALUES ({', '.join('?' for _ in columns)})", inserts)
+
+
+def sync_rows(conn, cursor, table: str, columns: tuple, key: tuple, rows, label: str = 'rows') -> dict:
+    # -> make the table hold exactly rows, writing only what changed, all in one transaction
+    # -> columns are the names of the values in each row, key the ones that say which row is which
+    key_at = [columns.index(name) for name in key]
+    wanted = {}
+    for row in rows:
+        wanted[tuple(row[i] for i in key_at)] = tuple(row)  # -> same key twice, the last one wins
+    value_at = [i for i, name in enumerate(columns) if name not in key]
+
+    with _sync_lock(table):  # -> two refreshes at once would both insert the same new rows
+        try:
+            existing, repeated = _load(cursor, columns, key_at, f"SELECT {', '.join(columns)} FROM {table}")
+            inserts, updates, deletes, unchanged = _diff(wanted, existing, repeated, value_at)
+            deletes.extend(row_key for row_key in existing if row_key not in wanted)
+            _apply(cursor, table, columns, key, inserts, updates, deletes)
+            conn.commit()  # -> readers see the old rows or the new ones, never an empty table
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"Failed to sync {label}: {e}")
+            raise
+
+    rewritten = len(repeated & wanted.keys())
+    counts = {
+        'inserted': len(inserts) - rewritten,
+        'updated': len(updates) + rewritten,
+        'deleted': len(deletes) - rewritten,
+        'unchanged': unchanged
+    }
+    logging.info(f"Synced {label}: {counts}")
+    return counts
+
+
+class IncrementalSync:
+    # -> sync_rows a batch at a time, for rows that arrive while the scrape is still running
+    # -> batches are upserted by key, finish() then deletes what no batch mentioned
+    def __init__(self, conn, cursor, table: str, columns: tuple, key: tuple, to_row=tuple, label: str = 'rows'):
+        self.conn = conn
+        self.cursor = cursor
+        self.table = table
+        self.columns = columns
+        self.key = key
+        self.to_row = to_row  # -> turns one scraped record into a tuple in columns order
+        self.label = label
+        self.key_at = [columns.index(name) for name in key]
+        self.value_at = [i for i, name in enumerate(columns) if name not in key]
+        self.seen = set()
+        self.counts = {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+    def write_batch(self, records: list) -> int:
+        wanted = {}
+        for record in records:
+            row = tuple(self.to_row(record))
+            wanted[tuple(row[i] for i in self.key_at)] = row  # -> same key again, the last one wins like sync_rows
+        if not wanted:
+            return 0
+        match = ' OR '.join(f"({_key_match(self.key)})" for _ in wanted)
+        params = tuple(value for row_key in wanted for value in _key_params(row_key))
+
+        with _sync_lock(self.table):
+            try:
+                existing, repeated = _load(self.cursor, self.columns, self.key_at,
+                                           f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE {match}", params)
+                inserts, updates, deletes, unchanged = _diff(wanted, existing, repeated, self.value_at)
+                _apply(self.cursor, self.table, self.columns, self.key, inserts, updates, deletes)
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                logging.error(f"Failed to write batch of {len(wanted)} {self.label}: {e}")
+                raise
+
+        self.seen.update(wanted)
+        self.counts['inserted'] += len(inserts) - len(deletes)
+        self.counts['updated'] += len(updates) + len(deletes)
+        self.counts['unchanged'] += unchanged
+        return len(wanted)
+
+    def finish(self) -> dict:
+        # -> only call after a complete scrape, a half one would delete rows that are still on the site
+        with _sync_lock(self.table):
+            try:
+                self.cursor.execute(f"SELECT {', '.join(self.key)} FROM {self.table}")
+                gone = [tuple(row) for row in self.cursor.fetchall() if tuple(row) not in self.seen]
+                _apply(self.cursor, self.table, self.columns, self.key, [], [], gone)
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                logging.error(f"Failed to finish sync of {self.label}: {e}")
+                raise
+        self.counts['deleted'] += len(gone)
+        logging.info(f"Synced {self.label}: {self.counts}")
+        return dict(self.counts)
+
+
+_record_types = {}
+
+
+def record_type(name: str, fields: tuple):
+    # -> a namedtuple that old code can still read like a dict, book['title'] and book.title both work
+    if (name, fields) not in _record_types:
+        base = namedtuple(name, fields)
+
+        class Record(base):
+            __slots__ = ()
+
+            def __getitem__(self, key):
+                if isinstance(key, str):
+                    return getattr(self, key)
+                return base.__getitem__(self, key)
+
+            def get(self, key: str, default=None):
+                return getattr(self, key, default)
+
+            def keys(self) -> tuple:
+                return self._fields
+
+            def __reduce__(self):
+                # -> the class is made at runtime, so pickle gets the recipe instead of a lookup by name
+                return _rebuild_record, (name, fields, tuple(self))
+
+        Record.__name__ = Record.__qualname__ = name
+        _record_types[(name, fields)] = Record
+    return _record_types[(name, fields)]
+
+
+def _rebuild_record(name: str, fields: tuple, values: tuple):
+    return record_type(name, fields)._make(values)
+
+
+def stream_records(conn, query: str, name: str, fields: tuple, params: tuple = (),
+                   fetch_size: int = DEFAULT_FETCH_SIZE):
+    # -> yields rows as they arrive, only one fetchmany chunk is in memory at a time
+    record = record_type(name, fields)
+    cursor = conn.cursor()  # -> own cursor so two streams can run side by side
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield record._make(row)
+    finally:
+        cursor.close()
+
+
+def count_rows(conn, table: str, columns: dict = None, where: dict = None) -> int:
+    where_sql, params = where_clause(columns or {}, where)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}{where_sql}", params)
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+class QueryError(ValueError):
+    pass
+
+
+def is_sqlite(conn) -> bool:
+    return type(conn).__module__.startswith('sqlite3')  # -> the benchmarks run the managers on sqlite
+
+
+def where_clause(columns: dict, where: dict = None) -> tuple:
+    # -> where is {'category': 'Poetry', 'price__lte': 20}, field names only so nothing from a url reaches the sql
+    conditions, params = [], []
+    for name, value in (where or {}).items():
+        if value is None or value == '':
+            continue  # -> filter not given
+        field, _, op = name.partition('__')
+        if field not in columns or (op or 'eq') not in OPERATORS:
+            raise QueryError(f"Can not filter on {name}")
+        conditions.append(f"{columns[field]} {OPERATORS[op or 'eq']} ?")
+        params.append(value)
+    return (' WHERE ' + ' AND '.join(conditions) if conditions else ''), tuple(params)
+
+
+def order_clause(columns: dict, order_by, key: tuple) -> str:
+    # -> '-price' sorts high to low, the key always goes last so pages do not shuffle between requests
+    if isinstance(order_by, str):
+        order_by = [name for name in order_by.split(',') if name]
+    terms, used = [], set()
+    for name in order_by or ():
+        field = name.lstrip('-')
+        if field not in columns:
+            raise QueryError(f"Can not sort on {field}")
+        if columns[field] not in used:
+            used.add(columns[field])
+            terms.append(f"{columns[field]} {'DESC' if name.startswith('-') else 'ASC'}")
+    terms.extend(f"{column} ASC" for column in key if column not in used)
+    return ' ORDER BY ' + ', '.join(terms)
+
+
+def select_query(conn, table: str, columns: dict, key: tuple, where: dict = None, order_by=None,
+                 limit: int = None, offset: int = 0) -> tuple:
+    where_sql, params = where_clause(columns, where)
+    query = f"SELECT {', '.join(columns.values())} FROM {table}{where_sql}{order_clause(columns, order_by, key)}"
+    paging, paging_params = paging_clause(conn, limit, offset)
+    return query + paging, params + paging_params
+
+
+def paging_clause(conn, limit: int = None, offset: int = 0) -> tuple:
+    # -> goes after ORDER BY
+    if limit is None and not offset:
+        return '', ()
+    if is_sqlite(conn):
+        return " LIMIT ? OFFSET ?", (-1 if limit is None else limit, offset)
+    if limit is None:
+        return " OFFSET ? ROWS", (offset,)
+    return " OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", (offset, limit)  # -> sql server has no LIMIT
+
+
+def count_by(conn, table: str, column: str, limit: int = None) -> dict:
+    # -> {value: rows}, most rows first, the database does the counting
+    paging, params = paging_clause(conn, limit)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT {column}, COUNT(*) FROM {table} GROUP BY {column} "
+                       f"ORDER BY COUNT(*) DESC, {column} ASC{paging}", params)
+        return {value: count for value, count in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def query_records(conn, table: str, name: str, columns: dict, key: tuple, where: dict = None, order_by=None,
+                  limit: int = None, offset: int = 0) -> list:
+    # -> columns maps record fields to sql columns, in the order the record has them
+    query, params = select_query(conn, table, columns, key, where, order_by, limit, offset)
+    return list(stream_records(conn, query, name, tuple(columns), params))
+
+
+def page_records(conn, table: str, name: str, columns: dict, key: tuple, page: int = 1,
+                 per_page: int = DEFAULT_PAGE_SIZE, where: dict = None, order_by=None) -> dict:
+    per_page = min(max(1, per_page), MAX_PAGE_SIZE)
+    page = max(1, page)
+    total = count_rows(conn, table, columns, where)
+    items = query_records(conn, table, name, columns, key, where, order_by, per_page, (page - 1) * per_page)
+    return {
+        'items': items,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page
+    }
+
+
+_indexed = set()
+_indexed_lock = threading.Lock()
+
+
+def ensure_columns(conn, table: str, columns: dict, scope=None):
+    # -> columns is {name: {'sqlserver': 'AS ... PERSISTED', 'sqlite': 'REAL GENERATED ALWAYS AS (...) VIRTUAL'}}
+    # -> computed columns the queries read, added once per database and process when the table lacks them
+    done = (id(scope), table, 'columns')
+    with _indexed_lock:
+        if done in _indexed:
+            return
+    cursor = conn.cursor()
+    try:
+        if is_sqlite(conn):
+            cursor.execute(f"PRAGMA table_xinfo({table})")  # -> table_info leaves generated columns out
+            present = {row[1] for row in cursor.fetchall()}
+            for name, definition in columns.items():
+                if name not in present:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition['sqlite']}")
+        else:
+            for name, definition in columns.items():
+                cursor.execute(f"IF COL_LENGTH('{table}', '{name}') IS NULL "
+                               f"ALTER TABLE {table} ADD {name} {definition['sqlserver']}")
+        conn.commit()
+        with _indexed_lock:
+            _indexed.add(done)
+        logging.info(f"Checked computed columns on {table}: {', '.join(columns)}")
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Failed to add computed columns to {table}: {e}")  # -> the selects need them, so stop here
+        raise
+    finally:
+        cursor.close()
+
+
+def ensure_indexes(conn, table: str, indexes: dict, scope=None):
+    # -> indexes is {name: 'Column DESC, ...'}, made once per database and process, a failure only costs speed
+    done = (id(scope), table)
+    with _indexed_lock:
+        if done in _indexed:
+            return
+    cursor = conn.cursor()
+    try:
+        for name, columns in indexes.items():
+            if is_sqlite(conn):
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            else:
+                cursor.execute(f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = '{name}' "
+                               f"AND object_id = OBJECT_ID('{table}')) CREATE INDEX {name} ON {table} ({columns})")
+        conn.commit()
+        with _indexed_lock:
+            _indexed.add(done)
+        logging.info(f"Checked indexes on {table}: {', '.join(indexes)}")
+    except Exception as e:
+        conn.rollback()
+        logging.warning(f"Failed to make indexes on {table}, queries still work but slower: {e}")
+    finally:
+        cursor.close()
+
+
+class RowView:
+    # -> reads the table again every time it is looped over, so nothing is kept in memory between loops
+    def __init__(self, stream, count=None):
+        self._stream = stream  # -> gives a fresh iterator of records
+        self._count = count
+
+    def __iter__(self):
+        return iter(self._stream())
+
+    def __len__(self) -> int:
+        if self._count is None:
+            return sum(1 for _ in self)
+        return self._count()
+
+    def __bool__(self) -> bool:
+        for _ in self:
+            return True
+        return False
@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_MIN_SIZE = 1  # -> connections kept open even when nobody uses them
+DEFAULT_MAX_SIZE = 10
+DEFAULT_MAX_IDLE = 300  # -> seconds a spare connection may sit unused before we close it
+DEFAULT_CHECK_AFTER = 30  # -> ping a connection that sat idle this long before handing it out
+DEFAULT_TIMEOUT = 30  # -> seconds to wait for a free connection before giving up
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, min_size: int = DEFAULT_MIN_SIZE, max_size: int = DEFAULT_MAX_SIZE,
+                 max_idle: float = DEFAULT_MAX_IDLE, check_after: float = DEFAULT_CHECK_AFTER,
+                 timeout: float = DEFAULT_TIMEOUT, health_query: str = 'SELECT 1', name: str = 'database'):
+        self.connect = connect  # -> makes one new connection
+        self.min_size = min_size
+        self.max_size = max(1, max_size)
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.timeout = timeout
+        self.health_query = health_query
+        self.name = name
+        self._idle = []  # -> (connection, time it came back), newest at the end
+        self._in_use = 0
+        self._opening = 0  # -> connects running outside the lock, they count towards max_size
+        self._cond = threading.Condition()
+        self._started = time.monotonic()
+        self._busy_since = self._started
+        self._busy_seconds = 0.0  # -> sum of connections in use over time, for utilization
+        self.checkouts = 0
+        self.waited = 0  # -> checkouts that found the pool full
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.closed = 0
+        self.broken = 0  # -> failed the health check or came back in a bad state
+
+    def _track(self, now: float):
+        self._busy_seconds += self._in_use * (now - self._busy_since)
+        self._busy_since = now
+
+    def _size(self) -> int:
+        return len(self._idle) + self._in_use + self._opening
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logging.warning(f"Failed to close {self.name} connection: {e}")
+        self.closed += 1
+
+    def is_healthy(self, conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logging.warning(f"Dropping broken {self.name} connection: {e}")
+            return False
+
+    def _evict_idle(self, now: float):
+        # -> oldest spare connections go first, never below min_size
+        while self._idle and self._size() > self.min_size and now - self._idle[0][1] >= self.max_idle:
+            conn, _ = self._idle.pop(0)
+            self._close(conn)
+
+    def acquire(self, timeout: float = None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._evict_idle(now)
+                if self._idle:
+                    conn, since = self._idle.pop()  # -> newest first, the old ones can age out
+                    self._track(now)
+                    self._in_use += 1
+                    self._record_wait(now - start)
+                    break
+                if self._size() < self.max_size:
+                    conn, since = None, None
+                    self._opening += 1
+                    self._record_wait(now - start)
+                    break
+                if now >= deadline:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"No free {self.name} connection after {timeout}s ({self.max_size} in use)")
+                self._cond.wait(deadline - now)
+
+        if conn is None:
+            try:
+                conn = self.connect()  # -> slow part runs outside the lock so others can still check out
+            except Exception:
+                with self._cond:
+                    self._opening -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._opening -= 1
+                self._track(time.monotonic())
+                self._in_use += 1
+                self.created += 1
+        elif time.monotonic() - since >= self.check_after and not self.is_healthy(conn):
+            with self._cond:
+                self._track(time.monotonic())
+                self.broken += 1
+                self._in_use -= 1
+                self._close(conn)
+                self._cond.notify()
+            return self.acquire(max(0.0, deadline - time.monotonic()))
+        return conn
+
+    def _record_wait(self, waited: float):
+        # -> time spent waiting for a free slot, connecting is not counted
+        self.checkouts += 1
+        self.wait_seconds += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited > 0.001:
+            self.waited += 1
+
+    def release(self, conn, broken: bool = False):
+        if not broken:
+            try:
+                conn.rollback()  # -> drop anything left open so the next user starts clean
+            except Exception as e:
+                logging.warning(f"Failed to reset {self.name} connection: {e}")
+                broken = True
+        with self._cond:
+            now = time.monotonic()
+            self._track(now)
+            self._in_use -= 1
+            if broken:
+                self.broken += 1
+                self._close(conn)
+            else:
+                self._idle.append((conn, now))
+                self._evict_idle(now)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        conn = self.acquire(timeout)
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = not self.is_healthy(conn)  # -> a failed query may have killed the connection
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            self._track(now)
+            elapsed = max(now - self._started, 1e-9)
+            return {
+                'size': self._size(),
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'utilization': round(self._in_use / self.max_size, 3),
+                'avg_utilization': round(self._busy_seconds / (elapsed * self.max_size), 3),
+                'checkouts': self.checkouts,
+                'waited': self.waited,
+                'avg_wait_ms': round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'closed': self.closed,
+                'broken': self.broken
+            }
+
+    def close(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close(conn)
+            self._idle = []
+        logging.info(f"Closed {self.name} pool: {self.stats()}")
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key: str, connect, **kwargs) -> ConnectionPool:
+    # -> one pool per database, shared by every request of the app
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(connect, **kwargs)
+        return _pools[key]
+
+
+def pool_stats() -> dict:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {pool.name: pool.stats() for pool in pools.values()}
@@ -0,0 +1,91 @@
+import logging
+from operator import itemgetter
+
+# -> scrapers declare what they want as DERIVED = {'value_score': ('ratio', 'rating', 'price'), ...}
+# -> ('ratio', a, b)        a / b, 0 where b is 0
+# -> ('bucket', a, width)   a rounded down to a multiple of width, like 1994 -> 1990
+# -> ('normalized', a)      a scaled to 0..1 over the whole batch
+# -> ('share', a)           a as percent of the batch total
+
+
+def _ratio(np, columns: dict, numerator: str, denominator: str):
+    top, bottom = columns[numerator], columns[denominator]
+    out = np.zeros(len(top))
+    np.divide(top, bottom, out=out, where=(bottom != 0) & ~np.isnan(bottom))
+    out[np.isnan(top)] = np.nan  # -> missing stays missing, it does not become 0
+    return out
+
+
+def _bucket(np, columns: dict, column: str, width: int):
+    return np.floor(columns[column] / width) * width
+
+
+def _normalized(np, columns: dict, column: str):
+    values = columns[column]
+    if np.isnan(values).all():
+        return values
+    low, high = np.nanmin(values), np.nanmax(values)
+    if high == low:
+        return np.where(np.isnan(values), np.nan, 0.0)
+    return (values - low) / (high - low)
+
+
+def _share(np, columns: dict, column: str):
+    values = columns[column]
+    total = np.nansum(values)
+    return values / total * 100 if total else np.zeros(len(values))
+
+
+KINDS = {'ratio': _ratio, 'bucket': _bucket, 'normalized': _normalized, 'share': _share}
+WHOLE_NUMBERS = {'bucket'}  # -> these come back as int, not float
+
+
+def inputs(derived: dict) -> list:
+    names = []
+    for _, *args in derived.values():
+        for arg in args:
+            if isinstance(arg, str) and arg not in names and arg not in derived:
+                names.append(arg)
+    return names
+
+
+def compute_columns(columns: dict, derived: dict) -> dict:
+    # -> columns are numpy float arrays, one per input field, the whole batch is worked out in one go
+    import numpy as np
+    out = {}
+    for name, (kind, *args) in derived.items():
+        if kind not in KINDS:
+            raise ValueError(f"Unknown derived metric {kind} for {name}, can use {', '.join(KINDS)}")
+        out[name] = KINDS[kind](np, {**columns, **out}, *args)  # -> a metric may use one declared before it
+    return out
+
+
+def _column(np, records: list, name: str):
+    try:
+        return np.fromiter(map(itemgetter(name), records), dtype=float, count=len(records))  # -> no python loop
+    except (KeyError, TypeError):
+        return np.array([record.get(name) for record in records], dtype=float)  # -> a field is missing or None
+
+
+def _to_list(np, values, whole: bool) -> list:
+    missing = np.isnan(values)
+    listed = (np.where(missing, 0, values).astype(np.int64) if whole else values).tolist()
+    if missing.any():
+        listed = [None if gone else value for value, gone in zip(listed, missing.tolist())]
+    return listed
+
+
+def add_metrics(records: list, derived: dict) -> list:
+    # -> adds the derived fields to every record dict in place and returns the same list
+    import numpy as np
+    if not records or not derived:
+        return records
+    try:
+        columns = {name: _column(np, records, name) for name in inputs(derived)}
+        for name, values in compute_columns(columns, derived).items():
+            for record, value in zip(records, _to_list(np, values, derived[name][0] in WHOLE_NUMBERS)):
+                record[name] = value
+    except Exception as e:
+        logging.error(f"Failed to work out {', '.join(derived)}: {e}")
+        raise
+    return records
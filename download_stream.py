@@ -0,0 +1,197 @@
+import csv
+import hashlib
+import importlib.util
+import io
+import itertools
+import json
+import logging
+import threading
+import zlib
+
+FORMATS = {'csv': 'text/csv', 'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+DEFAULT_CHUNK_SIZE = 64 * 1024  # -> bytes per piece handed to the compressor and the socket
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+CSV_BATCH = 1000  # -> rows per writerows call, one call per row costs more than the writing
+MAX_SIZES = 256  # -> export lengths remembered for Content-Range, oldest is dropped first
+
+_sizes = {}
+_sizes_lock = threading.Lock()
+_json = json.JSONEncoder(default=str)  # -> json.dumps with default= builds a new encoder for every record
+
+
+def available_encodings() -> list:
+    encodings = ['gzip']
+    if importlib.util.find_spec('zstandard'):
+        encodings.insert(0, 'zstd')  # -> smaller and faster than gzip when the client takes it
+    return encodings
+
+
+def record_fields(records) -> list:
+    # -> json scrapers have no fixed shape, the csv gets every key in the order it first shows up
+    return list(dict.fromkeys(key for record in records for key in record))
+
+
+def _csv_parts(records, fields: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')  # -> same rows columnar_export writes to books.csv
+    writer.writerow(fields)
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, CSV_BATCH))
+        writer.writerows([record.get(field) for field in fields] for record in batch)
+        yield buffer.getvalue()
+        if not batch:
+            return
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _json_parts(records):
+    yield '['
+    for n, record in enumerate(records):
+        yield ('\n' if n == 0 else ',\n') + _json.encode(record)
+    yield '\n]\n'
+
+
+def _ndjson_parts(records):
+    for record in records:
+        yield _json.encode(record) + '\n'
+
+
+def encode_records(records, fmt: str, fields: list = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # -> one record at a time into chunk_size pieces of utf-8, the whole file never exists at once
+    if fmt == 'csv':
+        parts = _csv_parts(records, fields or record_fields(records))
+    elif fmt == 'json':
+        parts = _json_parts(records)
+    elif fmt == 'ndjson':
+        parts = _ndjson_parts(records)
+    else:
+        raise ValueError(f"Unknown format {fmt}, use one of {', '.join(FORMATS)}")
+    buffer = []
+    length = 0
+    for part in parts:
+        data = part.encode('utf-8')
+        buffer.append(data)
+        length += len(data)
+        if length >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def compress(chunks, encoding: str):
+    # -> same data, same level, same bytes, so a resumed download can skip to where it stopped
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # -> 31 is the gzip header, mtime left at 0
+    elif encoding == 'zstd':
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    else:
+        yield from chunks
+        return
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _remember(key: str, size: int):
+    with _sizes_lock:
+        if key not in _sizes and len(_sizes) >= MAX_SIZES:
+            _sizes.pop(next(iter(_sizes)))
+        _sizes[key] = size
+
+
+def _counted(chunks, key: str):
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+        yield chunk
+    _remember(key, size)  # -> only a download that ran to the end knows the length
+
+
+def export_size(key: str, body) -> int:
+    # -> length of what body() sends, from an earlier download or from one pass that throws the bytes away
+    with _sizes_lock:
+        if key in _sizes:
+            return _sizes[key]
+    size = sum(len(chunk) for chunk in body())
+    _remember(key, size)
+    return size
+
+
+def _slice(chunks, start: int, stop: int):
+    offset = 0
+    for chunk in chunks:
+        end = offset + len(chunk)
+        if end > start:
+            yield chunk[max(0, start - offset):stop - offset]
+        offset = end
+        if offset >= stop:
+            return
+
+
+def download_response(name: str, records, stored_at: float, fields: list = None, default_format: str = 'csv',
+                      chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # -> records must be a list or something else that can be read twice, a range needs the length first
+    from flask import Response, request
+    fmt = request.args.get('format', default_format).lower()
+    if fmt not in FORMATS:
+        return f"Unknown format {fmt}, use one of {', '.join(FORMATS)}", 400
+    encoding = request.accept_encodings.best_match(available_encodings()) or 'identity'
+    etag = hashlib.sha1(f"{name}:{stored_at}:{fmt}:{fields}:{encoding}".encode('utf-8')).hexdigest()[:20]
+
+    def body():
+        return compress(encode_records(records, fmt, fields, chunk_size), encoding)
+
+    headers = {
+        'Content-Disposition': f'attachment; filename="{name}.{fmt}"',
+        'Accept-Ranges': 'bytes',
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': 'no-cache'
+    }
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding  # -> ranges count bytes of the compressed file, like nginx does
+    if request.if_none_match.contains(etag):
+        response = Response(status=304, headers=headers)
+    elif request.range is not None and request.if_range.date is None and request.if_range.etag in (None, etag):
+        size = export_size(etag, body)
+        span = request.range.range_for_length(size)  # -> None for several ranges or one past the end
+        if span is None:
+            response = Response(status=416, headers=headers)
+            response.headers['Content-Range'] = f"bytes */{size}"
+        else:
+            start, stop = span
+            response = Response(_slice(body(), start, stop), status=206, mimetype=FORMATS[fmt], headers=headers)
+            response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+            response.content_length = stop - start
+            logging.info(f"Resuming {name}.{fmt} at byte {start} of {size}")
+    else:
+        response = Response(_counted(body(), etag), mimetype=FORMATS[fmt], headers=headers)
+        with _sizes_lock:
+            size = _sizes.get(etag)
+        if size is not None:
+            response.content_length = size  # -> lets the browser show progress once we know it
+    response.set_etag(etag)
+    return response
+
+
+def snapshot_download(source: str, scrape, name: str, shape: str = None, ttl: float = None, pick=None,
+                      default_format: str = 'csv'):
+    # -> /download for a scraper app, the newest scrape in the result cache in the ?format= asked for
+    from background_jobs import accepted
+    from result_cache import get_result_cache
+    cached = get_result_cache().lookup(source, scrape, ttl=ttl)
+    if cached.result is None:
+        return accepted(cached.job)  # -> nothing scraped yet, poll the job then download again
+    fields = None
+    if shape:
+        from columnar_export import SHAPES
+        fields = [field for field, _ in SHAPES[shape]]
+    records = pick(cached.result) if pick else cached.result
+    return cached.mark(download_response(name, records, cached.stored_at, fields, default_format))
@@ -0,0 +1,245 @@
+import importlib.util
+import logging
+import re
+import threading
+
+MULTI_VALUED_ATTRIBUTES = ('class', 'rel', 'rev', 'headers', 'accesskey', 'accept-charset')  # -> lists like in bs4
+
+_backend = None
+_partial = None  # -> None leaves it to the backend, see partial_parsing
+_selectors = {}
+_strainers = {}
+_xpaths = {}
+_compiled = threading.local()  # -> lxml xpath objects must not be shared between threads
+
+
+def available_backends() -> list:
+    backends = ['html.parser']
+    if importlib.util.find_spec('lxml'):
+        backends.insert(0, 'bs4-lxml')
+        if importlib.util.find_spec('cssselect'):
+            backends.insert(0, 'lxml')  # -> native lxml needs cssselect to turn css into xpath
+    return backends
+
+
+def get_backend() -> str:
+    global _backend
+    if _backend is None:
+        _backend = available_backends()[0]
+        logging.info(f"Using {_backend} to parse html")
+    return _backend
+
+
+def set_backend(name: str):
+    global _backend
+    if name not in available_backends():
+        raise ValueError(f"Html parser backend {name} is not installed, can use {available_backends()}")
+    _backend = name
+
+
+def set_partial_parsing(enabled: bool = None):
+    global _partial
+    _partial = enabled  # -> False builds the whole page even when a scraper asks for less, None is the default
+
+
+def partial_parsing(backend: str) -> bool:
+    if _partial is not None:
+        return _partial
+    # -> native lxml builds the whole page in C faster than a python filter can skip it, it only saves memory
+    return backend != 'lxml'
+
+
+def _simple_selector(css: str) -> tuple:
+    # -> only tag, #id, .class and [attr] can be checked while the page is still being read
+    match = re.fullmatch(r'([a-zA-Z][a-zA-Z0-9]*)?((?:[#.][\w-]+)*)((?:\[[\w-]+\])*)', css.strip())
+    if not match or not css.strip():
+        raise ValueError(f"Partial parse needs a simple selector like div.quote, got {css}")
+    tag, marks, attrs = match.groups()
+    ids = re.findall(r'#([\w-]+)', marks)
+    return (tag.lower() if tag else None, ids[0] if ids else None, set(re.findall(r'\.([\w-]+)', marks)),
+            re.findall(r'\[([\w-]+)\]', attrs))
+
+
+def _matches(selectors: list, name: str, attrs) -> bool:
+    attrs = dict(attrs or {})
+    classes = attrs.get('class') or ''
+    classes = set(classes.split() if isinstance(classes, str) else classes)
+    for tag, id_, needed_classes, needed_attrs in selectors:
+        if tag and tag != name:
+            continue
+        if id_ and attrs.get('id') != id_:
+            continue
+        if not needed_classes <= classes:
+            continue
+        if all(attr in attrs for attr in needed_attrs):
+            return True
+    return False
+
+
+def _parsed_selectors(only: str) -> list:
+    if only not in _selectors:
+        _selectors[only] = [_simple_selector(css) for css in only.split(',')]
+    return _selectors[only]
+
+
+def _strainer(only: str):
+    if only not in _strainers:
+        selectors = _parsed_selectors(only)
+        try:
+            from bs4.filter import ElementFilter
+        except ImportError:  # -> bs4 before 4.13 calls a SoupStrainer name function with the raw tag
+            from bs4 import SoupStrainer
+            _strainers[only] = SoupStrainer(lambda name, attrs=None: _matches(selectors, name, attrs))
+        else:
+            class SubtreeFilter(ElementFilter):
+                # -> bs4 only asks this for tags outside a kept subtree, everything inside is kept
+                def allow_tag_creation(self, nsprefix, name, attrs):
+                    return _matches(selectors, name, attrs)
+
+                def allow_string_creation(self, string):
+                    return False
+            _strainers[only] = SubtreeFilter()
+    return _strainers[only]
+
+
+def compile_selector(css: str):
+    # -> every css selector is turned into xpath once and reused by all scrapers
+    compiled = getattr(_compiled, 'selectors', None)
+    if compiled is None:
+        compiled = _compiled.selectors = {}
+    if css not in compiled:
+        from lxml import etree
+        if css not in _xpaths:
+            from cssselect import HTMLTranslator
+            _xpaths[css] = HTMLTranslator().css_to_xpath(css, prefix='descendant::')
+        compiled[css] = etree.XPath(_xpaths[css])
+    return compiled[css]
+
+
+def _class_selector(name: str = None, class_: str = None) -> str:
+    css = name or '*'
+    if class_:
+        css += f'[class="{class_}"]' if ' ' in class_ else f'.{class_}'  # -> bs4 matches a spaced class as a whole
+    return css
+
+
+class LxmlNode:
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    def __bool__(self):
+        return True  # -> lxml elements are falsy without children, bs4 tags are always truthy
+
+    def __eq__(self, other):
+        return isinstance(other, LxmlNode) and other.element is self.element
+
+    def __hash__(self):
+        return hash(self.element)
+
+    def __repr__(self):
+        return f"<LxmlNode {self.name}>"
+
+    @property
+    def name(self) -> str:
+        return self.element.tag if isinstance(self.element.tag, str) else None
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.element.itertext())
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        parts = self.element.itertext()
+        if strip:
+            parts = [part.strip() for part in parts if part.strip()]
+        return separator.join(parts)
+
+    @property
+    def attrs(self) -> dict:
+        return {key: self[key] for key in self.element.attrib}
+
+    def get(self, key: str, default=None):
+        value = self.element.get(key)
+        if value is None:
+            return default
+        return value.split() if key in MULTI_VALUED_ATTRIBUTES else value
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def select(self, css: str) -> list:
+        return [LxmlNode(element) for element in compile_selector(css)(self.element)]
+
+    def select_one(self, css: str):
+        found = compile_selector(css)(self.element)
+        return LxmlNode(found[0]) if found else None
+
+    def find_all(self, name: str = None, class_: str = None) -> list:
+        return self.select(_class_selector(name, class_))
+
+    def find(self, name: str = None, class_: str = None):
+        return self.select_one(_class_selector(name, class_))
+
+
+class _SubtreeTarget:
+    # -> lxml parser target, only the matching subtrees reach the tree builder, the rest of the page is never
+    # -> built, not even in C, same shape as a strained soup
+    def __init__(self, selectors: list):
+        from lxml import etree
+        self.selectors = selectors
+        tags = [tag for tag, _, _, _ in selectors]
+        self.tags = None if None in tags else set(tags)  # -> most tags are turned away on the name alone
+        self.builder = etree.TreeBuilder()
+        self.builder.start('html', {})
+        self.depth = 0  # -> how deep we are inside a kept subtree, 0 is outside
+
+    def start(self, tag, attrib):
+        if self.depth or ((self.tags is None or tag in self.tags) and _matches(self.selectors, tag, attrib)):
+            self.depth += 1
+            self.builder.start(tag, attrib)
+
+    def end(self, tag):
+        if self.depth:
+            self.depth -= 1
+            self.builder.end(tag)
+
+    def data(self, data):
+        if self.depth:
+            self.builder.data(data)
+
+    def comment(self, text):
+        if self.depth:
+            self.builder.comment(text)  # -> keeps itertext the same as on the whole tree
+
+    def close(self):
+        self.builder.end('html')
+        return self.builder.close()
+
+
+def parse_html(markup, backend: str = None, only: str = None):
+    # -> only is a comma list of simple selectors, the rest of the page is never kept
+    backend = backend or get_backend()
+    if backend == 'lxml':
+        import lxml.html
+        from lxml import etree
+        if isinstance(markup, str):
+            markup = markup.encode('utf-8')  # -> lxml refuses str with an xml encoding declaration
+        if only and partial_parsing(backend):
+            target = _SubtreeTarget(_parsed_selectors(only))
+            try:
+                return LxmlNode(etree.fromstring(markup, etree.HTMLParser(target=target, encoding='utf-8')))
+            except etree.XMLSyntaxError:
+                return LxmlNode(target.close())  # -> empty page, same as an empty soup
+        try:
+            root = lxml.html.document_fromstring(markup, parser=lxml.html.HTMLParser(encoding='utf-8'))
+        except etree.ParserError:
+            root = lxml.html.document_fromstring(b'<html></html>')  # -> empty page, same as an empty soup
+        return LxmlNode(root)
+
+    from bs4 import BeautifulSoup
+    parse_only = _strainer(only) if only and partial_parsing(backend) else None
+    return BeautifulSoup(markup, 'lxml' if backend == 'bs4-lxml' else 'html.parser', parse_only=parse_only)
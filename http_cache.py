@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DIR = '.http_cache'
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # -> keep at most 200MB of pages on disk
+
+_SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}  # -> body is stored decoded
+
+
+def parse_cache_control(value: str) -> dict:
+    directives = {}
+    for part in (value or '').split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, _, arg = part.partition('=')
+        directives[name.strip()] = arg.strip().strip('"')
+    return directives
+
+
+def freshness_lifetime(headers) -> int:
+    directives = parse_cache_control(headers.get('Cache-Control', ''))
+    if 'no-cache' in directives:
+        return 0  # -> allowed to store but must ask the site every time
+    try:
+        return max(0, int(directives.get('max-age', 0)))
+    except ValueError:
+        return 0
+
+
+class CacheEntry:
+    def __init__(self, url: str, status: int, headers: dict, body: bytes, stored_at: float, max_age: int):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+        self.max_age = max_age
+
+    def header(self, name: str):
+        for key, value in self.headers.items():
+            if key.lower() == name.lower():
+                return value
+        return None
+
+    def set_header(self, name: str, value: str):
+        for key in [k for k in self.headers if k.lower() == name.lower()]:
+            del self.headers[key]
+        self.headers[name] = value
+
+    @property
+    def etag(self):
+        return self.header('ETag')
+
+    @property
+    def last_modified(self):
+        return self.header('Last-Modified')
+
+    def is_fresh(self, now: float = None) -> bool:
+        return ((now or time.time()) - self.stored_at) < self.max_age
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0  # -> served without touching the network
+        self.revalidated = 0  # -> site answered 304 not modified
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'cache.sqlite3'), check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL,
+                max_age INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+            CREATE TABLE IF NOT EXISTS parsed (
+                url TEXT NOT NULL,
+                key TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (url, key)
+            );
+        """)
+        self.conn.commit()
+
+    def record(self, kind: str):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)  # -> kind is hits, revalidated or misses
+
+    def lookup(self, url: str):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, headers, body, stored_at, max_age FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        return CacheEntry(url, row[0], json.loads(row[1]), row[2], row[3], row[4])
+
+    def store(self, url: str, status: int, headers, body: bytes):
+        directives = parse_cache_control(headers.get('Cache-Control', ''))
+        if 'no-store' in directives:
+            return
+        max_age = freshness_lifetime(headers)
+        if not (max_age or headers.get('ETag') or headers.get('Last-Modified')):
+            return  # -> nothing to revalidate with, so keeping it would only waste space
+        kept = {k: v for k, v in headers.items() if k.lower() not in _SKIP_HEADERS}
+        now = time.time()
+        with self._lock:
+            self.conn.execute("DELETE FROM parsed WHERE url = ?", (url,))  # -> new body, old parse is stale
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, body, stored_at, max_age, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, status, json.dumps(kept), body, now, max_age, now, len(body))
+            )
+            self.conn.commit()
+            self._evict()
+
+    def refresh(self, url: str, headers) -> CacheEntry:
+        # -> 304 came back, body is still good so only restart the freshness clock
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        for name in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires', 'Date'):
+            if name in headers:
+                entry.set_header(name, headers[name])
+        entry.stored_at = time.time()
+        entry.max_age = freshness_lifetime({'Cache-Control': entry.header('Cache-Control')})
+        with self._lock:
+            self.conn.execute(
+                "UPDATE responses SET headers = ?, stored_at = ?, max_age = ? WHERE url = ?",
+                (json.dumps(entry.headers), entry.stored_at, entry.max_age, url)
+            )
+            self.conn.commit()
+        return entry
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for url, size in self.conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.conn.execute("DELETE FROM parsed WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        self.conn.commit()
+        logging.info(f"Evicted {evicted} pages from http cache")
+
+    def get_parsed(self, url: str, key: str):
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM parsed WHERE url = ? AND key = ?", (url, key)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def put_parsed(self, url: str, key: str, data):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO parsed (url, key, data) "
+                "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM responses WHERE url = ?)",
+                (url, key, pickle.dumps(data), url)
+            )  # -> only keep a parse while its page is still cached
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            'entries': count,
+            'bytes': size,
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses
+        }
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.execute("DELETE FROM parsed")
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,287 @@
+import contextvars
+import importlib.util
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_PER_HOST = 8  # -> how many requests we send to one site at the same time
+DEFAULT_TIMEOUT = 15  # -> seconds to wait for a site before giving up
+DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}  # -> pretend to be a browser
+MAX_RETRIES = 2  # -> how many times we try again after a 429 or 503
+
+
+def _accept_encoding() -> str:
+    # -> only ask for brotli if urllib3 can decode it
+    if importlib.util.find_spec('brotli') or importlib.util.find_spec('brotlicffi'):
+        return 'gzip, deflate, br'
+    return 'gzip, deflate'
+
+
+class ConnectionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host: str) -> dict:
+        if host not in self._hosts:
+            self._hosts[host] = {'requests': 0, 'new_connections': 0}
+        return self._hosts[host]
+
+    def record_request(self, host: str):
+        with self._lock:
+            self._host(host)['requests'] += 1
+
+    def record_new_connection(self, host: str):
+        with self._lock:
+            self._host(host)['new_connections'] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            report = {}
+            for host, counts in self._hosts.items():
+                report[host] = {
+                    'requests': counts['requests'],
+                    'new_connections': counts['new_connections'],
+                    'reused': max(0, counts['requests'] - counts['new_connections'])
+                }
+            return report
+
+
+def _make_adapter(stats: ConnectionStats, pool_size: int):
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def counting(pool_class):
+        class CountingConnection(pool_class.ConnectionCls):
+            def connect(self):
+                stats.record_new_connection(self.host)  # -> every new tcp/tls handshake lands here
+                return super().connect()
+
+        class CountingPool(pool_class):
+            ConnectionCls = CountingConnection
+        return CountingPool
+
+    class CountingAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': counting(HTTPConnectionPool),
+                'https': counting(HTTPSConnectionPool)
+            }
+
+    return CountingAdapter(pool_connections=16, pool_maxsize=pool_size)
+
+
+def _cached_response(entry, url: str):
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+    response = Response()
+    response.status_code = entry.status
+    response.reason = 'OK'
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = entry.body
+    response.url = url
+    response.from_cache = True
+    response.cache_url = url
+    return response
+
+
+class HttpClient:
+    def __init__(self, headers: dict = None, timeout: float = DEFAULT_TIMEOUT,
+                 pool_size: int = DEFAULT_MAX_PER_HOST, host_pool_sizes: dict = None, cache=None,
+                 rate_limiter=None, max_retries: int = MAX_RETRIES):
+        import requests
+        self.timeout = timeout
+        self.cache = cache  # -> http_cache.HttpCache or None to always go to the site
+        self.rate_limiter = rate_limiter  # -> rate_limiter.RateLimiter or None to send as fast as asked
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.stats = ConnectionStats()
+        self._lock = threading.Lock()
+        self._host_pool_sizes = {}
+        self.session = requests.Session()  # -> one session keeps connections alive between pages
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.session.headers['Accept-Encoding'] = _accept_encoding()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = _make_adapter(self.stats, pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        for host, size in (host_pool_sizes or {}).items():
+            self.set_pool_size(host, size)
+
+    def set_pool_size(self, host: str, size: int):
+        with self._lock:
+            adapter = _make_adapter(self.stats, size)
+            self.session.mount(f"http://{host}/", adapter)  # -> longer prefix wins over the default adapter
+            self.session.mount(f"https://{host}/", adapter)
+            self._host_pool_sizes[host] = size
+        logging.info(f"Set connection pool for {host} to {size}")
+
+    def ensure_pool_size(self, host: str, size: int):
+        if size > self._host_pool_sizes.get(host, self.pool_size):
+            self.set_pool_size(host, size)  # -> grow the pool so parallel fetches dont drop connections
+
+    def _send(self, url: str, **kwargs):
+        from rate_limiter import THROTTLE_STATUSES, parse_retry_after
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            limiter = self.rate_limiter.host(host) if self.rate_limiter else None
+            if limiter:
+                limiter.acquire()  # -> waits for a free slot, a token and any Retry-After
+            status = None
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, **kwargs)
+                status = response.status_code
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            finally:
+                if limiter:
+                    limiter.release(status, time.perf_counter() - start, retry_after)
+            self.stats.record_request(urlsplit(response.url).hostname or urlsplit(url).hostname)
+            if status not in THROTTLE_STATUSES or attempt == self.max_retries:
+                break
+            logging.warning(f"{host} answered {status}, trying again")
+            if limiter is None:
+                time.sleep(retry_after or 1)
+        response.from_cache = False
+        response.cache_url = url
+        return response
+
+    def get(self, url: str, **kwargs):
+        from background_jobs import report_progress
+        response = self._get(url, **kwargs)
+        report_progress(pages=1)  # -> counts toward the scrape job this fetch is part of, if any
+        return response
+
+    def _get(self, url: str, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.cache is None:
+            return self._send(url, **kwargs)
+
+        entry = self.cache.lookup(url)
+        if entry is not None and entry.is_fresh():
+            self.cache.record('hits')  # -> max-age not over yet, no need to ask the site
+            return _cached_response(entry, url)
+        if entry is not None and entry.validators():
+            headers = dict(kwargs.get('headers') or {})
+            headers.update(entry.validators())  # -> ask the site if the page changed
+            kwargs['headers'] = headers
+
+        response = self._send(url, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.record('revalidated')
+            entry = self.cache.refresh(url, response.headers) or entry
+            return _cached_response(entry, url)
+
+        self.cache.record('misses')
+        if response.status_code == 200:
+            self.cache.store(url, response.status_code, response.headers, response.content)
+        return response
+
+    def parse(self, response, key: str, parse):
+        # -> page did not change since last run so reuse what we parsed then
+        if self.cache is None:
+            return parse(response)
+        url = getattr(response, 'cache_url', response.url)
+        if getattr(response, 'from_cache', False):
+            parsed = self.cache.get_parsed(url, key)
+            if parsed is not None:
+                return parsed
+        parsed = parse(response)
+        if parsed is not None:
+            self.cache.put_parsed(url, key, parsed)
+        return parsed
+
+    def connection_stats(self) -> dict:
+        return self.stats.snapshot()
+
+    def host_limits(self) -> dict:
+        # -> current concurrency, rate and latency per site
+        return self.rate_limiter.limits() if self.rate_limiter else {}
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            logging.info(f"Http cache stats: {self.cache.stats()}")
+            self.cache.close()
+        if self.rate_limiter is not None:
+            logging.info(f"Host limits: {self.host_limits()}")
+        logging.info(f"Closed http client, connection stats: {self.connection_stats()}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            from http_cache import HttpCache
+            from rate_limiter import RateLimiter
+            _client = HttpClient(cache=HttpCache(), rate_limiter=RateLimiter())  # -> shared by every scraper
+        return _client
+
+
+def http_stats() -> dict:
+    # -> what close() logs, for the /http-stats route of the apps, the shared client is never closed while serving
+    client = get_client()
+    return {'connections': client.connection_stats(), 'hosts': client.host_limits(),
+            'cache': client.cache.stats() if client.cache is not None else None}
+
+
+def set_client(client: HttpClient) -> HttpClient:
+    # -> swap in another client, e.g. one without cache for benchmarks, gives back the old one
+    global _client
+    with _client_lock:
+        old, _client = _client, client
+    return old
+
+
+_host_semaphores = {}
+
+
+def host_semaphore(host: str, limit: int) -> threading.BoundedSemaphore:
+    # -> shared by every fetch_all call so pages crawled at the same time still respect the cap
+    with _client_lock:
+        key = (host, max(1, limit))
+        if key not in _host_semaphores:
+            _host_semaphores[key] = threading.BoundedSemaphore(key[1])
+        return _host_semaphores[key]
+
+
+def fetch_all(urls: list, max_per_host: int = DEFAULT_MAX_PER_HOST, **kwargs) -> list:
+    from concurrent.futures import ThreadPoolExecutor
+    if not urls:
+        return []
+
+    client = get_client()
+    semaphores = {}
+    for url in urls:
+        host = urlsplit(url).netloc
+        if host not in semaphores:
+            semaphores[host] = host_semaphore(host, max_per_host)  # -> cap per site
+            client.ensure_pool_size(host, max_per_host)
+
+    def fetch(url):
+        with semaphores[urlsplit(url).netloc]:
+            try:
+                response = client.get(url, **kwargs)
+                response.raise_for_status()
+                return response
+            except Exception as e:
+                logging.warning(f"Failed to fetch {url}: {e}")
+                return e  # -> give back the error in the same slot so caller decides
+
+    workers = min(len(urls), max(1, max_per_host) * len(semaphores))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # -> every fetch runs in a copy of our context so its page counts toward the same scrape job
+        futures = [pool.submit(contextvars.copy_context().run, fetch, url) for url in urls]
+        results = [future.result() for future in futures]  # -> same order as urls
+    logging.info(f"Fetched {len(urls)} pages with up to {max_per_host} per host")
+    return results
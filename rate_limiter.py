@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+
+THROTTLE_STATUSES = (429, 503)  # -> site tells us to slow down
+SPIKE_FACTOR = 2.0  # -> latency this many times over normal counts as overload
+DECREASE_COOLDOWN = 1.0  # -> seconds between two cuts so one burst of errors only cuts once
+
+
+def parse_retry_after(value) -> float:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())  # -> http date form
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    def __init__(self, host: str, concurrency: int = 2, max_concurrency: int = 32, rate: float = 5.0,
+                 max_rate: float = 100.0, min_rate: float = 0.5):
+        self.host = host
+        self.concurrency = concurrency  # -> requests allowed in flight at once, grows and shrinks (AIMD)
+        self.max_concurrency = max_concurrency
+        self.rate = rate  # -> tokens per second in the bucket, grows and shrinks with concurrency
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.tokens = float(concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.fast_latency = None  # -> follows the last few responses
+        self.slow_latency = None  # -> what normal looks like for this site
+        self.responses = 0
+        self.throttled = 0
+        self._good_in_window = 0
+        self._slow_start = True  # -> double until the site first pushes back, then add one at a time
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        burst = max(1.0, float(self.concurrency))
+        self.tokens = min(burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now  # -> Retry-After told us to wait
+                elif self.in_flight >= self.concurrency:
+                    wait = None  # -> wait for a request to finish
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                self._cond.wait(timeout=wait)
+
+    def release(self, status: int = None, latency: float = None, retry_after: float = None):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+                self._decrease(now, f"got {status}")
+            elif status is not None and latency is not None:
+                self.responses += 1
+                self._observe(latency)
+                if self._is_spike():
+                    self._decrease(now, f"latency {self.fast_latency * 1000:.0f}ms")
+                else:
+                    self._good_in_window += 1
+                    if self._good_in_window >= self.concurrency:
+                        self._increase()  # -> a full window went fine, try one more
+            self._cond.notify_all()
+
+    def _observe(self, latency: float):
+        if self.fast_latency is None:
+            self.fast_latency = self.slow_latency = latency
+            return
+        self.fast_latency = 0.7 * self.fast_latency + 0.3 * latency
+        self.slow_latency = 0.95 * self.slow_latency + 0.05 * latency
+
+    def _is_spike(self) -> bool:
+        return self.responses >= 5 and self.fast_latency > SPIKE_FACTOR * self.slow_latency
+
+    def _increase(self):
+        self._good_in_window = 0
+        if self._slow_start:
+            self.concurrency = min(self.max_concurrency, self.concurrency * 2)
+            self.rate = min(self.max_rate, self.rate * 2)
+        else:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            self.rate = min(self.max_rate, self.rate + 1.0)
+
+    def _decrease(self, now: float, reason: str):
+        self._good_in_window = 0
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self._slow_start = False
+        self.concurrency = max(1, self.concurrency // 2)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.fast_latency = self.slow_latency  # -> start measuring again from normal
+        logging.warning(f"Slowing down {self.host} ({reason}): concurrency {self.concurrency}, "
+                        f"rate {self.rate:.1f}/s")
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                'concurrency': self.concurrency,
+                'rate': round(self.rate, 2),
+                'in_flight': self.in_flight,
+                'latency_ms': round(self.fast_latency * 1000, 1) if self.fast_latency is not None else None,
+                'baseline_ms': round(self.slow_latency * 1000, 1) if self.slow_latency is not None else None,
+                'responses': self.responses,
+                'throttled': self.throttled,
+                'blocked_for': round(max(0.0, self.blocked_until - time.monotonic()), 2)
+            }
+
+
+class RateLimiter:
+    def __init__(self, **host_defaults):
+        self.host_defaults = host_defaults  # -> passed to every new HostLimiter
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def host(self, host: str) -> HostLimiter:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostLimiter(host, **self.host_defaults)
+            return self._hosts[host]
+
+    def limits(self) -> dict:
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: limiter.snapshot() for host, limiter in hosts.items()}
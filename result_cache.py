@@ -0,0 +1,184 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+DEFAULT_RESULT_DIR = '.result_cache'
+DEFAULT_TTL = 600  # -> seconds a scrape counts as fresh, after that it is served stale while a new one runs
+RETRY_FAILED = 60  # -> seconds before we try again after a refresh failed, so a broken site is not hit on every GET
+
+
+class EmptyScrape(Exception):
+    pass
+
+
+def is_empty(result) -> bool:
+    # -> scrapers log fetch errors and give back [] (wiki gives ([], {}, [])), that is no data, not new data
+    if result is None:
+        return True
+    if isinstance(result, tuple):
+        return all(is_empty(part) for part in result)
+    return hasattr(result, '__len__') and len(result) == 0
+
+
+class CachedResult:
+    def __init__(self, source: str, result, stored_at: float, state: str, job=None):
+        self.source = source
+        self.result = result  # -> None when nothing was ever scraped for this source
+        self.stored_at = stored_at
+        self.state = state  # -> fresh, stale or miss
+        self.job = job  # -> the refresh started or joined by this lookup, if any
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at if self.stored_at else None
+
+    def mark(self, response):
+        # -> lets the browser and anyone with curl see how old the data is
+        from flask import make_response
+        response = make_response(response)
+        response.headers['X-Cache'] = self.state
+        if self.stored_at:
+            response.headers['Age'] = str(int(self.age))
+        return response
+
+
+class ResultCache:
+    def __init__(self, directory: str = DEFAULT_RESULT_DIR, ttl: float = DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.fresh = 0
+        self.stale = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self._lock = threading.Lock()
+        self._memory = {}  # -> source -> (stored_at, result), so a hit never unpickles
+        self._failed_at = {}
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'results.sqlite3'), check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                source TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                stored_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def _entry(self, source: str):
+        # -> from memory, or from disk the first time after a restart
+        if source not in self._memory:
+            row = self.conn.execute("SELECT data, stored_at FROM results WHERE source = ?", (source,)).fetchone()
+            self._memory[source] = (row[1], pickle.loads(row[0])) if row else None
+        return self._memory[source]
+
+    def preload(self) -> int:
+        # -> unpickles every stored result now, so the first GET after a restart does not
+        with self._lock:
+            sources = [row[0] for row in self.conn.execute("SELECT source FROM results").fetchall()]
+            for source in sources:
+                self._entry(source)
+        return len(sources)
+
+    def put(self, source: str, result, stored_at: float = None):
+        stored_at = stored_at or time.time()
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO results (source, data, stored_at) VALUES (?, ?, ?)",
+                              (source, data, stored_at))
+            self.conn.commit()
+            self._memory[source] = (stored_at, result)
+            self._failed_at.pop(source, None)
+        logging.info(f"Cached {source} result, {len(data)} bytes")
+
+    def refresh(self, source: str, scrape) -> tuple:
+        # -> scrape on the job runner and keep the result, gives back (job, merged) like JobRunner.submit
+        from background_jobs import get_runner
+
+        def run():
+            try:
+                result = scrape()
+                if is_empty(result):
+                    raise EmptyScrape(f"Scrape of {source} came back empty, kept the last result")
+            except Exception:
+                with self._lock:
+                    self.failed_refreshes += 1
+                    self._failed_at[source] = time.time()
+                raise
+            self.put(source, result)
+            return result
+
+        job, merged = get_runner().submit(source, run)
+        if not merged:
+            with self._lock:
+                self.refreshes += 1
+        return job, merged
+
+    def lookup(self, source: str, scrape, ttl: float = None) -> CachedResult:
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            entry = self._entry(source)
+            if entry is None:
+                state = 'miss'
+                self.misses += 1
+            elif now - entry[0] < ttl:
+                self.fresh += 1
+                return CachedResult(source, entry[1], entry[0], 'fresh')  # -> nothing to start, fast path
+            else:
+                state = 'stale'
+                self.stale += 1
+            if state == 'stale' and now - self._failed_at.get(source, 0) < RETRY_FAILED:
+                return CachedResult(source, entry[1], entry[0], state)  # -> last refresh failed just now, wait
+        job, _ = self.refresh(source, scrape)  # -> at most one runs per source, later lookups join it
+        if entry is None:
+            return CachedResult(source, None, None, state, job)
+        return CachedResult(source, entry[1], entry[0], state, job)
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            rows = self.conn.execute("SELECT source, stored_at, LENGTH(data) FROM results ORDER BY source").fetchall()
+            served = self.fresh + self.stale + self.misses
+            return {
+                'fresh': self.fresh,
+                'stale': self.stale,
+                'misses': self.misses,
+                'hit_ratio': round((self.fresh + self.stale) / served, 3) if served else None,
+                'refreshes': self.refreshes,
+                'failed_refreshes': self.failed_refreshes,
+                'ttl': self.ttl,
+                'sources': {source: {'age': round(now - stored_at, 1), 'bytes': size}
+                            for source, stored_at, size in rows}  # -> age in seconds of what each page shows
+            }
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM results")
+            self.conn.commit()
+            self._memory.clear()
+
+    def close(self):
+        self.conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
+
+
+def set_result_cache(cache: ResultCache) -> ResultCache:
+    global _cache
+    with _cache_lock:
+        old, _cache = _cache, cache
+    return old
@@ -0,0 +1,152 @@
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)  # -> the scraper apps import the shared modules from the repo root
+logging.basicConfig(
+    filename='scrape_service.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)  # -> before any source loads, the first basicConfig in a process is the one that counts
+
+SOURCES = {}  # -> name -> where its flask app lives and which scraper class it runs
+
+
+def register(name: str, path: str, scraper: str):
+    # -> a new site is one more register() call, its app is served under /<name>/
+    SOURCES[name] = {'path': path if os.path.isabs(path) else os.path.join(ROOT, path), 'scraper': scraper}
+
+
+register('task1', 'TASK_1_web_scraping.py', 'BookScraper')
+register('task2', 'TASK_2_web_scraping.py', 'JobScraper')
+register('task3', 'TASK_3_web_scraping.py', 'CryptoScraper')
+register('books', '15_scrapped_files/book_scraper.py', 'BookScraper')
+register('quotes', '15_scrapped_files/quote_scraper (1).py', 'QuoteScraper')
+register('olx', '15_scrapped_files/olx_scraper.py', 'OLXScraper')
+register('flipkart', '15_scrapped_files/flipkart_scraper.py', 'FlipkartScraper')
+register('imdb', '15_scrapped_files/imdb_scraper.py', 'IMDBScraper')
+register('wiki', '15_scrapped_files/wiki_scraper.py', 'WikiScraper')
+register('amazon', '15_scrapped_files/amazon_scraper.py', 'AmazonScraper')
+register('coinmarketcap', '15_scrapped_files/coinmarketcap_scraper.py', 'CoinMarketCapScraper')
+register('goodreads', '15_scrapped_files/goodreads_scraper.py', 'GoodreadsScraper')
+register('googlenews', '15_scrapped_files/googlenews_scraper.py', 'GoogleNewsScraper')
+register('indeed', '15_scrapped_files/indeed_scraper.py', 'IndeedScraper')
+register('linkedin', '15_scrapped_files/linkedin_scraper.py', 'LinkedInScraper')
+register('reddit', '15_scrapped_files/reddit_scraper.py', 'RedditScraper')
+register('twitter', '15_scrapped_files/twitter_scraper.py', 'TwitterScraper')
+register('weather', '15_scrapped_files/weather_scraper.py', 'WeatherScraper')
+
+_modules = {}
+_load_seconds = {}
+_lock = threading.Lock()
+
+
+def module_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0].replace(' ', '_').replace('(', '').replace(')', '')
+
+
+def load_source(name: str):
+    # -> imports the app file on first use, so selenium, pandas and friends only load for sources people open
+    with _lock:
+        if name not in _modules:
+            if name not in SOURCES:
+                raise KeyError(f"No source {name}, have {', '.join(SOURCES)}")
+            path = SOURCES[name]['path']
+            start = time.perf_counter()
+            try:
+                spec = importlib.util.spec_from_file_location(module_name(path), path)
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[spec.name] = module
+                spec.loader.exec_module(module)
+            except Exception as e:
+                sys.modules.pop(module_name(path), None)
+                logging.error(f"Failed to load source {name}: {e}")
+                raise
+            _modules[name] = module
+            _load_seconds[name] = time.perf_counter() - start
+            logging.info(f"Loaded source {name} in {_load_seconds[name] * 1000:.0f} ms")
+        return _modules[name]
+
+
+def scraper_class(name: str):
+    return getattr(load_source(name), SOURCES[name]['scraper'])
+
+
+def loaded() -> dict:
+    with _lock:
+        return {name: round(seconds * 1000, 1) for name, seconds in _load_seconds.items()}
+
+
+def warm_up_steps() -> list:
+    # -> everything a first request would pay for, run by warm_up once the server listens
+    from warm_up import preload
+
+    def parser():
+        from html_parser import parse_html
+        parse_html('<html></html>')
+
+    def results():
+        from result_cache import get_result_cache
+        get_result_cache().preload()
+
+    def charts():
+        from chart_service import get_charts
+        get_charts().warm()
+
+    steps = [('imports', preload), ('parser', parser), ('result cache', results)]
+    steps += [(f"source {name}", lambda name=name: load_source(name)) for name in SOURCES]
+    steps.append(('chart processes', charts))
+    return steps
+
+
+class SourceDispatcher:
+    # -> wsgi app, /<source>/... goes to that source's own flask app with /<source> moved into SCRIPT_NAME
+    def __init__(self, default_app):
+        self.default_app = default_app
+
+    def __call__(self, environ, start_response):
+        name, _, rest = environ.get('PATH_INFO', '').lstrip('/').partition('/')
+        if name not in SOURCES:
+            return self.default_app(environ, start_response)
+        try:
+            app = load_source(name).app
+        except Exception as e:
+            start_response('503 Service Unavailable', [('Content-Type', 'text/plain; charset=utf-8')])
+            return [f"Source {name} could not load: {e}".encode('utf-8')]
+        environ['SCRIPT_NAME'] = f"{environ.get('SCRIPT_NAME', '')}/{name}"
+        environ['PATH_INFO'] = f"/{rest}"
+        return app(environ, start_response)
+
+
+def create_app():
+    from flask import Flask, jsonify
+    service = Flask(__name__)
+
+    @service.route('/')
+    def sources():
+        done = loaded()
+        return jsonify({name: {'scraper': source['scraper'], 'url': f"/{name}/", 'loaded_ms': done.get(name)}
+                        for name, source in SOURCES.items()})
+
+    @service.route('/service-stats')
+    def service_stats():
+        import warm_up
+        heavy = ('pandas', 'numpy', 'matplotlib', 'bs4', 'lxml', 'selenium', 'pyarrow')
+        return jsonify({'loaded': loaded(), 'modules': len(sys.modules),
+                        'heavy_imports': [name for name in heavy if name in sys.modules],
+                        'warm_up': warm_up.status()})
+
+    service.wsgi_app = SourceDispatcher(service.wsgi_app)  # -> flask still handles / and /service-stats
+    return service
+
+
+app = create_app()
+
+if __name__ == '__main__':
+    from warm_up import warm_up_when_serving
+    warm_up_when_serving(warm_up_steps(), port=5000)
+    app.run(threaded=True)
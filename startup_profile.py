@@ -0,0 +1,152 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BEGIN = 'startup-profile: begin'
+END = 'startup-profile: end'
+
+# -> runs under python -X importtime, only the imports between the two markers belong to the entry point
+CHILD = f"""
+import importlib.util, json, os, sys, time
+path, warm = sys.argv[1], sys.argv[2] == '1'
+sys.path.insert(0, sys.argv[3])
+name = os.path.splitext(os.path.basename(path))[0].replace(' ', '_').replace('(', '').replace(')', '')
+print({BEGIN!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location(name, path)
+module = importlib.util.module_from_spec(spec)
+sys.modules[name] = module
+spec.loader.exec_module(module)
+loaded = time.perf_counter()
+if warm:
+    sys._xoptions.pop('importtime', None)  # -> chart render processes would print their own imports into ours
+    from warm_up import run_steps
+    run_steps(module.warm_up_steps())
+done = time.perf_counter()
+print({END!r}, file=sys.stderr, flush=True)
+print(json.dumps({{'load_ms': (loaded - start) * 1000, 'warm_ms': (done - loaded) * 1000,
+                  'modules': len(sys.modules)}}))
+"""
+
+
+def entry_points() -> dict:
+    # -> the service, the service after its warm-up, and every app on its own
+    from scrape_service import SOURCES
+    service = os.path.join(ROOT, 'scrape_service.py')
+    entries = {'service': {'path': service, 'warm': False}, 'service-warm': {'path': service, 'warm': True}}
+    entries.update({name: {'path': source['path'], 'warm': False} for name, source in SOURCES.items()})
+    return entries
+
+
+def parse_importtime(text: str) -> list:
+    # -> "import time: self [us] | cumulative | imported package", nesting is two spaces per level
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # -> the header line
+        indent = len(fields[2]) - len(fields[2].lstrip())
+        rows.append({'module': fields[2].strip(), 'self_us': int(fields[0]), 'cumulative_us': int(fields[1]),
+                     'depth': max(0, (indent - 1) // 2)})
+    return rows
+
+
+def top_imports(rows: list, count: int = 10) -> list:
+    # -> what the entry point pulled in directly, with everything under it
+    first = [row for row in rows if row['depth'] == 0]
+    return sorted(first, key=lambda row: row['cumulative_us'], reverse=True)[:count]
+
+
+def profile_entry(path: str, warm: bool = False) -> dict:
+    start = time.perf_counter()
+    done = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, path, '1' if warm else '0', ROOT],
+                          capture_output=True, text=True, cwd=tempfile.mkdtemp())  # -> apps write logs there
+    wall = time.perf_counter() - start
+    inside = done.stderr.partition(BEGIN)[2].partition(END)[0]
+    rows = parse_importtime(inside)
+    result = {
+        'wall_ms': round(wall * 1000, 1),
+        'import_ms': round(sum(row['cumulative_us'] for row in rows if row['depth'] == 0) / 1000, 1),
+        'imports': rows
+    }
+    if done.returncode != 0:
+        errors = [line for line in done.stderr.splitlines() if line.strip() and not line.startswith('import time:')]
+        result['error'] = errors[-1] if errors else f"exit code {done.returncode}"
+        logging.error(f"Startup profile of {path} failed: {result['error']}")
+        return result
+    result.update({key: round(value, 1) if isinstance(value, float) else value
+                   for key, value in json.loads(done.stdout.strip().splitlines()[-1]).items()})
+    return result
+
+
+def profile(names: list = None) -> dict:
+    entries = entry_points()
+    for name in names or []:
+        if name not in entries:
+            raise KeyError(f"No entry point {name}, have {', '.join(entries)}")
+    return {name: profile_entry(entries[name]['path'], entries[name]['warm']) for name in names or entries}
+
+
+def load_budget(path: str) -> dict:
+    # -> {"default_ms": ..., "entries": {name: ms}}, milliseconds to load the entry point plus its warm-up
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def over_budget(results: dict, budget: dict) -> list:
+    over = []
+    for name, result in results.items():
+        if 'error' in result:
+            over.append(f"{name} could not start: {result['error']}")  # -> a crash at startup fails like a slow one
+            continue
+        limit = budget.get('entries', {}).get(name, budget.get('default_ms'))
+        took = result['load_ms'] + result['warm_ms']
+        if limit is not None and took > limit:
+            over.append(f"{name} took {took:.0f} ms to start, budget is {limit} ms")
+    return over
+
+
+def print_report(results: dict, top: int = 5):
+    print(f"{'entry point':16}{'wall ms':>10}{'load ms':>10}{'warm ms':>10}{'imports ms':>12}{'modules':>9}")
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name:16}{result['wall_ms']:10.0f}   could not start: {result['error']}")
+            continue
+        print(f"{name:16}{result['wall_ms']:10.0f}{result['load_ms']:10.0f}{result['warm_ms']:10.0f}"
+              f"{result['import_ms']:12.0f}{result['modules']:9}")
+        for row in top_imports(result['imports'], top):
+            print(f"{'':18}{row['cumulative_us'] / 1000:8.1f} ms  {row['module']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per module import time of every entry point, like -X importtime")
+    parser.add_argument('entries', nargs='*', help="default all, see scrape_service.SOURCES plus service, "
+                                                   "service-warm")
+    parser.add_argument('--top', type=int, default=5, help="slowest direct imports to show per entry point")
+    parser.add_argument('--budget', default=None, help="json budget file, exit 1 when an entry point goes over")
+    parser.add_argument('--output', default=None, help="write the full breakdown to this json file")
+    options = parser.parse_args()
+
+    results = profile(options.entries)
+    print_report(results, options.top)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if options.budget:
+        over = over_budget(results, load_budget(options.budget))
+        for line in over:
+            print(f"OVER BUDGET: {line}")
+        if over:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+
+DEFAULT_TEMPLATE_DIR = 'templates'
+DEFAULT_BYTECODE_DIR = '.jinja_cache'  # -> compiled templates, a restarted app skips parsing them again
+DEFAULT_CHUNK_SIZE = 16 * 1024  # -> characters per write, jinja yields many tiny strings
+
+
+def dev_mode() -> bool:
+    # -> FLASK_DEBUG=1 is what flask run --debug sets, only then do we look for edited templates
+    return os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes')
+
+
+def make_environment(folder: str = DEFAULT_TEMPLATE_DIR, bytecode_dir: str = DEFAULT_BYTECODE_DIR,
+                     auto_reload: bool = None):
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+    os.makedirs(bytecode_dir, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(folder),
+        bytecode_cache=FileSystemBytecodeCache(bytecode_dir),
+        auto_reload=dev_mode() if auto_reload is None else auto_reload  # -> off, no stat() of the file per render
+    )
+
+
+def precompile(env) -> int:
+    # -> loads every template once so the first request does not pay for parsing and compiling
+    names = env.list_templates(extensions=('html',))
+    for name in names:
+        try:
+            env.get_template(name)
+        except Exception as e:
+            logging.error(f"Failed to compile template {name}: {e}")
+            raise
+    logging.info(f"Compiled {len(names)} templates")
+    return len(names)
+
+
+_environments = {}
+_environments_lock = threading.Lock()
+
+
+def get_environment(folder: str = DEFAULT_TEMPLATE_DIR):
+    # -> one environment per template folder for the whole process, it keeps the compiled templates
+    key = os.path.abspath(folder)
+    with _environments_lock:
+        if key not in _environments:
+            env = make_environment(folder)
+            precompile(env)
+            _environments[key] = env
+        return _environments[key]
+
+
+def get_template(name: str, folder: str = DEFAULT_TEMPLATE_DIR):
+    return get_environment(folder).get_template(name)
+
+
+def app_templates(app) -> str:
+    # -> templates/<app name>/ when the app brings its own report.html, apps in one service would clash otherwise
+    folder = os.path.join(app.root_path, app.template_folder or DEFAULT_TEMPLATE_DIR)
+    own = os.path.join(folder, app.name)
+    return own if os.path.isdir(own) else folder
+
+
+def context_etag(template, context: dict):
+    # -> same template file and same data means the same page, so we can tell without rendering it
+    try:
+        digest = hashlib.sha1(pickle.dumps(context, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception as e:
+        logging.warning(f"No ETag for {template.name}, data does not pickle: {e}")
+        return None
+    digest.update(template.name.encode('utf-8'))
+    if template.filename and os.path.exists(template.filename):
+        digest.update(str(os.path.getmtime(template.filename)).encode('utf-8'))
+    return digest.hexdigest()[:20]
+
+
+def _chunks(parts, size: int):
+    buffer = []
+    length = 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def report_response(name: str, chunk_size: int = DEFAULT_CHUNK_SIZE, **context):
+    # -> the page goes to the browser while later rows are still rendering, nothing is written to disk
+    from flask import Response, current_app, request
+    template = get_template(name, app_templates(current_app))
+    etag = context_etag(template, context)
+    if etag and request.if_none_match.contains(etag):
+        response = Response(status=304)  # -> browser already has this page
+    else:
+        response = Response(_chunks(template.generate(**context), chunk_size), mimetype='text/html')
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'  # -> keep it, but ask every time with If-None-Match
+    return response
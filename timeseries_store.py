@@ -0,0 +1,272 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_STORE_PATH = 'crypto_history.sqlite3'
+CHUNK_SIZE = 256  # -> snapshots of one coin packed into one row
+FIELDS = ('price', 'change_24h', 'change_7d', 'market_cap')
+SCALES = (10 ** 8, 100, 100, 1)  # -> fixed point so deltas are whole numbers, 1e-8 for cheap coins
+RESOLUTIONS = {'1m': 60, '1h': 3600, '1d': 86400}  # -> rollup bucket width in seconds
+
+
+def _zigzag(n: int) -> int:
+    return n * 2 if n >= 0 else -n * 2 - 1  # -> small negative deltas stay small
+
+
+def _unzigzag(n: int) -> int:
+    return n // 2 if n % 2 == 0 else -(n + 1) // 2
+
+
+def _put_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data: bytes, pos: int) -> tuple:
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+class Chunk:
+    # -> one column of deltas per value, with the time first
+    # -> every value is stored as the difference to the one before, so a price that barely moved takes a byte or two
+    def __init__(self):
+        self.columns = [bytearray() for _ in range(len(FIELDS) + 1)]
+        self.last = [0] * (len(FIELDS) + 1)  # -> scaled value the next delta is taken from
+        self.count = 0
+        self.start_ts = None
+        self.end_ts = None
+
+    def append(self, point: tuple):
+        # -> point is (ts_ms, price, change_24h, change_7d, market_cap), only the new point gets encoded
+        _put_varint(self.columns[0], _zigzag(point[0] - self.last[0]))
+        self.last[0] = point[0]
+        for column, scale in enumerate(SCALES, start=1):
+            value = point[column]
+            if value is None:
+                _put_varint(self.columns[column], 0)  # -> 0 means missing, real deltas are shifted up by one
+                continue
+            scaled = round(value * scale)
+            _put_varint(self.columns[column], _zigzag(scaled - self.last[column]) + 1)
+            self.last[column] = scaled
+        self.count += 1
+        self.start_ts = point[0] if self.start_ts is None else self.start_ts
+        self.end_ts = point[0]
+
+    def data(self) -> bytes:
+        header = bytearray()
+        for column in self.columns:
+            _put_varint(header, len(column))  # -> lets a reader jump straight to one column
+        return bytes(header) + b''.join(self.columns)
+
+
+def encode_chunk(points: list) -> bytes:
+    chunk = Chunk()
+    for point in points:
+        chunk.append(point)
+    return chunk.data()
+
+
+def decode_chunk(data: bytes, count: int) -> list:
+    pos = 0
+    sizes = []
+    for _ in range(len(FIELDS) + 1):
+        size, pos = _get_varint(data, pos)
+        sizes.append(size)
+    last = 0
+    stamps = []
+    for _ in range(count):
+        delta, pos = _get_varint(data, pos)
+        last += _unzigzag(delta)
+        stamps.append(last)
+    columns = [stamps]
+    for scale in SCALES:
+        values = []
+        last = 0
+        for _ in range(count):
+            token, pos = _get_varint(data, pos)
+            if token == 0:
+                values.append(None)
+                continue
+            last += _unzigzag(token - 1)
+            values.append(last / scale if scale > 1 else last)
+        columns.append(values)
+    return list(zip(*columns))
+
+
+def bucket_start(ts_ms: int, resolution: str) -> int:
+    width = RESOLUTIONS[resolution] * 1000
+    return ts_ms - ts_ms % width
+
+
+class TimeSeriesStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH, chunk_size: int = CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._open = {}  # -> coin -> points of its newest chunk, the only chunk that still grows
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                coin TEXT NOT NULL,
+                start_ts INTEGER NOT NULL,
+                end_ts INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (coin, start_ts)
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_coin_end ON chunks (coin, end_ts);
+            CREATE TABLE IF NOT EXISTS rollups (
+                coin TEXT NOT NULL,
+                resolution TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                open REAL NOT NULL,
+                high REAL NOT NULL,
+                low REAL NOT NULL,
+                close REAL NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (coin, resolution, bucket)
+            );
+        """)
+        self.conn.commit()
+
+    def _newest_chunk(self, coin: str) -> Chunk:
+        if coin not in self._open:
+            row = self.conn.execute(
+                "SELECT count, data FROM chunks WHERE coin = ? ORDER BY start_ts DESC LIMIT 1", (coin,)
+            ).fetchone()
+            chunk = Chunk()
+            for point in decode_chunk(row[1], row[0]) if row else []:
+                chunk.append(point)  # -> once per coin, after that appends only encode the new point
+            self._open[coin] = chunk
+        return self._open[coin]
+
+    def append_snapshot(self, cryptos: list, ts: float = None) -> int:
+        # -> one scrape of many coins, all stamped with the same time and written in one transaction
+        ts_ms = int((time.time() if ts is None else ts) * 1000)
+        chunk_rows = []
+        prices = []
+        with self._lock:
+            try:
+                for crypto in cryptos:
+                    coin = crypto['name']
+                    point = (ts_ms,) + tuple(crypto.get(field) for field in FIELDS)
+                    if point[1] is None:
+                        continue  # -> nothing to chart without a price
+                    chunk = self._newest_chunk(coin)
+                    if chunk.count and ts_ms <= chunk.end_ts:
+                        logging.warning(f"Skipped {coin} snapshot at {ts_ms}, history already goes to {chunk.end_ts}")
+                        continue
+                    if chunk.count >= self.chunk_size:
+                        chunk = self._open[coin] = Chunk()  # -> full, the next point starts a new row
+                    chunk.append(point)
+                    chunk_rows.append((coin, chunk.start_ts, chunk.end_ts, chunk.count, chunk.data()))
+                    prices.append((coin, ts_ms, point[1]))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (coin, start_ts, end_ts, count, data) VALUES (?, ?, ?, ?, ?)",
+                    chunk_rows
+                )
+                self._roll_up(prices)
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                self._open = {}  # -> may hold points that never reached the file
+                logging.error(f"Failed to store snapshot: {e}")
+                raise
+        logging.info(f"Stored {len(prices)} coin prices at {ts_ms}")
+        return len(prices)
+
+    def _roll_up(self, prices: list):
+        # -> prices are (coin, ts_ms, price), always newer than what is stored, so close is simply the latest
+        for resolution in RESOLUTIONS:
+            self.conn.executemany(
+                "INSERT INTO rollups (coin, resolution, bucket, open, high, low, close, count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (coin, resolution, bucket) DO UPDATE SET high = max(high, excluded.high), "
+                "low = min(low, excluded.low), close = excluded.close, count = count + 1",
+                [(coin, resolution, bucket_start(ts_ms, resolution), price, price, price, price)
+                 for coin, ts_ms, price in prices]
+            )
+
+    def points(self, coin: str, start: float = None, end: float = None) -> list:
+        # -> raw snapshots between start and end (unix seconds), only chunks that overlap are decoded
+        start_ms = int(start * 1000) if start is not None else 0
+        end_ms = int(end * 1000) if end is not None else 2 ** 62
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT count, data FROM chunks WHERE coin = ? AND end_ts >= ? AND start_ts <= ? ORDER BY start_ts",
+                (coin, start_ms, end_ms)
+            ).fetchall()
+        found = []
+        for count, data in rows:
+            for point in decode_chunk(data, count):
+                if start_ms <= point[0] <= end_ms:
+                    found.append(dict(zip(('ts',) + FIELDS, (point[0] / 1000,) + point[1:])))
+        return found
+
+    def ohlc(self, coin: str, resolution: str = '1h', start: float = None, end: float = None) -> list:
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution {resolution}, can use {', '.join(RESOLUTIONS)}")
+        start_ms = bucket_start(int(start * 1000), resolution) if start is not None else 0
+        end_ms = int(end * 1000) if end is not None else 2 ** 62
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT bucket, open, high, low, close, count FROM rollups "
+                "WHERE coin = ? AND resolution = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+                (coin, resolution, start_ms, end_ms)
+            ).fetchall()
+        return [{'ts': bucket / 1000, 'open': first, 'high': high, 'low': low, 'close': last, 'count': count}
+                for bucket, first, high, low, last, count in rows]
+
+    def coins(self) -> list:
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT coin FROM chunks ORDER BY coin")]
+
+    def rebuild_rollups(self):
+        # -> only needed when RESOLUTIONS changes, the rollups are otherwise kept up to date by every append
+        with self._lock:
+            rows = self.conn.execute("SELECT coin, count, data FROM chunks ORDER BY coin, start_ts").fetchall()
+            self.conn.execute("DELETE FROM rollups")
+            for coin, count, data in rows:
+                self._roll_up([(coin, point[0], point[1]) for point in decode_chunk(data, count)])
+            self.conn.commit()
+        logging.info(f"Rebuilt rollups from {len(rows)} chunks")
+
+    def stats(self) -> dict:
+        with self._lock:
+            chunks, points, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(count), 0), COALESCE(SUM(length(data)), 0) FROM chunks"
+            ).fetchone()
+        return {
+            'chunks': chunks,
+            'points': points,
+            'bytes': size,
+            'bytes_per_point': round(size / points, 2) if points else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = DEFAULT_STORE_PATH) -> TimeSeriesStore:
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = TimeSeriesStore(path)
+        return _stores[path]
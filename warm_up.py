@@ -0,0 +1,74 @@
+import importlib.util
+import logging
+import socket
+import threading
+import time
+
+HEAVY_MODULES = ('numpy', 'pandas', 'bs4', 'lxml.html', 'jinja2', 'matplotlib.figure', 'selenium.webdriver')
+DEFAULT_TIMEOUT = 30.0  # -> seconds to wait for the server to listen before giving up on the warm-up
+
+_status = {'state': 'idle', 'steps': {}, 'failed': {}}
+_status_lock = threading.Lock()
+
+
+def status() -> dict:
+    with _status_lock:
+        return {'state': _status['state'], 'steps': dict(_status['steps']), 'failed': dict(_status['failed'])}
+
+
+def preload(modules: tuple = HEAVY_MODULES) -> list:
+    # -> imports what the first requests would otherwise import, packages that are not installed are skipped
+    done = []
+    for name in modules:
+        if importlib.util.find_spec(name.partition('.')[0]) is None:
+            continue
+        __import__(name)  # -> unlike importlib.import_module this shows up in python -X importtime
+        done.append(name)
+    return done
+
+
+def run_steps(steps: list) -> dict:
+    # -> steps are (name, callable), one that fails is logged and the rest still run
+    with _status_lock:
+        _status['state'] = 'running'
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logging.error(f"Warm-up step {name} failed: {e}")
+            with _status_lock:
+                _status['failed'][name] = str(e)
+            continue
+        took = (time.perf_counter() - start) * 1000
+        logging.info(f"Warm-up step {name} took {took:.0f} ms")
+        with _status_lock:
+            _status['steps'][name] = round(took, 1)
+    with _status_lock:
+        _status['state'] = 'done'
+    return status()
+
+
+def wait_until_serving(host: str, port: int, timeout: float = DEFAULT_TIMEOUT) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def warm_up_when_serving(steps: list, host: str = '127.0.0.1', port: int = 5000,
+                         timeout: float = DEFAULT_TIMEOUT) -> threading.Thread:
+    # -> the server takes requests first, the warm-up runs behind it so startup does not wait for it
+    def run():
+        if not wait_until_serving(host, port, timeout):
+            logging.error(f"Nothing listening on {host}:{port} after {timeout:.0f} s, no warm-up")
+            return
+        run_steps(steps)
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
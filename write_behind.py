@@ -0,0 +1,99 @@
+import logging
+import queue
+import threading
+import time
+
+DEFAULT_BATCH_SIZE = 200  # -> records per write, key columns * batch must stay under sql server's 2100 params
+DEFAULT_MAX_ITEMS = 1000  # -> a full queue makes the scraper wait for the database
+DEFAULT_FLUSH_INTERVAL = 0.5  # -> seconds a short batch may wait for more records
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    # -> the scraper puts records in as it finds them, a background thread writes them in batches
+    def __init__(self, write_batch, batch_size: int = DEFAULT_BATCH_SIZE, max_items: int = DEFAULT_MAX_ITEMS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, name: str = 'records'):
+        self.write_batch = write_batch  # -> takes a list of records, runs on the writer thread only
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self.error = None
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.blocked_seconds = 0.0  # -> time the scraper spent waiting on a full queue
+        self.max_depth = 0
+        self._queue = queue.Queue(maxsize=max_items)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{name}", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()  # -> records scraped before a failure are still saved
+        except Exception:
+            if exc_type is None:
+                raise  # -> a scrape error is the more useful one to show
+
+    def put(self, record):
+        if self.error is not None:
+            raise self.error  # -> stop scraping, nothing more can be saved
+        if self._closed:
+            raise RuntimeError(f"Write-behind queue for {self.name} is closed")
+        start = time.monotonic()
+        self._queue.put(record)  # -> blocks while full, that is the backpressure
+        self.blocked_seconds += time.monotonic() - start
+        self.queued += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+            if self.error is not None:
+                continue  # -> keep taking records so the scraper never blocks on a dead writer
+            try:
+                self.write_batch(batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                logging.error(f"Failed to write {len(batch)} {self.name}, dropping the rest: {e}")
+                self.error = e
+
+    def close(self) -> dict:
+        # -> waits until everything queued is written, then raises the first write error if there was one
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+            logging.info(f"Write-behind queue for {self.name} closed: {self.stats()}")
+        if self.error is not None:
+            raise self.error
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            'queued': self.queued,
+            'written': self.written,
+            'batches': self.batches,
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'max_depth': self.max_depth,
+            'failed': self.error is not None
+        }